@@ -32,6 +32,7 @@ from copernicusmarine.core_functions.exceptions import (
     NetCDFCompressionNotAvailable,
     NoServiceAvailable,
     NotEnoughPlatformMetadata,
+    OutputNotCompatibleForAppend,
     PlatformsSubsettingNotAvailable,
     ServiceDoesNotExistForCommand,
     ServiceNotAvailable,
@@ -45,14 +46,20 @@ from copernicusmarine.core_functions.fields_query_builder import (
     WrongFieldsError,
 )
 from copernicusmarine.core_functions.models import (
+    DaskConfiguration,
     FileGet,
     FileStatus,
     GeographicalExtent,
+    QueryPlan,
     ResponseGet,
     ResponseSubset,
+    ServiceCost,
+    ServicePlan,
+    ServiceQueryPlan,
     StatusCode,
     StatusMessage,
     TimeExtent,
+    VariableQueryPlan,
 )
 from copernicusmarine.python_interface.describe import describe
 from copernicusmarine.python_interface.get import get
@@ -84,6 +91,7 @@ __all__ = [
     "CoperniusMarineServiceShortNames",
     "CouldNotConnectToAuthenticationSystem",
     "CredentialsCannotBeNone",
+    "DaskConfiguration",
     "DatasetNotFound",
     "DatasetVersionNotFound",
     "DatasetVersionPartNotFound",
@@ -95,19 +103,25 @@ __all__ = [
     "NoServiceAvailable",
     "NotEnoughPlatformMetadata",
     "OtherOptionsPassedWithCreateTemplate",
+    "OutputNotCompatibleForAppend",
     "PlatformsSubsettingNotAvailable",
     "ProductNotFound",
+    "QueryPlan",
     "ResponseGet",
     "ResponseSubset",
+    "ServiceCost",
     "ServiceDoesNotExistForCommand",
     "ServiceNotAvailable",
     "ServiceNotHandled",
     "ServiceNotSupported",
+    "ServicePlan",
+    "ServiceQueryPlan",
     "StatusCode",
     "FileStatus",
     "StatusMessage",
     "TimeExtent",
     "VariableDoesNotExistInTheDataset",
+    "VariableQueryPlan",
     "WrongDatetimeFormat",
     "WrongFormatRequested",
     "DatasetUpdating",
@@ -5,7 +5,7 @@ from enum import Enum
 from typing import Literal, Type, TypeVar
 
 import pystac
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 from copernicusmarine.command_line_interface.exception_handler import (
     log_exception_debug,
@@ -262,6 +262,10 @@ class CopernicusMarineVariable(BaseModel):
     bbox: list[float] | None
     #: List of coordinates of the variable.
     coordinates: list[CopernicusMarineCoordinate]
+    # Data type of the values stored in the Zarr store, for internal use
+    _dtype = PrivateAttr(default=None)
+    # Average size of the compressed Zarr chunks in bytes, for internal use
+    _chunk_size = PrivateAttr(default=None)
 
     @classmethod
     def from_metadata_item(
@@ -276,7 +280,10 @@ class CopernicusMarineVariable(BaseModel):
         cube_dimensions = metadata_item.properties["cube:dimensions"]
         extra_fields_asset = asset.extra_fields
         dimensions = extra_fields_asset.get("viewDims") or {}
-        return cls(
+        view_variable = (extra_fields_asset.get("viewVariables") or {}).get(
+            variable_id
+        ) or {}
+        variable = cls(
             short_name=variable_id,
             standard_name=cube_variable["standardName"],
             units=cube_variable.get("unit") or "",
@@ -294,6 +301,9 @@ class CopernicusMarineVariable(BaseModel):
                 if dimension in cube_variable["dimensions"]
             ],
         )
+        variable._dtype = view_variable.get("dtype")
+        variable._chunk_size = view_variable.get("chunkSize")
+        return variable
 
 
 Service = TypeVar("Service", bound="CopernicusMarineService")
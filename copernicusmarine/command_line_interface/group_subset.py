@@ -31,10 +31,12 @@ from copernicusmarine.core_functions.fields_query_builder import (
 from copernicusmarine.core_functions.models import (
     DEFAULT_COORDINATES_SELECTION_METHOD,
     DEFAULT_COORDINATES_SELECTION_METHODS,
+    DEFAULT_DASK_SCHEDULERS,
     DEFAULT_FILE_FORMATS,
     DEFAULT_VERTICAL_AXES,
     DEFAULT_VERTICAL_AXIS,
     CoordinatesSelectionMethod,
+    DaskScheduler,
     FileFormat,
     ResponseSubset,
     VerticalAxis,
@@ -254,7 +256,7 @@ def cli_subset():
     default=False,
     cls=MutuallyExclusiveOption,
     help=documentation_utils.SUBSET["OVERWRITE_HELP"],
-    mutually_exclusive=["skip-existing"],
+    mutually_exclusive=["skip-existing", "append"],
 )
 @click.option(
     "--skip-existing",
@@ -263,7 +265,7 @@ def cli_subset():
     default=False,
     cls=MutuallyExclusiveOption,
     help=documentation_utils.SUBSET["SKIP_EXISTING_HELP"],
-    mutually_exclusive=["overwrite"],
+    mutually_exclusive=["overwrite", "append"],
 )
 @click.option(
     "--service",
@@ -297,6 +299,13 @@ def cli_subset():
     default=False,
     help=documentation_utils.SUBSET["DRY_RUN_HELP"],
 )
+@click.option(
+    "--explain",
+    type=bool,
+    is_flag=True,
+    default=False,
+    help=documentation_utils.SUBSET["EXPLAIN_HELP"],
+)
 @click.option(
     "--response-fields",
     "-r",
@@ -326,6 +335,40 @@ def cli_subset():
     default=-1,
     help=documentation_utils.SUBSET["CHUNK_SIZE_LIMIT_HELP"],
 )
+@click.option(
+    "--resumable",
+    type=bool,
+    default=False,
+    is_flag=True,
+    help=documentation_utils.SUBSET["RESUMABLE_HELP"],
+)
+@click.option(
+    "--append",
+    type=bool,
+    default=False,
+    is_flag=True,
+    cls=MutuallyExclusiveOption,
+    help=documentation_utils.SUBSET["APPEND_HELP"],
+    mutually_exclusive=["overwrite", "skip-existing"],
+)
+@click.option(
+    "--dask-scheduler",
+    type=click.Choice(DEFAULT_DASK_SCHEDULERS),
+    default=None,
+    help=documentation_utils.SUBSET["DASK_SCHEDULER_HELP"],
+)
+@click.option(
+    "--dask-number-of-workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help=documentation_utils.SUBSET["DASK_NUMBER_OF_WORKERS_HELP"],
+)
+@click.option(
+    "--dask-memory-limit",
+    type=str,
+    default=None,
+    help=documentation_utils.SUBSET["DASK_MEMORY_LIMIT_HELP"],
+)
 @click.option(
     "--staging",
     type=bool,
@@ -390,10 +433,16 @@ def subset(
     overwrite: bool,
     skip_existing: bool,
     dry_run: bool,
+    explain: bool,
     response_fields: str | None,
     disable_progress_bar: bool,
     log_level: str,
     chunk_size_limit: int,
+    dask_scheduler: DaskScheduler | None,
+    dask_number_of_workers: int | None,
+    dask_memory_limit: str | None,
+    resumable: bool,
+    append: bool,
     staging: bool,
     raise_if_updating: bool,
     force_download: bool,
@@ -439,10 +488,16 @@ def subset(
         overwrite=overwrite,
         skip_existing=skip_existing,
         dry_run=dry_run,
+        explain=explain,
         disable_progress_bar=disable_progress_bar,
         netcdf_compression_level=netcdf_compression_level,
         netcdf3_compatible=netcdf3_compatible,
         chunk_size_limit=chunk_size_limit,
+        dask_scheduler=dask_scheduler,
+        dask_number_of_workers=dask_number_of_workers,
+        dask_memory_limit=dask_memory_limit,
+        resumable=resumable,
+        append=append,
         raise_if_updating=raise_if_updating,
         minimum_longitude=minimum_longitude,
         maximum_longitude=maximum_longitude,
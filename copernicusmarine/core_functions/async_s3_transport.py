@@ -0,0 +1,170 @@
+import asyncio
+import importlib.util
+import logging
+from typing import Any, Literal, get_args
+from urllib.parse import quote
+
+import botocore.exceptions
+
+from copernicusmarine.core_functions.environment_variables import (
+    COPERNICUSMARINE_S3_TRANSPORT,
+)
+from copernicusmarine.core_functions.sessions import (
+    HTTPS_TIMEOUT,
+    TRUST_ENV,
+    get_ssl_context,
+)
+from copernicusmarine.core_functions.utils import (
+    construct_query_params_for_marine_data_store_monitoring,
+)
+
+logger = logging.getLogger("copernicusmarine")
+
+S3Transport = Literal["boto3", "aiohttp"]
+DEFAULT_S3_TRANSPORT: S3Transport = "boto3"
+S3_TRANSPORTS = list(get_args(S3Transport))
+
+
+def select_s3_transport(s3_transport: str | None) -> S3Transport:
+    """
+    Select the transport used by the Zarr stores to fetch the objects.
+
+    If not set, the environment variable ``COPERNICUSMARINE_S3_TRANSPORT``
+    is used. Falls back to boto3 if the aiohttp library is not installed.
+    """
+    requested_transport = s3_transport or COPERNICUSMARINE_S3_TRANSPORT
+    if requested_transport not in S3_TRANSPORTS:
+        logger.warning(
+            f"Unknown S3 transport '{requested_transport}'. "
+            f"Available transports: {S3_TRANSPORTS}. "
+            f"Using '{DEFAULT_S3_TRANSPORT}'."
+        )
+        return DEFAULT_S3_TRANSPORT
+    if requested_transport == "aiohttp" and not importlib.util.find_spec(
+        "aiohttp"
+    ):
+        logger.warning(
+            "The 'aiohttp' package is required to use the aiohttp "
+            "S3 transport. Using 'boto3' instead."
+        )
+        return "boto3"
+    return requested_transport  # type: ignore
+
+
+class AiohttpS3Transport:
+    """
+    Asynchronous transport to get objects from the unsigned S3 buckets
+    of the Marine Data Store, without using one thread per request.
+
+    Adds the same monitoring query parameters as the boto3 sessions.
+    Errors are converted to botocore errors so that they can be
+    classified the same way as the boto3 ones.
+    """
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        username: str | None = None,
+        max_connections: int = 100,
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.query_params = (
+            construct_query_params_for_marine_data_store_monitoring(username)
+        )
+        self.max_connections = max_connections
+        self._client_session: Any = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def __getstate__(self):
+        """
+        Ensure aiohttp session isn't pickled.
+        """
+        st = self.__dict__.copy()
+        st["_client_session"] = None
+        st["_loop"] = None
+        return st
+
+    def _get_client_session(self) -> Any:
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        # aiohttp sessions are bound to the event loop they were created in
+        if (
+            self._client_session is None
+            or self._client_session.closed
+            or self._loop is not loop
+        ):
+            logger.debug("Creating new aiohttp session")
+            ssl_context = get_ssl_context()
+            self._client_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    ssl=ssl_context if ssl_context else False,
+                ),
+                timeout=aiohttp.ClientTimeout(total=HTTPS_TIMEOUT),
+                trust_env=TRUST_ENV,
+            )
+            self._loop = loop
+        return self._client_session
+
+    async def get_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        byte_range: str | None = None,
+    ) -> bytes:
+        headers = {"Range": byte_range} if byte_range else {}
+        return await self._request(
+            "GET", "GetObject", bucket_name, object_key, headers
+        )
+
+    async def head_object(self, bucket_name: str, object_key: str) -> None:
+        """
+        Raises a ClientError if the object does not exist.
+        """
+        await self._request("HEAD", "HeadObject", bucket_name, object_key, {})
+
+    async def _request(
+        self,
+        method: str,
+        operation_name: str,
+        bucket_name: str,
+        object_key: str,
+        headers: dict[str, str],
+    ) -> bytes:
+        import aiohttp
+
+        url = f"{self.endpoint_url}/{bucket_name}/{quote(object_key)}"
+        try:
+            async with self._get_client_session().request(
+                method, url, params=self.query_params, headers=headers
+            ) as response:
+                if response.status >= 300:
+                    raise botocore.exceptions.ClientError(
+                        {
+                            "Error": {
+                                "Code": str(response.status),
+                                "Message": response.reason or "",
+                            },
+                            "ResponseMetadata": {
+                                "HTTPStatusCode": response.status,
+                                "HTTPHeaders": dict(response.headers),
+                            },
+                        },
+                        operation_name,
+                    )
+                return await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise ConnectionError(f"Failed to {method} {url}: {e!r}") from e
+
+    def close(self) -> None:
+        if self._client_session is None or self._client_session.closed:
+            return
+        if self._loop is not None and not self._loop.is_closed():
+            if self._loop.is_running():
+                asyncio.run_coroutine_threadsafe(
+                    self._client_session.close(), self._loop
+                )
+            else:
+                self._loop.run_until_complete(self._client_session.close())
+        self._client_session = None
@@ -0,0 +1,368 @@
+import hashlib
+import logging
+import pathlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from copernicusmarine.core_functions.environment_variables import (
+    COPERNICUSMARINE_CHUNK_CACHE_DIRECTORY,
+    COPERNICUSMARINE_CHUNK_CACHE_MAX_SIZE,
+    COPERNICUSMARINE_MEMORY_CHUNK_CACHE_SIZE,
+)
+
+logger = logging.getLogger("copernicusmarine")
+
+CHUNK_CACHE_FILENAME = "chunks.sqlite"
+CHUNK_CACHE_SCHEMA_VERSION = 1
+# the eviction frees space down to this fraction of the maximum size
+CHUNK_CACHE_LOW_WATER_RATIO = 0.8
+# number of hits whose access times are written at once
+ACCESS_TIMES_BATCH_SIZE = 64
+
+try:
+    CHUNK_CACHE_MAX_SIZE_MB = float(COPERNICUSMARINE_CHUNK_CACHE_MAX_SIZE)
+except ValueError:
+    CHUNK_CACHE_MAX_SIZE_MB = 5000
+
+try:
+    MEMORY_CHUNK_CACHE_SIZE_MB = float(
+        COPERNICUSMARINE_MEMORY_CHUNK_CACHE_SIZE
+    )
+except ValueError:
+    MEMORY_CHUNK_CACHE_SIZE_MB = 0
+
+
+class DiskChunkCache:
+    """
+    Persistent cache of the objects fetched from the ARCO Zarr stores.
+
+    The objects are stored in a SQLite database so that the cache can
+    safely be shared between threads and processes. When the total size
+    of the cache exceeds the maximum size, the least recently used objects
+    are evicted until the cache is back under the low-water mark.
+
+    The total size is kept up to date in a metadata row, so that writes
+    do not scan the cache. The access times of the hits are recorded in
+    batches, so that reads do not wait for the write lock. The eviction
+    order is therefore approximate.
+
+    Any error with the cache is logged and considered as a cache miss:
+    the cache should never make a download fail.
+    """
+
+    def __init__(self, directory: pathlib.Path, max_size_mb: float):
+        self.directory = directory
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self._local = threading.local()
+        self._access_times: dict[str, float] = {}
+        self._access_times_lock = threading.Lock()
+
+    def __getstate__(self):
+        """
+        Ensure SQLite connections and locks aren't pickled.
+        """
+        st = self.__dict__.copy()
+        del st["_local"]
+        del st["_access_times_lock"]
+        st["_access_times"] = {}
+        return st
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._access_times_lock = threading.Lock()
+
+    @staticmethod
+    def build_key(
+        endpoint: str,
+        bucket: str,
+        object_key: str,
+        version: str | None,
+    ) -> str:
+        return hashlib.sha256(
+            "\n".join([endpoint, bucket, object_key, version or ""]).encode()
+        ).hexdigest()
+
+    def _create_schema(self, connection: sqlite3.Connection) -> None:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            (schema_version,) = connection.execute(
+                "PRAGMA user_version"
+            ).fetchone()
+            if schema_version != CHUNK_CACHE_SCHEMA_VERSION:
+                # the objects are the last column so that the sizes and
+                # the access times are read without the overflow pages
+                connection.execute("DROP TABLE IF EXISTS chunks")
+                connection.execute("DROP TABLE IF EXISTS chunks_metadata")
+                connection.execute(
+                    "CREATE TABLE chunks ("
+                    "key TEXT PRIMARY KEY, "
+                    "size INTEGER NOT NULL, "
+                    "last_access REAL NOT NULL, "
+                    "value BLOB NOT NULL)"
+                )
+                connection.execute(
+                    "CREATE INDEX chunks_last_access ON chunks (last_access)"
+                )
+                connection.execute(
+                    "CREATE TABLE chunks_metadata ("
+                    "name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+                )
+                connection.execute(
+                    "INSERT INTO chunks_metadata VALUES ('total_size', 0)"
+                )
+                connection.execute(
+                    f"PRAGMA user_version = {CHUNK_CACHE_SCHEMA_VERSION}"
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _get_connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.directory / CHUNK_CACHE_FILENAME,
+                timeout=60,
+                isolation_level=None,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._create_schema(connection)
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            connection = self._get_connection()
+            row = connection.execute(
+                "SELECT value FROM chunks WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            with self._access_times_lock:
+                self._access_times[key] = time.time()
+                flush = len(self._access_times) >= ACCESS_TIMES_BATCH_SIZE
+            if flush:
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    self._flush_access_times(connection)
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+            return row[0]
+        except sqlite3.Error as e:
+            logger.debug(f"Chunk cache error while reading: {e}")
+            return None
+
+    def _flush_access_times(self, connection: sqlite3.Connection) -> None:
+        with self._access_times_lock:
+            access_times, self._access_times = self._access_times, {}
+        connection.executemany(
+            "UPDATE chunks SET last_access = ? WHERE key = ?",
+            [(access_time, key) for key, access_time in access_times.items()],
+        )
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_size:
+            return
+        try:
+            connection = self._get_connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._flush_access_times(connection)
+                previous_row = connection.execute(
+                    "SELECT size FROM chunks WHERE key = ?", (key,)
+                ).fetchone()
+                connection.execute(
+                    "INSERT OR REPLACE INTO chunks "
+                    "(key, size, last_access, value) VALUES (?, ?, ?, ?)",
+                    (key, len(value), time.time(), value),
+                )
+                connection.execute(
+                    "UPDATE chunks_metadata SET value = value + ? "
+                    "WHERE name = 'total_size'",
+                    (len(value) - (previous_row[0] if previous_row else 0),),
+                )
+                total_size = self._get_total_size(connection)
+                if total_size > self.max_size:
+                    self._evict(connection, total_size)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.debug(f"Chunk cache error while writing: {e}")
+
+    @staticmethod
+    def _get_total_size(connection: sqlite3.Connection) -> int:
+        (total_size,) = connection.execute(
+            "SELECT value FROM chunks_metadata WHERE name = 'total_size'"
+        ).fetchone()
+        return total_size
+
+    def _evict(self, connection: sqlite3.Connection, total_size: int) -> None:
+        low_water_mark = self.max_size * CHUNK_CACHE_LOW_WATER_RATIO
+        keys_to_evict = []
+        evicted_size = 0
+        for key, size in connection.execute(
+            "SELECT key, size FROM chunks ORDER BY last_access"
+        ):
+            keys_to_evict.append((key,))
+            evicted_size += size
+            if total_size - evicted_size <= low_water_mark:
+                break
+        logger.debug(f"Evicting {len(keys_to_evict)} objects from cache")
+        connection.executemany(
+            "DELETE FROM chunks WHERE key = ?", keys_to_evict
+        )
+        connection.execute(
+            "UPDATE chunks_metadata SET value = value - ? "
+            "WHERE name = 'total_size'",
+            (evicted_size,),
+        )
+
+
+def get_chunk_cache() -> DiskChunkCache | None:
+    """
+    The cache is only enabled if the environment variable
+    ``COPERNICUSMARINE_CHUNK_CACHE_DIRECTORY`` is set.
+    """
+    if not COPERNICUSMARINE_CHUNK_CACHE_DIRECTORY:
+        return None
+    return DiskChunkCache(
+        pathlib.Path(COPERNICUSMARINE_CHUNK_CACHE_DIRECTORY).expanduser(),
+        CHUNK_CACHE_MAX_SIZE_MB,
+    )
+
+
+class MemoryChunkCache:
+    """
+    In-process cache of the objects fetched from one ARCO Zarr store,
+    bounded by the total size of the objects. When the cache is full,
+    the least recently used objects are evicted.
+
+    The cache is shared by all the stores opened on the same
+    endpoint, bucket and root path, see ``get_memory_chunk_cache``.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        bucket: str,
+        root_path: str,
+        max_size_mb: float,
+    ):
+        self.endpoint = endpoint
+        self.bucket = bucket
+        self.root_path = root_path
+        self.max_size_mb = max_size_mb
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._values: OrderedDict[
+            tuple[str, str | None], bytes
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        """
+        Resolve to the shared cache of the process when unpickled
+        e.g. in a dask worker, instead of copying the cached values.
+        """
+        return (
+            _get_shared_memory_chunk_cache,
+            (self.endpoint, self.bucket, self.root_path, self.max_size_mb),
+        )
+
+    def get(self, key: str, version: str | None) -> bytes | None:
+        with self._lock:
+            value = self._values.get((key, version))
+            if value is None:
+                self.misses += 1
+                return None
+            self._values.move_to_end((key, version))
+            self.hits += 1
+            return value
+
+    def set(self, key: str, version: str | None, value: bytes) -> None:
+        if len(value) > self.max_size:
+            return
+        with self._lock:
+            previous_value = self._values.pop((key, version), None)
+            if previous_value is not None:
+                self.size -= len(previous_value)
+            self._values[(key, version)] = value
+            self.size += len(value)
+            while self.size > self.max_size:
+                _, evicted_value = self._values.popitem(last=False)
+                self.size -= len(evicted_value)
+
+    def statistics(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "number_of_objects": len(self._values),
+                "size": self.size,
+            }
+
+
+_memory_chunk_caches: dict[tuple[str, str, str], MemoryChunkCache] = {}
+_memory_chunk_caches_lock = threading.Lock()
+
+
+def _get_shared_memory_chunk_cache(
+    endpoint: str,
+    bucket: str,
+    root_path: str,
+    max_size_mb: float,
+) -> MemoryChunkCache:
+    with _memory_chunk_caches_lock:
+        memory_chunk_cache = _memory_chunk_caches.get(
+            (endpoint, bucket, root_path)
+        )
+        if memory_chunk_cache is None:
+            memory_chunk_cache = MemoryChunkCache(
+                endpoint, bucket, root_path, max_size_mb
+            )
+            _memory_chunk_caches[
+                (endpoint, bucket, root_path)
+            ] = memory_chunk_cache
+        return memory_chunk_cache
+
+
+def get_memory_chunk_cache(
+    endpoint: str,
+    bucket: str,
+    root_path: str,
+) -> MemoryChunkCache | None:
+    """
+    The cache is only enabled if the environment variable
+    ``COPERNICUSMARINE_MEMORY_CHUNK_CACHE_SIZE`` is set to a positive size.
+    """
+    if MEMORY_CHUNK_CACHE_SIZE_MB <= 0:
+        return None
+    return _get_shared_memory_chunk_cache(
+        endpoint, bucket, root_path, MEMORY_CHUNK_CACHE_SIZE_MB
+    )
+
+
+def get_memory_chunk_cache_statistics() -> dict[str, dict[str, int]]:
+    """
+    Hits, misses and size of the in-memory chunk caches of the process,
+    by dataset URL.
+    """
+    with _memory_chunk_caches_lock:
+        memory_chunk_caches = list(_memory_chunk_caches.values())
+    return {
+        f"{cache.endpoint}/{cache.bucket}/{cache.root_path}": (
+            cache.statistics()
+        )
+        for cache in memory_chunk_caches
+    }
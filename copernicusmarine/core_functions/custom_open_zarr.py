@@ -1,8 +1,22 @@
 import logging
+from typing import Any, Literal
 
 import xarray
 import zarr
 
+from copernicusmarine.core_functions.async_s3_transport import (
+    S3Transport,
+    select_s3_transport,
+)
+from copernicusmarine.core_functions.chunk_cache import (
+    get_chunk_cache,
+    get_memory_chunk_cache,
+)
+from copernicusmarine.core_functions.environment_variables import (
+    COPERNICUSMARINE_HEDGED_REQUESTS,
+)
+from copernicusmarine.core_functions.request_hedging import RequestHedging
+from copernicusmarine.core_functions.retry_policy import RetryPolicy
 from copernicusmarine.core_functions.utils import parse_access_dataset_url
 
 logger = logging.getLogger("copernicusmarine")
@@ -11,48 +25,224 @@ logger = logging.getLogger("copernicusmarine")
 def open_zarr(
     dataset_url: str,
     copernicus_marine_username: str | None = None,
+    s3_transport: S3Transport | None = None,
+    cache_version: str | None = None,
+    index_windows: dict[str, slice] | None = None,
+    retry_policy: RetryPolicy | None = None,
     **kwargs,
 ) -> xarray.Dataset:
+    """
+    Open a Zarr dataset from the Marine Data Store with the custom stores.
+
+    ``s3_transport`` selects how the chunks are fetched: ``boto3`` (default)
+    or ``aiohttp`` for a native asyncio transport, only used with
+    Zarr Python library v3. If not set, uses the environment variable
+    ``COPERNICUSMARINE_S3_TRANSPORT``.
+
+    If the environment variable ``COPERNICUSMARINE_CHUNK_CACHE_DIRECTORY``
+    is set, the chunks are cached on disk. ``cache_version`` should change
+    when the dataset is updated e.g. the ARCO updated date of the part.
+
+    If the environment variable ``COPERNICUSMARINE_MEMORY_CHUNK_CACHE_SIZE``
+    is set, the chunks are also cached in memory, shared by all the datasets
+    opened on the same store.
+
+    If the environment variable ``COPERNICUSMARINE_HEDGED_REQUESTS`` is set
+    to "True", slow chunk requests are hedged (Zarr Python library v3 only).
+
+    ``retry_policy`` is shared by the datasets opened for the same job so
+    that they share its retry budget.
+
+    ``index_windows`` restricts the dataset to windows of indexes of its
+    dimensions, see ``open_zarr_store``.
+    """
+    selected_s3_transport = select_s3_transport(s3_transport)
+    # without version, the cache could not be invalidated
+    chunk_cache = get_chunk_cache() if cache_version else None
+    if chunk_cache:
+        logger.debug(f"Using chunk cache at {chunk_cache.directory}")
     (
         endpoint,
         bucket,
         root_path,
     ) = parse_access_dataset_url(dataset_url)
+    memory_chunk_cache = get_memory_chunk_cache(endpoint, bucket, root_path)
     if zarr.__version__.startswith("2"):
         from copernicusmarine.core_functions.custom_s3_store_zarr_v2 import (
             CustomS3StoreZarrV2,
         )
 
         logger.debug("Using custom store for Zarr Python library v2")
+        if selected_s3_transport != "boto3":
+            logger.debug(
+                f"S3 transport '{selected_s3_transport}' is not available "
+                "with Zarr Python library v2. Using 'boto3' instead."
+            )
         store = CustomS3StoreZarrV2(
             endpoint=endpoint,
             bucket=bucket,
             root_path=root_path,
             copernicus_marine_username=copernicus_marine_username,
+            chunk_cache=chunk_cache,
+            cache_version=cache_version,
+            memory_chunk_cache=memory_chunk_cache,
+            retry_policy=retry_policy,
         )
-        return xarray.open_zarr(
-            store,
-            decode_times=True,
-            decode_timedelta=True,
-            **kwargs,
-        )
+        return open_zarr_store(store, index_windows, **kwargs)
     else:
         from copernicusmarine.core_functions.custom_s3_store_zarr_v3 import (
             CustomS3StoreZarrV3,
         )
 
-        logger.debug("Using custom store for Zarr Python library v3")
+        logger.debug(
+            "Using custom store for Zarr Python library v3 "
+            f"with '{selected_s3_transport}' S3 transport"
+        )
         store = CustomS3StoreZarrV3(
             endpoint=endpoint,
             bucket=bucket,
             root_path=root_path,
             copernicus_marine_username=copernicus_marine_username,
+            s3_transport=selected_s3_transport,
+            chunk_cache=chunk_cache,
+            cache_version=cache_version,
+            memory_chunk_cache=memory_chunk_cache,
+            retry_policy=retry_policy,
+            request_hedging=(
+                RequestHedging() if COPERNICUSMARINE_HEDGED_REQUESTS else None
+            ),
             read_only=True,
         )
+        return open_zarr_store(store, index_windows, zarr_format=2, **kwargs)
+
+
+def _open_zarr_group(store: Any, zarr_format: Literal[2, 3] | None) -> Any:
+    if zarr.__version__.startswith("2"):
+        try:
+            return zarr.open_consolidated(store, mode="r")
+        except KeyError:
+            return zarr.open_group(store, mode="r")
+    return zarr.open_group(store, mode="r", zarr_format=zarr_format)
+
+
+def _read_coordinate_window(array: Any, window: slice) -> xarray.Variable:
+    attributes = dict(array.attrs)
+    dimensions = attributes.pop("_ARRAY_DIMENSIONS")
+    if array.fill_value is not None:
+        attributes["_FillValue"] = array.fill_value
+    return xarray.Variable(
+        dimensions,
+        array[window],
+        attributes,
+        encoding={
+            "chunks": array.chunks,
+            "preferred_chunks": dict(zip(dimensions, array.chunks)),
+        },
+    )
+
+
+def _get_window_chunks(
+    window: slice, size: int, chunk_size: int
+) -> tuple[int, ...]:
+    start, stop, _ = window.indices(size)
+    if chunk_size <= 0:
+        return (stop - start,)
+    boundaries = [
+        start,
+        *range((start // chunk_size + 1) * chunk_size, stop, chunk_size),
+        stop,
+    ]
+    return tuple(
+        next_boundary - boundary
+        for boundary, next_boundary in zip(boundaries, boundaries[1:])
+    )
+
+
+def _chunk_windows(
+    dataset: xarray.Dataset,
+    chunks: dict[str, int],
+    index_windows: dict[str, slice],
+    sizes: dict[str, int],
+) -> xarray.Dataset:
+    """
+    Chunk the dataset restricted to the index windows as xarray chunks the
+    whole dataset on open, with the chunks aligned on the stored chunks,
+    so that the dask graph only has tasks for the chunks of the windows.
+    """
+    data_variables = {}
+    coordinates = {}
+    for name, variable in dataset.variables.items():
+        if name in dataset.indexes or not variable.dims:
+            continue
+        preferred_chunks = variable.encoding.get("preferred_chunks", {})
+        chunked_variable = variable.chunk(
+            {
+                dimension: _get_window_chunks(
+                    index_windows.get(dimension, slice(None)),
+                    sizes[dimension],
+                    chunks.get(dimension)
+                    or preferred_chunks.get(dimension)
+                    or sizes[dimension],
+                )
+                for dimension in map(str, variable.dims)
+            }
+        )
+        if name in dataset.coords:
+            coordinates[name] = chunked_variable
+        else:
+            data_variables[name] = chunked_variable
+    return dataset.assign_coords(coordinates).assign(data_variables)
+
+
+def open_zarr_store(
+    store: Any,
+    index_windows: dict[str, slice] | None = None,
+    **kwargs,
+) -> xarray.Dataset:
+    """
+    Open the Zarr store with xarray.
+
+    With ``index_windows``, the dimensions are restricted to the windows
+    of indexes as soon as the dataset is opened: the coordinates of the
+    windows are not read on open and only the chunks of the coordinates
+    that overlap the windows are downloaded. With ``chunks`` as a dict,
+    the dask arrays are only built on the windows.
+    """
+    if not index_windows:
         return xarray.open_zarr(
             store,
             decode_times=True,
             decode_timedelta=True,
-            zarr_format=2,
             **kwargs,
         )
+    chunks = kwargs.pop("chunks", "auto")
+    chunk_windows = isinstance(chunks, dict)
+    dataset = xarray.open_zarr(
+        store,
+        decode_times=True,
+        decode_timedelta=True,
+        drop_variables=list(index_windows),
+        chunks=None if chunk_windows else chunks,
+        **kwargs,
+    )
+    index_windows = {
+        dimension: window
+        for dimension, window in index_windows.items()
+        if dimension in dataset.dims
+    }
+    group = _open_zarr_group(store, kwargs.get("zarr_format"))
+    coordinates = xarray.decode_cf(
+        xarray.Dataset(
+            {
+                dimension: _read_coordinate_window(group[dimension], window)
+                for dimension, window in index_windows.items()
+            }
+        ),
+        decode_times=True,
+        decode_timedelta=True,
+    )
+    sizes = {str(dimension): size for dimension, size in dataset.sizes.items()}
+    dataset = dataset.isel(index_windows)
+    if chunk_windows:
+        dataset = _chunk_windows(dataset, chunks, index_windows, sizes)
+    return dataset.assign_coords(coordinates.variables)
@@ -1,12 +1,18 @@
 import logging
-import time
 from collections.abc import MutableMapping
 
 import botocore.config
 import botocore.exceptions
 import botocore.session
 
+from copernicusmarine.core_functions.chunk_cache import (
+    DiskChunkCache,
+    MemoryChunkCache,
+)
+from copernicusmarine.core_functions.retry_policy import RetryPolicy
+from copernicusmarine.core_functions.s3_errors import is_missing_object_error
 from copernicusmarine.core_functions.sessions import ConfiguredBoto3Session
+from copernicusmarine.core_functions.single_flight import SingleFlight
 
 logger = logging.getLogger("copernicusmarine")
 
@@ -20,23 +26,40 @@ class CustomS3StoreZarrV2(MutableMapping):
         copernicus_marine_username: str | None = None,
         number_of_retries: int = 9,
         initial_retry_wait_seconds: int = 1,
+        chunk_cache: DiskChunkCache | None = None,
+        cache_version: str | None = None,
+        memory_chunk_cache: MemoryChunkCache | None = None,
+        retry_policy: RetryPolicy | None = None,
     ):
         self._root_path = root_path.lstrip("/")
         self._bucket = bucket
         self._endpoint = endpoint
         self._copernicus_marine_username = copernicus_marine_username
 
-        self.number_of_retries = number_of_retries
-        self.initial_retry_wait_seconds = initial_retry_wait_seconds
+        # a policy shared by the stores of a job shares its retry budget
+        self.retry_policy = retry_policy or RetryPolicy(
+            number_of_retries=number_of_retries,
+            initial_retry_wait_seconds=initial_retry_wait_seconds,
+        )
 
         self._session = None
+        # keys known to be missing on the remote server,
+        # e.g. land tiles that are never written in sparse stores
+        self._missing_keys: set[str] = set()
+        # the version is used to invalidate the cache
+        # when the dataset is updated
+        self._chunk_cache = chunk_cache
+        self._cache_version = cache_version
+        self._memory_chunk_cache = memory_chunk_cache
+        # concurrent requests for the same object share the same fetch
+        self._single_flight = SingleFlight()
 
     def __getstate__(self):
         """
         Ensure boto3 client isn't pickled.
         """
         st = self.__dict__.copy()
-        st["_client"] = None
+        st["_session"] = None
         return st
 
     def __setstate__(self, state):
@@ -45,7 +68,6 @@ class CustomS3StoreZarrV2(MutableMapping):
 
     def _get_session(self):
         if self._session is None:
-            logger.debug("Creating new boto3 client")
             session = ConfiguredBoto3Session(
                 self._endpoint,
                 ["GetObject", "HeadObject", "ListObjectsV2"],
@@ -56,36 +78,72 @@ class CustomS3StoreZarrV2(MutableMapping):
         return self._session
 
     def __getitem__(self, key):
-        def fn():
-            full_key = f"{self._root_path}/{key}"
-            try:
-                resp = self._get_session().get_object(
-                    bucket_name=self._bucket, object_key=full_key
-                )
-                res = resp["Body"].read()
-                return res
-            except botocore.exceptions.ClientError as e:
-                raise KeyError(key) from e
+        if key in self._missing_keys:
+            raise KeyError(key)
+        full_key = f"{self._root_path}/{key}"
+        if self._memory_chunk_cache is not None:
+            cached_value = self._memory_chunk_cache.get(
+                key, self._cache_version
+            )
+            if cached_value is not None:
+                return cached_value
+        cache_key = None
+        if self._chunk_cache is not None:
+            cache_key = DiskChunkCache.build_key(
+                self._endpoint, self._bucket, full_key, self._cache_version
+            )
+            cached_value = self._chunk_cache.get(cache_key)
+            if cached_value is not None:
+                if self._memory_chunk_cache is not None:
+                    self._memory_chunk_cache.set(
+                        key, self._cache_version, cached_value
+                    )
+                return cached_value
 
-        return self.with_retries(fn)
+        def fn():
+            resp = self._get_session().get_object(
+                bucket_name=self._bucket, object_key=full_key
+            )
+            res = resp["Body"].read()
+            return res
+
+        def fetch_and_cache():
+            res = self.with_retries(fn)
+            if self._chunk_cache is not None and cache_key is not None:
+                self._chunk_cache.set(cache_key, res)
+            if self._memory_chunk_cache is not None:
+                self._memory_chunk_cache.set(key, self._cache_version, res)
+            return res
+
+        try:
+            return self._single_flight.run(key, fetch_and_cache)
+        except botocore.exceptions.ClientError as e:
+            if is_missing_object_error(e):
+                self._missing_keys.add(key)
+            raise KeyError(key) from e
 
     def __contains__(self, key):
+        if key in self._missing_keys:
+            return False
         full_key = f"{self._root_path}/{key}"
 
         def fn():
             try:
-                self._get_session().s3_client.head_object(
-                    Bucket=self._bucket, Key=full_key
+                self._get_session().head_object(
+                    bucket_name=self._bucket, object_key=full_key
                 )
                 return True
             except botocore.exceptions.ClientError as e:
-                if "404" in str(e) or "403" in str(e):
+                if is_missing_object_error(e):
+                    self._missing_keys.add(key)
                     return False
                 raise
 
         return self.with_retries(fn)
 
     def __setitem__(self, key, value, headers=None):
+        self._missing_keys.discard(key)
+
         def fn():
             full_key = f"{self._root_path}/{key}"
             final_headers = headers if headers is not None else {}
@@ -112,8 +170,12 @@ class CustomS3StoreZarrV2(MutableMapping):
         keys = []
         cursor = self._root_path
         while True:
-            resp = self._get_session().s3_client.list_objects_v2(
-                Bucket=self._bucket, Prefix=self._root_path, StartAfter=cursor
+            resp = self.with_retries(
+                lambda: self._get_session().s3_client.list_objects_v2(
+                    Bucket=self._bucket,
+                    Prefix=self._root_path,
+                    StartAfter=cursor,
+                )
             )
             entries = resp.get("Contents", [])
             keys += [
@@ -140,20 +202,12 @@ class CustomS3StoreZarrV2(MutableMapping):
             objects = list(
                 map(lambda k: {"Key": f"{self._root_path}/{k}"}, some_keys)
             )
-            self._get_session().s3_client.delete_objects(
-                Bucket=self._bucket, Delete={"Objects": objects}
+            self.with_retries(
+                lambda: self._get_session().s3_client.delete_objects(
+                    Bucket=self._bucket, Delete={"Objects": objects}
+                )
             )
             idx += 1000
 
     def with_retries(self, fn):
-        retry_delay = self.initial_retry_wait_seconds
-        for index_try in range(self.number_of_retries):
-            try:
-                return fn()
-            except Exception as e:
-                if index_try == self.number_of_retries - 1:
-                    raise e
-                logger.debug(f"S3 error: {e}")
-                logger.debug(f"Retrying in {retry_delay} s...")
-                time.sleep(retry_delay)
-                retry_delay *= 2
+        return self.retry_policy.call(fn)
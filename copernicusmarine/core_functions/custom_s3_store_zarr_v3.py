@@ -1,20 +1,77 @@
 import asyncio
 import logging
+import threading
 import time
 from collections.abc import AsyncIterator, Iterable
+from concurrent.futures import ThreadPoolExecutor
 
 import botocore.config
 import botocore.exceptions
 import botocore.session
-from zarr.abc.store import ByteRequest, Store
-from zarr.core.buffer import Buffer, BufferPrototype, default_buffer_prototype
+from zarr.abc.store import (
+    ByteRequest,
+    OffsetByteRequest,
+    RangeByteRequest,
+    Store,
+    SuffixByteRequest,
+)
+from zarr.core.buffer import Buffer, BufferPrototype
 from zarr.core.common import BytesLike
 
+from copernicusmarine.core_functions.async_s3_transport import (
+    DEFAULT_S3_TRANSPORT,
+    AiohttpS3Transport,
+    S3Transport,
+)
+from copernicusmarine.core_functions.chunk_cache import (
+    DiskChunkCache,
+    MemoryChunkCache,
+)
+from copernicusmarine.core_functions.request_hedging import RequestHedging
+from copernicusmarine.core_functions.retry_policy import RetryPolicy
+from copernicusmarine.core_functions.s3_errors import is_missing_object_error
 from copernicusmarine.core_functions.sessions import ConfiguredBoto3Session
+from copernicusmarine.core_functions.single_flight import SingleFlight
 
 logger = logging.getLogger("copernicusmarine")
 
 
+def _byte_request_to_http_range(byte_range: ByteRequest | None) -> str | None:
+    """
+    Convert a zarr byte request to an HTTP Range header value.
+
+    Note that the end of a ``RangeByteRequest`` is exclusive
+    whereas the end of an HTTP range is inclusive.
+    """
+    if byte_range is None:
+        return None
+    if isinstance(byte_range, RangeByteRequest):
+        return f"bytes={byte_range.start}-{byte_range.end - 1}"
+    if isinstance(byte_range, OffsetByteRequest):
+        return f"bytes={byte_range.offset}-"
+    if isinstance(byte_range, SuffixByteRequest):
+        return f"bytes=-{byte_range.suffix}"
+    raise TypeError(f"Unexpected byte range request: {byte_range}")
+
+
+class PartialValuesError(Exception):
+    """
+    Exception raised when several of the values requested at once
+    could not be fetched. ``errors`` maps the failed keys to their error.
+    A single failure is raised as is.
+    """
+
+    def __init__(self, errors: dict[str, BaseException]):
+        self.errors = errors
+        super().__init__(
+            f"Failed to get {len(errors)} values: "
+            + ", ".join(
+                f"{key} ({type(error).__name__}: {error})"
+                for key, error in errors.items()
+            )
+        )
+
+
 class CustomS3StoreZarrV3(Store):
     def __init__(
         self,
@@ -24,6 +81,13 @@ class CustomS3StoreZarrV3(Store):
         copernicus_marine_username: str | None = None,
         number_of_retries: int = 9,
         initial_retry_wait_seconds: int = 1,
+        max_concurrent_requests: int = 32,
+        s3_transport: S3Transport = DEFAULT_S3_TRANSPORT,
+        chunk_cache: DiskChunkCache | None = None,
+        cache_version: str | None = None,
+        memory_chunk_cache: MemoryChunkCache | None = None,
+        retry_policy: RetryPolicy | None = None,
+        request_hedging: RequestHedging | None = None,
         **kwargs,
     ):
         super().__init__(**kwargs)
@@ -32,34 +96,116 @@ class CustomS3StoreZarrV3(Store):
         self._endpoint = endpoint
         self._copernicus_marine_username = copernicus_marine_username
 
-        self.number_of_retries = number_of_retries
-        self.initial_retry_wait_seconds = initial_retry_wait_seconds
+        # a policy shared by the stores of a job shares its retry budget
+        self.retry_policy = retry_policy or RetryPolicy(
+            number_of_retries=number_of_retries,
+            initial_retry_wait_seconds=initial_retry_wait_seconds,
+        )
+        self.max_concurrent_requests = max_concurrent_requests
+        self.s3_transport = s3_transport
 
         self._session = None
+        self._async_transport: AiohttpS3Transport | None = None
+        # the boto3 requests run in the threads of the store so that
+        # at most max_concurrent_requests requests are in flight
+        self._executor: ThreadPoolExecutor | None = None
+        # threads busy or reserved, including the ones of cancelled hedges
+        self._threads_in_use = 0
+        self._threads_in_use_lock = threading.Lock()
+        # keys known to be missing on the remote server,
+        # e.g. land tiles that are never written in sparse stores
+        self._missing_keys: set[str] = set()
+        # the version is used to invalidate the cache
+        # when the dataset is updated
+        self._chunk_cache = chunk_cache
+        self._cache_version = cache_version
+        self._memory_chunk_cache = memory_chunk_cache
+        self._request_hedging = request_hedging
+        # concurrent requests for the same object share the same fetch
+        self._single_flight = SingleFlight()
 
     def _get_session(self):
         if self._session is None:
-            logger.debug("Creating new boto3 client")
             session = ConfiguredBoto3Session(
                 self._endpoint,
                 ["GetObject", "HeadObject", "ListObjectsV2"],
                 self._copernicus_marine_username,
                 need_resources=False,
+                max_pool_connections=self.max_concurrent_requests,
             )
             self._session = session
         return self._session
 
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(self.max_concurrent_requests, 1),
+                thread_name_prefix="copernicusmarine-s3",
+            )
+        return self._executor
+
+    def _release_thread(self, _=None) -> None:
+        with self._threads_in_use_lock:
+            self._threads_in_use -= 1
+
+    def _has_free_thread(self) -> bool:
+        with self._threads_in_use_lock:
+            return self._threads_in_use < self.max_concurrent_requests
+
+    async def _run_in_executor(self, fn):
+        """
+        Run the request with retries in a thread of the store. The thread
+        is counted as used until the request ends, even if cancelled.
+        """
+        with self._threads_in_use_lock:
+            self._threads_in_use += 1
+        try:
+            future = self._get_executor().submit(self.with_retries, fn)
+        except BaseException:
+            self._release_thread()
+            raise
+        future.add_done_callback(self._release_thread)
+        return await asyncio.wrap_future(future)
+
+    def _record_latency(self, start: float) -> None:
+        if self._request_hedging is not None:
+            self._request_hedging.record_latency(time.monotonic() - start)
+
+    def _get_async_transport(self) -> AiohttpS3Transport:
+        if self._async_transport is None:
+            self._async_transport = AiohttpS3Transport(
+                self._endpoint,
+                self._copernicus_marine_username,
+                max_connections=self.max_concurrent_requests,
+            )
+        return self._async_transport
+
     def __getstate__(self):
         """
-        Ensure boto3 client isn't pickled.
+        Ensure boto3 client, aiohttp session and threads aren't pickled.
         """
         st = self.__dict__.copy()
         st["_session"] = None
+        st["_async_transport"] = None
+        st["_executor"] = None
+        st["_threads_in_use"] = 0
+        del st["_threads_in_use_lock"]
         return st
 
     def __setstate__(self, state):
         self.__dict__.update(state)
         self._session = None
+        self._async_transport = None
+        self._executor = None
+        self._threads_in_use_lock = threading.Lock()
+
+    def close(self) -> None:
+        super().close()
+        if self._async_transport is not None:
+            self._async_transport.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
     def __eq__(self, value: object) -> bool:
         """Equality comparison."""
@@ -78,37 +224,204 @@ class CustomS3StoreZarrV3(Store):
         prototype: BufferPrototype,
         byte_range: ByteRequest | None = None,
     ) -> Buffer | None:
-        loop = asyncio.get_running_loop()
+        if key in self._missing_keys:
+            return None
+        if (
+            isinstance(byte_range, RangeByteRequest)
+            and byte_range.end <= byte_range.start
+        ) or (
+            isinstance(byte_range, SuffixByteRequest)
+            and byte_range.suffix <= 0
+        ):
+            # empty ranges cannot be expressed as HTTP ranges
+            return prototype.buffer.from_bytes(b"")
+        if byte_range is not None:
+            # only complete objects are cached
+            http_range = _byte_request_to_http_range(byte_range)
+            res = await self._single_flight.run_async(
+                (key, http_range), lambda: self._fetch(key, http_range)
+            )
+            return (
+                prototype.buffer.from_bytes(res) if res is not None else None
+            )
+        full_key = f"{self._root_path}/{key}"
+        if self._memory_chunk_cache is not None:
+            cached_value = self._memory_chunk_cache.get(
+                key, self._cache_version
+            )
+            if cached_value is not None:
+                return prototype.buffer.from_bytes(cached_value)
+        cache_key = None
+        if self._chunk_cache is not None:
+            cache_key = DiskChunkCache.build_key(
+                self._endpoint, self._bucket, full_key, self._cache_version
+            )
+            cached_value = self._chunk_cache.get(cache_key)
+            if cached_value is not None:
+                if self._memory_chunk_cache is not None:
+                    self._memory_chunk_cache.set(
+                        key, self._cache_version, cached_value
+                    )
+                return prototype.buffer.from_bytes(cached_value)
+        res = await self._single_flight.run_async(
+            (key, None), lambda: self._fetch_and_cache(key, cache_key)
+        )
+        if res is None:
+            return None
+        return prototype.buffer.from_bytes(res)
+
+    async def _fetch_and_cache(
+        self, key: str, cache_key: str | None
+    ) -> bytes | None:
+        res = await self._fetch(key, None)
+        if res is None:
+            return None
+        if self._chunk_cache is not None and cache_key is not None:
+            self._chunk_cache.set(cache_key, res)
+        if self._memory_chunk_cache is not None:
+            self._memory_chunk_cache.set(key, self._cache_version, res)
+        return res
+
+    async def _fetch(self, key: str, http_range: str | None) -> bytes | None:
+        """
+        Fetch the object from the remote server, with a hedged request
+        if enabled. Returns None if the object does not exist.
+        """
+        if self._request_hedging is None:
+            return await self._fetch_with_retries(key, http_range)
+        return await self._request_hedging.run(
+            lambda: self._fetch_with_retries(key, http_range),
+            # with boto3, a cancelled hedge keeps its thread until it ends
+            can_hedge=(
+                None
+                if self.s3_transport == "aiohttp"
+                else self._has_free_thread
+            ),
+        )
+
+    async def _fetch_with_retries(
+        self, key: str, http_range: str | None
+    ) -> bytes | None:
+        full_key = f"{self._root_path}/{key}"
+        if self.s3_transport == "aiohttp":
+
+            async def async_fn():
+                start = time.monotonic()
+                try:
+                    res = await self._get_async_transport().get_object(
+                        bucket_name=self._bucket,
+                        object_key=full_key,
+                        byte_range=http_range,
+                    )
+                except botocore.exceptions.ClientError as e:
+                    if is_missing_object_error(e):
+                        self._missing_keys.add(key)
+                        self._record_latency(start)
+                        return None
+                    raise
+                self._record_latency(start)
+                return res
+
+            return await self.with_retries_async(async_fn)
 
         def fn():
-            full_key = f"{self._root_path}/{key}"
+            start = time.monotonic()
             try:
                 resp = self._get_session().get_object(
                     bucket_name=self._bucket,
                     object_key=full_key,
+                    byte_range=http_range,
                 )
                 res = resp["Body"].read()
-                return prototype.buffer.from_bytes(res)
             except botocore.exceptions.ClientError as e:
-                status = e.response["ResponseMetadata"]["HTTPStatusCode"]
-                if status in (404, 403):
+                if is_missing_object_error(e):
+                    self._missing_keys.add(key)
+                    self._record_latency(start)
                     return None
                 raise
+            self._record_latency(start)
+            return res
 
-        return await loop.run_in_executor(None, self.with_retries, fn)
+        return await self._run_in_executor(fn)
 
     async def get_partial_values(
         self,
         prototype: BufferPrototype,
         key_ranges: Iterable[tuple[str, ByteRequest | None]],
     ) -> list[Buffer | None]:
-        return [
-            await self.get(key, prototype, byte_range)
-            for key, byte_range in key_ranges
-        ]
+        """
+        Fetch the values concurrently, with at most
+        ``max_concurrent_requests`` requests in flight.
+        The results are returned in the order of the requests.
+        """
+        key_ranges = list(key_ranges)
+        semaphore = asyncio.Semaphore(max(self.max_concurrent_requests, 1))
+
+        async def bounded_get(
+            key: str, byte_range: ByteRequest | None
+        ) -> Buffer | None:
+            async with semaphore:
+                return await self.get(key, prototype, byte_range)
+
+        results = await asyncio.gather(
+            *(bounded_get(key, byte_range) for key, byte_range in key_ranges),
+            return_exceptions=True,
+        )
+        errors = {
+            key: result
+            for (key, _), result in zip(key_ranges, results)
+            if isinstance(result, BaseException)
+        }
+        for key, error in errors.items():
+            logger.debug(f"Failed to get {key}: {error}")
+        for error in errors.values():
+            # e.g. the cancellation of the request, not a failure of a key
+            if not isinstance(error, Exception):
+                raise error
+        if len(errors) == 1:
+            # the callers may handle the error of a key, e.g. ClientError
+            raise next(iter(errors.values()))
+        if errors:
+            raise PartialValuesError(errors) from next(iter(errors.values()))
+        return results  # type: ignore
 
     async def exists(self, key: str) -> bool:
-        return (await self.get(key, default_buffer_prototype())) is not None
+        """
+        Check the existence of the object with a HEAD request
+        so that no payload is downloaded.
+        """
+        if key in self._missing_keys:
+            return False
+        full_key = f"{self._root_path}/{key}"
+        if self.s3_transport == "aiohttp":
+
+            async def async_fn():
+                try:
+                    await self._get_async_transport().head_object(
+                        bucket_name=self._bucket, object_key=full_key
+                    )
+                    return True
+                except botocore.exceptions.ClientError as e:
+                    if is_missing_object_error(e):
+                        self._missing_keys.add(key)
+                        return False
+                    raise
+
+            return await self.with_retries_async(async_fn)
+
+        def fn():
+            try:
+                self._get_session().head_object(
+                    bucket_name=self._bucket, object_key=full_key
+                )
+                return True
+            except botocore.exceptions.ClientError as e:
+                if is_missing_object_error(e):
+                    self._missing_keys.add(key)
+                    return False
+                raise
+
+        return await self._run_in_executor(fn)
 
     def supports_writes(self) -> bool:
         return False
@@ -138,10 +451,12 @@ class CustomS3StoreZarrV3(Store):
         keys = []
         cursor = self._root_path
         while True:
-            resp = self._get_session().s3_client.list_objects_v2(
-                Bucket=self._bucket,
-                Prefix=self._root_path + prefix,
-                StartAfter=cursor,
+            resp = self.with_retries(
+                lambda: self._get_session().s3_client.list_objects_v2(
+                    Bucket=self._bucket,
+                    Prefix=self._root_path + prefix,
+                    StartAfter=cursor,
+                )
             )
             entries = resp.get("Contents", [])
             keys += [
@@ -166,14 +481,7 @@ class CustomS3StoreZarrV3(Store):
             yield key
 
     def with_retries(self, fn):
-        retry_delay = self.initial_retry_wait_seconds
-        for index_try in range(self.number_of_retries):
-            try:
-                return fn()
-            except Exception as e:
-                if index_try == self.number_of_retries - 1:
-                    raise e
-                logger.debug(f"S3 error: {e}")
-                logger.debug(f"Retrying in {retry_delay} s...")
-                time.sleep(retry_delay)
-                retry_delay *= 2
+        return self.retry_policy.call(fn)
+
+    async def with_retries_async(self, fn):
+        return await self.retry_policy.call_async(fn)
@@ -235,7 +235,7 @@ SUBSET: dict[str, str] = {
         "If not set or set to ``None``, defaults to NetCDF '.nc' for gridded datasets "
         "and to CSV '.csv' for sparse datasets. "
         "Output filename extension takes priority over this option if both are set. "
-        "For gridded datasets, the following formats are available: netcdf, zarr, csv. "
+        "For gridded datasets, the following formats are available: netcdf, zarr, csv, parquet. "  # noqa
         "For sparse datasets, the following formats are available: csv, netcdf, parquet."  # noqa
     ),
     "MOTU_API_REQUEST_HELP": (
@@ -254,6 +254,39 @@ SUBSET: dict[str, str] = {
         "behaves similarly to 'chunks=auto' from ``xarray``. Positive integer"
         " values and '-1' are accepted. This is an experimental feature."
     ),
+    "RESUMABLE_HELP": (
+        "If set, Zarr subsets are written to a staging store next to the "
+        "output file, along with the list of the parts already downloaded. "
+        "If the download is interrupted, running the same request again "
+        "only downloads the missing parts. Only for the Zarr format."
+    ),
+    "EXPLAIN_HELP": (
+        "If True, runs query without downloading data and returns the plan "
+        "of the query for gridded datasets: the keys of the Zarr chunks "
+        "needed per variable, the number of requests, the estimated "
+        "compressed size and the number of waves of concurrent requests, "
+        "for each ARCO service of the dataset."
+    ),
+    "APPEND_HELP": (
+        "If the output file already exists, only the time steps after its "
+        "last one are downloaded and appended to it in place. The grid, the "
+        "variables and the encoding of the file must match the request. "
+        "Requires an output filename in NetCDF or Zarr format."
+    ),
+    "DASK_SCHEDULER_HELP": (
+        "Dask scheduler used to compute gridded subsets: 'threads' for a pool "
+        "of threads, 'processes' for a pool of processes or 'distributed' for "
+        "a local cluster of the ``distributed`` library. "
+        "If not set, the default scheduler of dask is used."
+    ),
+    "DASK_NUMBER_OF_WORKERS_HELP": (
+        "Number of threads, processes or workers of the dask scheduler. "
+        "Default is the number of CPUs. Only used with ``--dask-scheduler``."
+    ),
+    "DASK_MEMORY_LIMIT_HELP": (
+        "Memory limit of each worker of the local distributed cluster, "
+        "e.g. '4GB'. Only used with the 'distributed' dask scheduler."
+    ),
     "RAISE_IF_UPDATING_HELP": (
         "If set, raises a :class:`copernicusmarine.DatasetUpdating` "
         "error if the dataset is being updated "
@@ -54,3 +54,35 @@ COPERNICUSMARINE_CONFIG_URL = os.getenv(
 COPERNICUSMARINE_USE_THREADS = (
     os.getenv("COPERNICUSMARINE_USE_THREADS", "True") == "True"
 )
+
+COPERNICUSMARINE_S3_TRANSPORT = os.getenv(
+    "COPERNICUSMARINE_S3_TRANSPORT", "boto3"
+)
+
+COPERNICUSMARINE_CHUNK_CACHE_DIRECTORY = os.getenv(
+    "COPERNICUSMARINE_CHUNK_CACHE_DIRECTORY"
+)
+
+COPERNICUSMARINE_CHUNK_CACHE_MAX_SIZE = os.getenv(
+    "COPERNICUSMARINE_CHUNK_CACHE_MAX_SIZE", "5000"
+)
+
+COPERNICUSMARINE_MEMORY_CHUNK_CACHE_SIZE = os.getenv(
+    "COPERNICUSMARINE_MEMORY_CHUNK_CACHE_SIZE", "0"
+)
+
+COPERNICUSMARINE_HEDGED_REQUESTS = (
+    os.getenv("COPERNICUSMARINE_HEDGED_REQUESTS", "False") == "True"
+)
+
+COPERNICUSMARINE_NETCDF_MEMORY_BUDGET = os.getenv(
+    "COPERNICUSMARINE_NETCDF_MEMORY_BUDGET"
+)
+
+COPERNICUSMARINE_NETCDF_COMPRESSION_WORKERS = os.getenv(
+    "COPERNICUSMARINE_NETCDF_COMPRESSION_WORKERS", "0"
+)
+
+COPERNICUSMARINE_DASK_MEMORY_BUDGET = os.getenv(
+    "COPERNICUSMARINE_DASK_MEMORY_BUDGET"
+)
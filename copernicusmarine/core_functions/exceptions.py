@@ -271,3 +271,17 @@ class SplitNotAvailableForFormat(Exception):
             f"the requested format '{requested_format}'. "
             f"Please use it only with 'netcdf' format."
         )
+
+
+class OutputNotCompatibleForAppend(Exception):
+    """
+    Exception raised when the new time steps cannot be appended
+    to the existing output file.
+
+    The grid, the variables and the encoding of the existing file must be
+    the ones of the requested subset. Please use the same subset options as
+    the ones used to create the file or write to another file.
+    """
+
+    def __init__(self, message: str):
+        super().__init__(message)
@@ -6,6 +6,7 @@ from typing import Literal, get_args
 from pydantic import BaseModel, ConfigDict, field_serializer
 
 from copernicusmarine.catalogue_parser.models import (
+    CopernicusMarineService,
     CopernicusMarineServiceNames,
     short_name_from_service_name,
 )
@@ -14,7 +15,7 @@ FileFormat = Literal["netcdf", "zarr", "csv", "parquet"]
 DEFAULT_FILE_FORMAT: FileFormat = "netcdf"
 DEFAULT_FILE_FORMATS = list(get_args(FileFormat))
 
-FileExtension = Literal[".nc", ".zarr", ".csv"]
+FileExtension = Literal[".nc", ".zarr", ".csv", ".parquet"]
 DEFAULT_FILE_EXTENSION: FileExtension = ".nc"
 DEFAULT_FILE_EXTENSIONS = list(get_args(FileExtension))
 
@@ -36,6 +37,9 @@ DEFAULT_GEOSPATIAL_PROJECTION: GeoSpatialProjection = "lonlat"
 SplitOnTimeOption = Literal["hour", "day", "month", "year"]
 DEFAULT_SPLIT_ON_TIME_OPTIONS = list(get_args(SplitOnTimeOption))
 
+DaskScheduler = Literal["threads", "processes", "distributed"]
+DEFAULT_DASK_SCHEDULERS = list(get_args(DaskScheduler))
+
 
 class ChunkType(str, Enum):
     ARITHMETIC = "default"
@@ -81,6 +85,8 @@ class FileStatus(str, Enum):
     IGNORED = "IGNORED"
     #: The file has been overwritten and downloaded.
     OVERWRITTEN = "OVERWRITTEN"
+    #: New time steps have been appended to the existing file.
+    APPENDED = "APPENDED"
 
     @classmethod
     def get_status(cls, ignore: bool, overwrite: bool) -> "FileStatus":
@@ -201,6 +207,94 @@ class TimeExtent(BaseModel):
     coordinate_id: str
 
 
+class DaskConfiguration(BaseModel):
+    """Dask scheduler used to compute a subset."""
+
+    #: Name of the scheduler: threads, processes or distributed.
+    scheduler: DaskScheduler
+    #: Number of threads, processes or workers of the scheduler.
+    number_of_workers: int
+    #: Memory limit of each worker of the local distributed cluster.
+    memory_limit: str | None = None
+
+
+class VariableQueryPlan(BaseModel):
+    """Zarr chunks of a variable needed by a subset."""
+
+    #: Short name of the variable.
+    variable_id: str
+    #: Number of Zarr chunks to download.
+    number_of_chunks: int
+    #: Estimation of the size of the compressed chunks in bytes.
+    estimated_compressed_bytes: int
+    #: Keys of the Zarr chunks in the store of the service.
+    chunk_keys: list[str]
+
+
+class ServiceQueryPlan(BaseModel):
+    """Requests needed by a subset from an ARCO service."""
+
+    #: Name of the service.
+    service_name: str
+    #: Number of Zarr chunks to download for all the variables.
+    number_of_chunks: int
+    #: Number of requests: the chunks, the coordinates and the metadata.
+    number_of_requests: int
+    #: Estimation of the size of the compressed chunks in bytes.
+    estimated_compressed_bytes: int
+    #: Number of successive waves of requests at the configured concurrency.
+    number_of_request_waves: int
+    #: Zarr chunks needed per variable.
+    variables: list[VariableQueryPlan]
+
+
+class QueryPlan(BaseModel):
+    """
+    Chunk-level plan of a subset of a gridded dataset,
+    returned with the explain option.
+    """
+
+    #: Name of the service used for the subset.
+    selected_service: str
+    #: Number of requests sent concurrently to the service.
+    concurrency: int
+    #: Plan of each ARCO service of the dataset.
+    services: list[ServiceQueryPlan]
+    #: Service used per variable when the services are mixed.
+    #: None when all the variables come from the selected service.
+    variable_services: dict[str, str] | None = None
+
+
+class ServiceCost(BaseModel):
+    """Estimated cost of a subset of a gridded dataset."""
+
+    #: Estimation of the size of the compressed chunks to download in bytes.
+    estimated_compressed_bytes: int
+    #: Number of requests: the chunks, the coordinates and the metadata.
+    number_of_requests: int
+    #: Expected time to download the chunks in seconds,
+    #: at the configured concurrency.
+    expected_wall_time_seconds: float
+
+
+class ServicePlan(BaseModel):
+    """
+    Costs of the ARCO services compared to select the service of a subset
+    of a gridded dataset.
+    """
+
+    #: Name of the cheapest service.
+    selected_service: str
+    #: Service used per variable when mixing the services is cheaper.
+    #: None when all the variables come from the selected service.
+    variable_services: dict[str, str] | None = None
+    #: Cost of the subset per service.
+    costs: dict[str, ServiceCost]
+    #: Cost of the subset when each variable comes from its cheapest service.
+    #: None if the cheapest service is the same for all the variables.
+    mixed_cost: ServiceCost | None = None
+
+
 class ResponseSubset(BaseModel):
     """Metadata returned when using :func:`~copernicusmarine.subset`"""
 
@@ -249,6 +343,17 @@ class ResponseSubset(BaseModel):
     #: Relevant for sparse datasets in netCDF format.
     #: None when a single file is produced.
     file_names: list[str] | None = None
+    #: Dask scheduler used to compute the subset.
+    #: None when the default scheduler of dask is used
+    #: or for sparse datasets.
+    dask_configuration: DaskConfiguration | None = None
+    #: Chunk-level plan of the subset.
+    #: Only with the explain option, for gridded datasets.
+    query_plan: QueryPlan | None = None
+    #: Costs of the ARCO services compared to select the service.
+    #: Only with the dry run and explain options, for gridded datasets
+    #: when the service is not forced.
+    service_plan: ServicePlan | None = None
 
 
 # Internal use only
@@ -286,6 +391,21 @@ class DatasetChunking:
         return None
 
 
+@dataclass
+class ServiceVariables:
+    service: CopernicusMarineService
+    variables: list[str]
+    dataset_chunking: DatasetChunking | None
+
+
+@dataclass
+class IndexWindow:
+    # the stop is None when the window goes to the end of the coordinate
+    indexes: slice
+    requested_minimum: float | None
+    requested_maximum: float | None
+
+
 class _Command(Enum):
     GET = "get"
     SUBSET = "subset"
@@ -49,6 +49,8 @@ def open_dataset_function(
         dataset_chunking=retrieval_service.dataset_chunking,
         is_original_grid=retrieval_service.is_original_grid,
         dataset_valid_start_date=retrieval_service.dataset_valid_start_date,
+        arco_updated_date=retrieval_service.dataset_part.arco_updated_date,
+        mixed_services=retrieval_service.mixed_services,
     )
 
     return dataset
@@ -1,3 +1,5 @@
+from collections.abc import Iterator
+
 import pandas as pd
 
 from copernicusmarine.catalogue_parser.models import (
@@ -10,6 +12,9 @@ from copernicusmarine.core_functions.services_utils import RetrievalService
 from copernicusmarine.core_functions.subset import (
     retrieve_metadata_and_check_request,
 )
+from copernicusmarine.download_functions.dataframe_streaming import (
+    iter_dataframe_blocks,
+)
 from copernicusmarine.download_functions.download_sparse import (
     read_dataframe_sparse,
 )
@@ -21,6 +26,20 @@ from copernicusmarine.download_functions.download_zarr import (
 def read_dataframe_function(
     subset_request: SubsetRequest,
 ) -> pd.DataFrame:
+    return pd.concat(iter_dataframe_function(subset_request))
+
+
+def iter_dataframe_function(
+    subset_request: SubsetRequest,
+) -> Iterator[pd.DataFrame]:
+    """
+    Iterate over the rows of the subset by blocks of dataframes. For the
+    ARCO services, only one block is computed and held in memory at a
+    time. The sparse datasets are read in one dataframe.
+
+    The dataset is opened when called, so that the errors of the request
+    are raised before the iteration.
+    """
     retrieval_service: RetrievalService = retrieve_metadata_and_check_request(
         subset_request
     )
@@ -36,13 +55,17 @@ def read_dataframe_function(
         retrieval_service.service.service_format
         == CopernicusMarineServiceFormat.SQLITE
     ):
-        return read_dataframe_sparse(
-            username=subset_request.username,
-            subset_request=subset_request,
-            metadata_url=retrieval_service.metadata_url,
-            service=retrieval_service.service,
-            product_doi=retrieval_service.product_doi,
-            disable_progress_bar=subset_request.disable_progress_bar,
+        return iter(
+            [
+                read_dataframe_sparse(
+                    username=subset_request.username,
+                    subset_request=subset_request,
+                    metadata_url=retrieval_service.metadata_url,
+                    service=retrieval_service.service,
+                    product_doi=retrieval_service.product_doi,
+                    disable_progress_bar=subset_request.disable_progress_bar,
+                )
+            ]
         )
     else:
         dataset, _, _ = get_dataset_and_parameters(
@@ -53,5 +76,7 @@ def read_dataframe_function(
             dataset_chunking=retrieval_service.dataset_chunking,
             is_original_grid=retrieval_service.is_original_grid,
             dataset_valid_start_date=retrieval_service.dataset_valid_start_date,
+            arco_updated_date=retrieval_service.dataset_part.arco_updated_date,
+            mixed_services=retrieval_service.mixed_services,
         )
-        return dataset.to_dataframe()
+        return iter_dataframe_blocks(dataset)
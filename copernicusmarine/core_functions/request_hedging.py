@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+logger = logging.getLogger("copernicusmarine")
+
+_T = TypeVar("_T")
+
+
+class RequestHedging:
+    """
+    Hedged requests: if a request takes longer than a percentile of the
+    recent latencies, a duplicate request is sent and the first response
+    is used.
+
+    The number of duplicate requests is capped to a fraction of the
+    requests to keep the bandwidth overhead bounded.
+
+    The latencies are recorded by the caller with ``record_latency``,
+    for each try of a request, so that the waits between the retries
+    do not count.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95,
+        max_hedged_requests_ratio: float = 0.05,
+        minimum_number_of_samples: int = 20,
+        number_of_samples: int = 500,
+    ):
+        self.percentile = percentile
+        self.max_hedged_requests_ratio = max_hedged_requests_ratio
+        self.minimum_number_of_samples = minimum_number_of_samples
+        self.requests = 0
+        self.hedged_requests = 0
+        self.hedged_requests_won = 0
+        self._latencies: deque[float] = deque(maxlen=number_of_samples)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        st = self.__dict__.copy()
+        del st["_lock"]
+        return st
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get_deadline(self) -> float | None:
+        """
+        Delay after which the request is hedged,
+        None until enough latencies have been recorded.
+        """
+        with self._lock:
+            if len(self._latencies) < self.minimum_number_of_samples:
+                return None
+            latencies = sorted(self._latencies)
+        index = round(self.percentile / 100 * (len(latencies) - 1))
+        return latencies[index]
+
+    def record_latency(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _try_spend_hedged_request(self) -> bool:
+        with self._lock:
+            if (
+                self.hedged_requests + 1
+                > self.max_hedged_requests_ratio * self.requests
+            ):
+                return False
+            self.hedged_requests += 1
+            return True
+
+    def statistics(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged_requests": self.hedged_requests,
+                "hedged_requests_won": self.hedged_requests_won,
+            }
+
+    async def run(
+        self,
+        fn: Callable[[], Awaitable[_T]],
+        can_hedge: Callable[[], bool] | None = None,
+    ) -> _T:
+        """
+        Run the request and hedge it if it is slow. ``can_hedge`` tells
+        whether there is room for one more request, e.g. a free thread.
+        """
+        with self._lock:
+            self.requests += 1
+        deadline = self.get_deadline()
+        first_task = asyncio.ensure_future(fn())
+        if deadline is not None:
+            done, _ = await asyncio.wait({first_task}, timeout=deadline)
+            if (
+                not done
+                and (can_hedge is None or can_hedge())
+                and self._try_spend_hedged_request()
+            ):
+                logger.debug(
+                    f"Request slower than {deadline:.3f} s, "
+                    "sending a hedged request"
+                )
+                hedged_task = asyncio.ensure_future(fn())
+                return await self._first_successful(first_task, hedged_task)
+        return await first_task
+
+    async def _first_successful(
+        self,
+        first_task: "asyncio.Future[_T]",
+        hedged_task: "asyncio.Future[_T]",
+    ) -> _T:
+        pending = {first_task, hedged_task}
+        try:
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                successful_tasks = [
+                    task for task in done if task.exception() is None
+                ]
+                if successful_tasks:
+                    if first_task not in successful_tasks:
+                        with self._lock:
+                            self.hedged_requests_won += 1
+                    return successful_tasks[0].result()
+                # the other request may still succeed
+                if not pending:
+                    return done.pop().result()
+        finally:
+            for task in pending:
+                task.cancel()
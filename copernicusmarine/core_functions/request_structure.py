@@ -33,6 +33,7 @@ from copernicusmarine.core_functions.models import (
     DEFAULT_FILE_FORMAT,
     DEFAULT_VERTICAL_AXIS,
     CoordinatesSelectionMethod,
+    DaskScheduler,
     FileFormat,
     VerticalAxis,
 )
@@ -87,10 +88,16 @@ class SubsetRequest(BaseModel):
     netcdf_compression_level: int = 0
     netcdf3_compatible: bool = False
     dry_run: bool = False
+    explain: bool = False
     raise_if_updating: bool = False
     disable_progress_bar: bool = False
     staging: bool = False
     chunk_size_limit: int = -1
+    dask_scheduler: DaskScheduler | None = None
+    dask_number_of_workers: int | None = None
+    dask_memory_limit: str | None = None
+    resumable: bool = False
+    append: bool = False
 
     def update(self, new_dict: dict) -> "SubsetRequest":
         filtered_dict = {
@@ -275,11 +282,17 @@ def create_subset_request(
     overwrite: bool = False,
     skip_existing: bool = False,
     dry_run: bool = False,
+    explain: bool = False,
     disable_progress_bar: bool = False,
     staging: bool = False,
     netcdf_compression_level: int = 0,
     netcdf3_compatible: bool = False,
     chunk_size_limit: int = 0,
+    dask_scheduler: DaskScheduler | None = None,
+    dask_number_of_workers: int | None = None,
+    dask_memory_limit: str | None = None,
+    resumable: bool = False,
+    append: bool = False,
     raise_if_updating: bool = False,
     minimum_longitude: float | None = None,
     maximum_longitude: float | None = None,
@@ -354,6 +367,12 @@ def create_subset_request(
             f"package is required. "
             f"Please see {documentation_url}."
         )
+    if dask_scheduler == "distributed":
+        assert importlib.util.find_spec("distributed"), (
+            "To use the distributed dask scheduler, the 'distributed' "
+            "package is required. "
+            "Please install it with 'pip install distributed'."
+        )
     (
         minimum_x_axis,
         maximum_x_axis,
@@ -407,6 +426,9 @@ def create_subset_request(
         "service": service,
         "output_directory": output_directory,
         "chunk_size_limit": chunk_size_limit,
+        "dask_scheduler": dask_scheduler,
+        "dask_number_of_workers": dask_number_of_workers,
+        "dask_memory_limit": dask_memory_limit,
     }
     # To be able to distinguish between set and unset values
     if skip_existing:
@@ -419,17 +441,23 @@ def create_subset_request(
         ] = netcdf_compression_level
     if netcdf3_compatible:
         request_update_dict["netcdf3_compatible"] = netcdf3_compatible
+    if resumable:
+        request_update_dict["resumable"] = resumable
+    if append:
+        request_update_dict["append"] = append
     if coordinates_selection_method != DEFAULT_COORDINATES_SELECTION_METHOD:
         request_update_dict[
             "coordinates_selection_method"
         ] = coordinates_selection_method
     if raise_if_updating:
         request_update_dict["raise_if_updating"] = raise_if_updating
-    if dry_run:
-        request_update_dict["dry_run"] = dry_run
+    if dry_run or explain:
+        request_update_dict["dry_run"] = True
+    if explain:
+        request_update_dict["explain"] = explain
     if staging:
         request_update_dict["staging"] = staging
-    if disable_progress_bar or dry_run:
+    if disable_progress_bar or dry_run or explain:
         request_update_dict["disable_progress_bar"] = True
     if (
         output_filename
@@ -442,8 +470,23 @@ def create_subset_request(
             request_update_dict["file_format"] = "csv"
         elif suffix == ".zarr":
             request_update_dict["file_format"] = "zarr"
-
-    return subset_request.update(request_update_dict)
+        elif suffix == ".parquet":
+            request_update_dict["file_format"] = "parquet"
+
+    subset_request = subset_request.update(request_update_dict)
+    if subset_request.append:
+        if subset_request.overwrite:
+            raise MutuallyExclusiveArguments("append", "overwrite")
+        if subset_request.skip_existing:
+            raise MutuallyExclusiveArguments("append", "skip_existing")
+        if not subset_request.output_filename or (
+            subset_request.file_format not in ["netcdf", "zarr"]
+        ):
+            raise ValueError(
+                "The append option requires an output filename "
+                "in NetCDF or Zarr format."
+            )
+    return subset_request
 
 
 def get_geographical_inputs(
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from copernicusmarine.core_functions.s3_errors import (
+    get_retry_after_seconds,
+    is_retryable_error,
+)
+
+logger = logging.getLogger("copernicusmarine")
+
+_T = TypeVar("_T")
+
+DEFAULT_NUMBER_OF_RETRIES = 9
+DEFAULT_INITIAL_RETRY_WAIT_SECONDS = 1
+DEFAULT_MAX_RETRY_WAIT_SECONDS = 60
+
+
+class RetryStatistics:
+    """
+    Thread-safe counters of the requests and retries, for monitoring.
+    """
+
+    def __init__(self):
+        self._counters = {
+            "requests": 0,
+            "retries": 0,
+            "retry_after_honoured": 0,
+            "budget_exhausted": 0,
+            "failures": 0,
+        }
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        st = self.__dict__.copy()
+        del st["_lock"]
+        return st
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def as_dict(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+# counters of all the retry policies of the process
+_retry_statistics = RetryStatistics()
+
+
+def get_retry_statistics() -> dict[str, int]:
+    return _retry_statistics.as_dict()
+
+
+class RetryBudget:
+    """
+    Limit the retries of a job to a fraction of its requests,
+    so that retries cannot multiply the load on a struggling server.
+
+    A job can always retry ``minimum_retries`` times.
+    """
+
+    def __init__(self, ratio: float = 0.2, minimum_retries: int = 100):
+        self.ratio = ratio
+        self.minimum_retries = minimum_retries
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        st = self.__dict__.copy()
+        del st["_lock"]
+        return st
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def try_spend_retry(self) -> bool:
+        with self._lock:
+            if self.retries >= (
+                self.minimum_retries + self.ratio * self.requests
+            ):
+                return False
+            self.retries += 1
+            return True
+
+
+class RetryPolicy:
+    """
+    Retry policy for the requests to the S3 buckets of the Marine Data Store.
+
+    Only the errors classified as retryable are retried (see ``s3_errors``).
+    The wait between two tries follows a decorrelated jitter backoff
+    unless the server sends a ``Retry-After`` header. A request is tried
+    at most ``number_of_retries`` times and the retries of all the requests
+    sharing the policy are limited by the retry budget.
+    """
+
+    def __init__(
+        self,
+        number_of_retries: int = DEFAULT_NUMBER_OF_RETRIES,
+        initial_retry_wait_seconds: float = DEFAULT_INITIAL_RETRY_WAIT_SECONDS,
+        max_retry_wait_seconds: float = DEFAULT_MAX_RETRY_WAIT_SECONDS,
+        retry_budget: RetryBudget | None = None,
+    ):
+        self.number_of_retries = number_of_retries
+        self.initial_retry_wait_seconds = initial_retry_wait_seconds
+        self.max_retry_wait_seconds = max_retry_wait_seconds
+        self.retry_budget = retry_budget or RetryBudget()
+        self.statistics = RetryStatistics()
+
+    def _increment(self, counter: str) -> None:
+        self.statistics.increment(counter)
+        _retry_statistics.increment(counter)
+
+    def _should_retry(self, index_try: int, error: Exception) -> bool:
+        if index_try == self.number_of_retries - 1 or not is_retryable_error(
+            error
+        ):
+            self._increment("failures")
+            return False
+        if not self.retry_budget.try_spend_retry():
+            logger.debug("Retry budget exhausted, not retrying")
+            self._increment("budget_exhausted")
+            self._increment("failures")
+            return False
+        self._increment("retries")
+        return True
+
+    def _next_wait(self, previous_wait: float, error: Exception) -> float:
+        retry_after = get_retry_after_seconds(error)
+        if retry_after is not None:
+            self._increment("retry_after_honoured")
+            return min(retry_after, self.max_retry_wait_seconds)
+        return min(
+            self.max_retry_wait_seconds,
+            random.uniform(
+                self.initial_retry_wait_seconds,
+                max(previous_wait * 3, self.initial_retry_wait_seconds),
+            ),
+        )
+
+    def call(self, fn: Callable[[], _T]) -> _T:
+        self._increment("requests")
+        self.retry_budget.record_request()
+        wait = self.initial_retry_wait_seconds
+        for index_try in range(self.number_of_retries):
+            try:
+                return fn()
+            except Exception as e:
+                if not self._should_retry(index_try, e):
+                    raise e
+                wait = self._next_wait(wait, e)
+                logger.debug(f"S3 error: {e}")
+                logger.debug(f"Retrying in {wait:.2f} s...")
+                time.sleep(wait)
+        raise ValueError("The number of retries should be positive")
+
+    async def call_async(self, fn: Callable[[], Awaitable[_T]]) -> _T:
+        self._increment("requests")
+        self.retry_budget.record_request()
+        wait = self.initial_retry_wait_seconds
+        for index_try in range(self.number_of_retries):
+            try:
+                return await fn()
+            except Exception as e:
+                if not self._should_retry(index_try, e):
+                    raise e
+                wait = self._next_wait(wait, e)
+                logger.debug(f"S3 error: {e}")
+                logger.debug(f"Retrying in {wait:.2f} s...")
+                await asyncio.sleep(wait)
+        raise ValueError("The number of retries should be positive")
@@ -0,0 +1,112 @@
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+import botocore.exceptions
+from dateutil.tz import UTC
+
+# Status codes and error codes for which the object will never be available:
+# retrying these requests is useless (e.g. land tiles in sparse Zarr stores)
+MISSING_OBJECT_STATUS_CODES = {403, 404}
+MISSING_OBJECT_ERROR_CODES = {
+    "403",
+    "404",
+    "AccessDenied",
+    "Forbidden",
+    "NoSuchKey",
+    "NotFound",
+}
+
+# Status codes and error codes that are worth retrying
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_CODES = {
+    "InternalError",
+    "RequestLimitExceeded",
+    "RequestTimeout",
+    "RequestTimeTooSkewed",
+    "ServiceUnavailable",
+    "SlowDown",
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequests",
+}
+
+RETRYABLE_EXCEPTIONS = (
+    botocore.exceptions.ConnectionError,
+    botocore.exceptions.HTTPClientError,
+    botocore.exceptions.IncompleteReadError,
+    botocore.exceptions.ResponseStreamingError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+def _get_status_and_error_code(
+    error: botocore.exceptions.ClientError,
+) -> tuple[int | None, str | None]:
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    error_code = error.response.get("Error", {}).get("Code")
+    return status, str(error_code) if error_code is not None else None
+
+
+def is_missing_object_error(error: BaseException) -> bool:
+    """
+    Whether the error means that the requested object does not exist
+    (or is not accessible) on the remote server.
+    """
+    if not isinstance(error, botocore.exceptions.ClientError):
+        return False
+    status, error_code = _get_status_and_error_code(error)
+    return (
+        status in MISSING_OBJECT_STATUS_CODES
+        or error_code in MISSING_OBJECT_ERROR_CODES
+    )
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Whether the request that raised the error could succeed if retried:
+    throttling, server side errors and connection errors.
+
+    Missing objects and other client errors are terminal.
+    """
+    if isinstance(error, botocore.exceptions.ClientError):
+        if is_missing_object_error(error):
+            return False
+        status, error_code = _get_status_and_error_code(error)
+        return (
+            status in RETRYABLE_STATUS_CODES
+            or error_code in RETRYABLE_ERROR_CODES
+        )
+    return isinstance(error, RETRYABLE_EXCEPTIONS)
+
+
+def get_retry_after_seconds(error: BaseException) -> float | None:
+    """
+    Number of seconds to wait before retrying according to the
+    ``Retry-After`` header of the response, if any.
+    The header is either a number of seconds or an HTTP date.
+    """
+    if not isinstance(error, botocore.exceptions.ClientError):
+        return None
+    headers = error.response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+    retry_after = next(
+        (
+            value
+            for header, value in headers.items()
+            if header.lower() == "retry-after"
+        ),
+        None,
+    )
+    if retry_after is None:
+        return None
+    try:
+        return max(float(retry_after), 0)
+    except ValueError:
+        pass
+    try:
+        retry_date = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_date.tzinfo is None:
+        retry_date = retry_date.replace(tzinfo=UTC)
+    return max((retry_date - datetime.now(tz=UTC)).total_seconds(), 0)
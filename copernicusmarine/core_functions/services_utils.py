@@ -24,7 +24,12 @@ from copernicusmarine.core_functions.exceptions import (
 from copernicusmarine.core_functions.marine_datastore_config import (
     MarineDataStoreConfig,
 )
-from copernicusmarine.core_functions.models import CommandType, DatasetChunking
+from copernicusmarine.core_functions.models import (
+    CommandType,
+    DatasetChunking,
+    ServicePlan,
+    ServiceVariables,
+)
 from copernicusmarine.core_functions.request_structure import (
     GetRequest,
     SubsetRequest,
@@ -36,6 +41,10 @@ from copernicusmarine.core_functions.utils import (
 from copernicusmarine.download_functions.chunk_calculator import (
     get_dataset_chunking,
 )
+from copernicusmarine.download_functions.query_plan import (
+    get_request_concurrency,
+    plan_arco_services,
+)
 
 logger = logging.getLogger("copernicusmarine")
 
@@ -75,52 +84,73 @@ def _get_best_arco_service_type(
         CopernicusMarineServiceNames.GEOSERIES,
     ],
     DatasetChunking | None,
+    ServicePlan,
 ]:
-    dataset_chunking_geoseries = get_dataset_chunking(
+    service_plan = plan_arco_services(
         dataset_subset,
-        CopernicusMarineServiceNames.GEOSERIES,
         dataset_version_part,
+        get_request_concurrency(dataset_subset.dask_number_of_workers),
     )
-    dataset_chunking_timeseries = get_dataset_chunking(
-        dataset_subset,
+    best_arco_service_type: Literal[
         CopernicusMarineServiceNames.TIMESERIES,
+        CopernicusMarineServiceNames.GEOSERIES,
+    ] = (
+        CopernicusMarineServiceNames.TIMESERIES
+        if service_plan.selected_service
+        == CopernicusMarineServiceNames.TIMESERIES
+        else CopernicusMarineServiceNames.GEOSERIES
+    )
+    dataset_chunking = get_dataset_chunking(
+        dataset_subset,
+        best_arco_service_type,
         dataset_version_part,
     )
-    logger.debug(f"Geoseries chunking: {dataset_chunking_geoseries}")
-    logger.debug(f"Timeseries chunking: {dataset_chunking_timeseries}")
-    if (
-        dataset_chunking_geoseries.number_chunks < 0
-        and dataset_chunking_timeseries.number_chunks < 0
-    ):
+    logger.debug(f"{best_arco_service_type} chunking: {dataset_chunking}")
+    if dataset_chunking.number_chunks < 0:
         logger.debug("We were not able to compute the optimum service.")
-        return (
-            CopernicusMarineServiceNames.GEOSERIES,
-            None,
+        return best_arco_service_type, None, service_plan
+    return best_arco_service_type, dataset_chunking, service_plan
+
+
+def _get_mixed_services(
+    dataset_subset: SubsetRequest,
+    dataset_version_part: CopernicusMarinePart,
+    variable_services: dict[str, str],
+) -> list[ServiceVariables]:
+    mixed_services = []
+    for service_name in dict.fromkeys(variable_services.values()):
+        variables = [
+            variable
+            for variable, variable_service_name in variable_services.items()
+            if variable_service_name == service_name
+        ]
+        dataset_chunking = get_dataset_chunking(
+            dataset_subset.model_copy(update={"variables": variables}),
+            CopernicusMarineServiceNames(service_name),
+            dataset_version_part,
         )
-    if dataset_chunking_geoseries.number_chunks < 0:
-        return (
-            CopernicusMarineServiceNames.TIMESERIES,
-            dataset_chunking_timeseries,
+        mixed_services.append(
+            ServiceVariables(
+                service=dataset_version_part.get_service_by_service_name(
+                    CopernicusMarineServiceNames(service_name)
+                ),
+                variables=variables,
+                dataset_chunking=(
+                    dataset_chunking
+                    if dataset_chunking.number_chunks >= 0
+                    else None
+                ),
+            )
         )
-    if dataset_chunking_timeseries.number_chunks < 0:
-        return (
-            CopernicusMarineServiceNames.GEOSERIES,
-            dataset_chunking_geoseries,
+    logger.info(
+        "Mixing the ARCO services per variable: "
+        + ", ".join(
+            f"{service_variables.service.service_short_name} for "
+            f"{service_variables.variables}"
+            for service_variables in mixed_services
         )
-    logger.debug(
-        f"{dataset_chunking_geoseries.number_chunks} chunks to "
-        f"download for geoseries and "
-        f"{dataset_chunking_timeseries.number_chunks} chunks for timeseries"
     )
-    if (
-        dataset_chunking_timeseries.number_chunks
-        >= dataset_chunking_geoseries.number_chunks
-    ):
-        return (
-            CopernicusMarineServiceNames.GEOSERIES,
-            dataset_chunking_geoseries,
-        )
-    return CopernicusMarineServiceNames.TIMESERIES, dataset_chunking_timeseries
+    return mixed_services
 
 
 def _get_first_available_service_name(
@@ -142,7 +172,12 @@ def _select_service_by_priority(
     request: SubsetRequest | GetRequest,
     dataset_version_part: CopernicusMarinePart,
     command_type: CommandType,
-) -> tuple[CopernicusMarineService, DatasetChunking | None]:
+) -> tuple[
+    CopernicusMarineService,
+    DatasetChunking | None,
+    ServicePlan | None,
+    list[ServiceVariables] | None,
+]:
     dataset_available_service_names = [
         service.service_name for service in dataset_version_part.services
     ]
@@ -177,22 +212,39 @@ def _select_service_by_priority(
                             CopernicusMarineServiceNames.PLATFORMSERIES
                         ),
                         None,
+                        None,
+                        None,
                     )
                 except StopIteration:
                     raise PlatformsSubsettingNotAvailable()
 
-            return first_available_service, None
-        best_arco_service_type, dataset_chunking = _get_best_arco_service_type(
+            return first_available_service, None, None, None
+        (
+            best_arco_service_type,
+            dataset_chunking,
+            service_plan,
+        ) = _get_best_arco_service_type(
             subset_request,
             dataset_version_part,
         )
+        mixed_services = (
+            _get_mixed_services(
+                subset_request,
+                dataset_version_part,
+                service_plan.variable_services,
+            )
+            if service_plan.variable_services
+            else None
+        )
         return (
             dataset_version_part.get_service_by_service_name(
                 best_arco_service_type
             ),
             dataset_chunking,
+            service_plan,
+            mixed_services,
         )
-    return first_available_service, None
+    return first_available_service, None, None, None
 
 
 # TODO: clear this as there is redundancy
@@ -209,6 +261,9 @@ class RetrievalService:
     axis_coordinate_id_mapping: dict[str, str]
     dataset_chunking: DatasetChunking | None
     is_original_grid: bool
+    service_plan: ServicePlan | None
+    #: variables taken from each service when the services are mixed
+    mixed_services: list[ServiceVariables] | None
     product_doi: str | None
     product_id: str | None
 
@@ -303,6 +358,8 @@ def _get_retrieval_service_from_dataset_version(
 
     service = None
     dataset_chunking = None
+    service_plan = None
+    mixed_services = None
     if force_service_name:
         service = _select_forced_service(
             dataset_version_part=dataset_part,
@@ -316,7 +373,12 @@ def _get_retrieval_service_from_dataset_version(
             )
             service = None
     if not service:
-        service, dataset_chunking = _select_service_by_priority(
+        (
+            service,
+            dataset_chunking,
+            service_plan,
+            mixed_services,
+        ) = _select_service_by_priority(
             request=request,
             dataset_version_part=dataset_part,
             command_type=command_type,
@@ -350,6 +412,8 @@ def _get_retrieval_service_from_dataset_version(
         metadata_url=dataset_part.url_metadata,
         dataset_chunking=dataset_chunking,
         is_original_grid=dataset_part.name == "originalGrid",
+        service_plan=service_plan,
+        mixed_services=mixed_services,
         product_doi=product_doi,
         product_id=product_id,
     )
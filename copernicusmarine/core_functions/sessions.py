@@ -1,5 +1,6 @@
 import logging
 import ssl
+import threading
 from typing import Any, Literal
 
 import boto3
@@ -54,15 +55,31 @@ def get_ssl_context() -> ssl.SSLContext | None:
     return ssl.create_default_context(cafile=certifi.where())
 
 
-def get_configured_boto3_session(
+# Default of botocore
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+
+# Retries are handled by the retry policy of the toolbox,
+# retrying in botocore as well would multiply the requests
+BOTO3_RETRIES: Any = {"total_max_attempts": 1, "mode": "standard"}
+
+S3Operation = Literal["ListObjectsV2", "HeadObject", "GetObject"]
+
+# boto3 clients are thread-safe: they are shared in the process
+# to reuse the connections and avoid creating a client for each request
+_boto3_clients: dict[tuple[str, str | None, tuple[str, ...]], Any] = {}
+_boto3_clients_lock = threading.Lock()
+
+
+def _create_boto3_client(
     endpoint_url: str,
-    operation_type: list[Literal["ListObjectsV2", "HeadObject", "GetObject"]],
-    username: str | None = None,
-    return_ressources: bool = False,
-) -> tuple[Any, Any]:
+    operation_type: list[S3Operation],
+    username: str | None,
+    max_pool_connections: int,
+) -> Any:
     config_boto3 = botocore.config.Config(
         signature_version=botocore.UNSIGNED,
-        retries={"max_attempts": 10, "mode": "adaptive"},
+        retries=BOTO3_RETRIES,
+        max_pool_connections=max_pool_connections,
     )
     s3_session = boto3.Session()
     s3_client = s3_session.client(
@@ -77,11 +94,59 @@ def get_configured_boto3_session(
             f"before-call.s3.{operation}",
             create_custom_query_function(username),
         )
+    return s3_client
+
+
+def get_boto3_client(
+    endpoint_url: str,
+    operation_type: list[S3Operation],
+    username: str | None = None,
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+) -> Any:
+    """
+    Get the client of the process for the endpoint, username and operations.
+
+    The client is created if needed, or recreated if its connection pool
+    is smaller than ``max_pool_connections``.
+    """
+    key = (endpoint_url, username, tuple(sorted(set(operation_type))))
+    with _boto3_clients_lock:
+        s3_client = _boto3_clients.get(key)
+        if (
+            s3_client is None
+            or s3_client.meta.config.max_pool_connections
+            < max_pool_connections
+        ):
+            logger.debug(
+                f"Creating new boto3 client for {endpoint_url} "
+                f"with {max_pool_connections} connections"
+            )
+            s3_client = _create_boto3_client(
+                endpoint_url, operation_type, username, max_pool_connections
+            )
+            _boto3_clients[key] = s3_client
+        return s3_client
+
+
+def get_configured_boto3_session(
+    endpoint_url: str,
+    operation_type: list[S3Operation],
+    username: str | None = None,
+    return_ressources: bool = False,
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+) -> tuple[Any, Any]:
+    s3_client = get_boto3_client(
+        endpoint_url, operation_type, username, max_pool_connections
+    )
     if not return_ressources:
         return s3_client, None
+    # resources are not thread-safe so they are not shared
     s3_resource = boto3.resource(
         "s3",
-        config=config_boto3,
+        config=botocore.config.Config(
+            signature_version=botocore.UNSIGNED,
+            retries=BOTO3_RETRIES,
+        ),
         endpoint_url=endpoint_url,
     )
     return s3_client, s3_resource
@@ -91,22 +156,22 @@ class ConfiguredBoto3Session:
     def __init__(
         self,
         endpoint_url: str,
-        operation_type: list[
-            Literal["ListObjectsV2", "HeadObject", "GetObject"]
-        ],
+        operation_type: list[S3Operation],
         username: str | None = None,
         need_resources: bool = False,
+        max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
     ):
         self.s3_client, self.s3_resource = get_configured_boto3_session(
             endpoint_url,
             operation_type,
             username,
             return_ressources=need_resources,
+            max_pool_connections=max_pool_connections,
         )
         self.use_threads = COPERNICUSMARINE_USE_THREADS
 
     def close(self):
-        self.s3_client.close()
+        # the client is shared in the process, only the resource is closed
         if self.s3_resource:
             self.s3_resource.meta.client.close()
 
@@ -126,12 +191,24 @@ class ConfiguredBoto3Session:
             Config=TransferConfig(use_threads=self.use_threads),
         )
 
-    def get_object(self, bucket_name: str, object_key: str) -> Any:
+    def get_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        byte_range: str | None = None,
+    ) -> Any:
+        """
+        The byte range is an HTTP Range header value e.g. "bytes=0-99".
+        """
+        range_argument = {"Range": byte_range} if byte_range else {}
         response = self.s3_client.get_object(
-            Bucket=bucket_name, Key=object_key
+            Bucket=bucket_name, Key=object_key, **range_argument
         )
         return response
 
+    def head_object(self, bucket_name: str, object_key: str) -> Any:
+        return self.s3_client.head_object(Bucket=bucket_name, Key=object_key)
+
 
 # TODO: add tests
 # example: with https://httpbin.org/delay/10 or
@@ -0,0 +1,95 @@
+import asyncio
+import concurrent.futures
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+_T = TypeVar("_T")
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls with the same key: the first call
+    does the work and the calls arriving while it is in flight
+    share its result (or its error).
+
+    Works across threads and event loops.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.coalesced_requests = 0
+        self._in_flight: dict[Hashable, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        st = self.__dict__.copy()
+        st["_in_flight"] = {}
+        del st["_lock"]
+        return st
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def statistics(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "coalesced_requests": self.coalesced_requests,
+            }
+
+    def _join(self, key: Hashable) -> tuple[concurrent.futures.Future, bool]:
+        """
+        Returns the future of the call in flight for the key
+        and whether the caller should do the work.
+        """
+        with self._lock:
+            self.requests += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced_requests += 1
+                return future, False
+            future = concurrent.futures.Future()
+            self._in_flight[key] = future
+            return future, True
+
+    def _complete(
+        self,
+        key: Hashable,
+        future: concurrent.futures.Future,
+        result: Any = None,
+        error: BaseException | None = None,
+    ) -> None:
+        with self._lock:
+            del self._in_flight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def run(self, key: Hashable, fn: Callable[[], _T]) -> _T:
+        future, is_leader = self._join(key)
+        if not is_leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._complete(key, future, error=e)
+            raise
+        self._complete(key, future, result=result)
+        return result
+
+    async def run_async(
+        self, key: Hashable, fn: Callable[[], Awaitable[_T]]
+    ) -> _T:
+        future, is_leader = self._join(key)
+        if not is_leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._complete(key, future, error=e)
+            raise
+        self._complete(key, future, result=result)
+        return result
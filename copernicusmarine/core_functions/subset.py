@@ -25,6 +25,10 @@ from copernicusmarine.core_functions.utils import (
 )
 from copernicusmarine.download_functions.download_sparse import download_sparse
 from copernicusmarine.download_functions.download_zarr import download_zarr
+from copernicusmarine.download_functions.query_plan import (
+    get_query_plan,
+    get_request_concurrency,
+)
 from copernicusmarine.download_functions.subset_xarray import (
     check_dataset_subset_bounds,
 )
@@ -49,6 +53,30 @@ def subset_function(
         retrieval_service=retrieval_service,
         tdqm_configuration={"disable": subset_request.disable_progress_bar},
     )
+    if subset_request.dry_run:
+        subset_response.service_plan = retrieval_service.service_plan
+    if subset_request.explain:
+        if (
+            retrieval_service.service_format
+            == CopernicusMarineServiceFormat.ZARR
+        ):
+            subset_response.query_plan = get_query_plan(
+                subset_request=subset_request,
+                dataset_part=retrieval_service.dataset_part,
+                selected_service_name=retrieval_service.service_name,
+                concurrency=get_request_concurrency(
+                    subset_request.dask_number_of_workers
+                ),
+                variable_services=(
+                    retrieval_service.service_plan.variable_services
+                    if retrieval_service.service_plan
+                    else None
+                ),
+            )
+        else:
+            logger.warning(
+                "The explain option is only available for gridded datasets."
+            )
     if subset_response.file_size:
         logger.info(
             f"Total size of the download: "
@@ -94,10 +122,15 @@ def download_zarr_or_sparse(
         raise_when_all_dataset_requested(subset_request, False)
         if "file_format" not in subset_request.model_fields_set:
             subset_request.file_format = "netcdf"
-        elif subset_request.file_format not in ["netcdf", "zarr", "csv"]:
+        elif subset_request.file_format not in [
+            "netcdf",
+            "zarr",
+            "csv",
+            "parquet",
+        ]:
             raise WrongFormatRequested(
                 requested_format=subset_request.file_format,
-                supported_formats=["netcdf", "zarr", "csv"],
+                supported_formats=["netcdf", "zarr", "csv", "parquet"],
             )
         logger.debug(
             f"Downloading data in {subset_request.file_format} format."
@@ -111,6 +144,8 @@ def download_zarr_or_sparse(
             axis_coordinate_id_mapping=retrieval_service.axis_coordinate_id_mapping,
             dataset_chunking=retrieval_service.dataset_chunking,
             tdqm_configuration=tdqm_configuration,
+            arco_updated_date=retrieval_service.dataset_part.arco_updated_date,
+            mixed_services=retrieval_service.mixed_services,
         )
     if (
         retrieval_service.service_format
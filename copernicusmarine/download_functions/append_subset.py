@@ -0,0 +1,346 @@
+import logging
+import os
+import pathlib
+import shutil
+from datetime import datetime, timedelta
+from typing import Any
+
+import numpy as np
+import xarray
+
+from copernicusmarine.catalogue_parser.models import CopernicusMarineService
+from copernicusmarine.core_functions.exceptions import (
+    OutputNotCompatibleForAppend,
+)
+from copernicusmarine.core_functions.models import (
+    DEFAULT_FILE_EXTENSIONS,
+    FileFormat,
+)
+from copernicusmarine.core_functions.utils import (
+    timestamp_or_datestring_to_datetime,
+)
+from copernicusmarine.download_functions.netcdf_streaming import (
+    encode_block_variable,
+    get_blocks,
+    get_storage_encoding,
+)
+from copernicusmarine.download_functions.utils import get_file_extension
+
+logger = logging.getLogger("copernicusmarine")
+
+TIME_DIMENSION = "time"
+# encoding that defines the values stored in the output
+COMPARED_ENCODING_KEYS = ("dtype", "scale_factor", "add_offset")
+# Memory used to append to a NetCDF file if no budget is set
+DEFAULT_APPEND_MEMORY_BUDGET = 256 * 1024 * 1024
+
+
+def get_append_output_path(
+    output_directory: pathlib.Path,
+    output_filename: str,
+    file_format: FileFormat,
+) -> pathlib.Path:
+    if pathlib.Path(output_filename).suffix not in DEFAULT_FILE_EXTENSIONS:
+        output_filename += get_file_extension(file_format)
+    return pathlib.Path(output_directory, output_filename)
+
+
+def open_existing_output(output_path: pathlib.Path) -> xarray.Dataset:
+    if output_path.suffix == ".zarr":
+        return xarray.open_zarr(output_path)
+    return xarray.open_dataset(output_path, chunks={})
+
+
+def get_last_time(existing_dataset: xarray.Dataset) -> datetime | None:
+    """
+    The last time step of the existing output. None if it has none.
+    """
+    if (
+        TIME_DIMENSION not in existing_dataset.coords
+        or not existing_dataset.sizes.get(TIME_DIMENSION)
+    ):
+        return None
+    return timestamp_or_datestring_to_datetime(
+        existing_dataset[TIME_DIMENSION].values.max()
+    )
+
+
+def get_catalogue_last_time(
+    service: CopernicusMarineService,
+    axis_coordinate_id_mapping: dict[str, str],
+) -> datetime | None:
+    """
+    The last time step of the dataset according to the catalogue.
+    """
+    time_coordinate_id = axis_coordinate_id_mapping.get("t")
+    if time_coordinate_id is None:
+        return None
+    for variable in service.variables:
+        for coordinate in variable.coordinates:
+            if coordinate.coordinate_id != time_coordinate_id:
+                continue
+            maximum_value = coordinate.maximum_value
+            if maximum_value is None and coordinate.values:
+                maximum_value = max(coordinate.values)
+            if maximum_value is not None:
+                return timestamp_or_datestring_to_datetime(maximum_value)
+    return None
+
+
+def get_append_start_datetime(
+    last_time: datetime, start_datetime: datetime | None
+) -> datetime:
+    """
+    The start of the missing time window: just after the last time step
+    of the existing output.
+    """
+    after_last_time = last_time + timedelta(microseconds=1)
+    if start_datetime is None or start_datetime < after_last_time:
+        return after_last_time
+    return start_datetime
+
+
+def select_new_time_steps(
+    dataset: xarray.Dataset, last_time: datetime
+) -> xarray.Dataset:
+    """
+    Drop the time steps already in the existing output, e.g. selected
+    with the nearest or outside coordinates selection methods.
+    """
+    last_time_value = np.datetime64(last_time.replace(tzinfo=None), "ns")
+    return dataset.isel(
+        {TIME_DIMENSION: dataset[TIME_DIMENSION].values > last_time_value}
+    )
+
+
+def _are_equal(value: Any, other_value: Any) -> bool:
+    if value is None or other_value is None:
+        return value is other_value
+    if isinstance(value, np.dtype) or isinstance(other_value, np.dtype):
+        return np.dtype(value) == np.dtype(other_value)
+    return bool(np.isclose(value, other_value))
+
+
+def check_append_compatibility(
+    existing_dataset: xarray.Dataset, dataset: xarray.Dataset
+) -> None:
+    """
+    Check that the new time steps can be appended to the existing output:
+    same grid, same variables and same encoding.
+    """
+    if TIME_DIMENSION not in existing_dataset.dims:
+        raise OutputNotCompatibleForAppend(
+            f"The existing output has no '{TIME_DIMENSION}' dimension."
+        )
+    existing_variables = set(map(str, existing_dataset.data_vars))
+    variables = set(map(str, dataset.data_vars))
+    if existing_variables != variables:
+        raise OutputNotCompatibleForAppend(
+            f"The variables of the existing output {sorted(existing_variables)}"
+            f" are not the requested ones {sorted(variables)}."
+        )
+    for name, coordinate in dataset.coords.items():
+        if TIME_DIMENSION in coordinate.dims:
+            continue
+        if name not in existing_dataset.coords or not np.array_equal(
+            existing_dataset[name].values, coordinate.values
+        ):
+            raise OutputNotCompatibleForAppend(
+                f"The coordinate '{name}' of the existing output does not "
+                "match the requested one."
+            )
+    for name, variable in dataset.data_vars.items():
+        existing_variable = existing_dataset[name]
+        if existing_variable.dims != variable.dims:
+            raise OutputNotCompatibleForAppend(
+                f"The dimensions of the variable '{name}' of the existing "
+                f"output {existing_variable.dims} are not the requested "
+                f"ones {variable.dims}."
+            )
+        for key in COMPARED_ENCODING_KEYS:
+            if not _are_equal(
+                existing_variable.encoding.get(key),
+                variable.encoding.get(key),
+            ):
+                raise OutputNotCompatibleForAppend(
+                    f"The encoding '{key}' of the variable '{name}' of the "
+                    f"existing output ({existing_variable.encoding.get(key)})"
+                    f" is not the one of the dataset "
+                    f"({variable.encoding.get(key)})."
+                )
+
+
+def _get_append_chunks(
+    existing_length: int, zarr_chunk_length: int, length: int
+) -> tuple[int, ...]:
+    """
+    Dask chunks along time that write complete Zarr chunks: the first one
+    completes the last Zarr chunk of the existing output.
+    """
+    chunks = []
+    first_chunk = min(-existing_length % zarr_chunk_length, length)
+    if first_chunk:
+        chunks.append(first_chunk)
+    remaining_length = length - first_chunk
+    while remaining_length > 0:
+        chunks.append(min(zarr_chunk_length, remaining_length))
+        remaining_length -= zarr_chunk_length
+    return tuple(chunks)
+
+
+def append_to_zarr(
+    dataset: xarray.Dataset,
+    existing_dataset: xarray.Dataset,
+    output_path: pathlib.Path,
+    zarr_format: int | None,
+) -> None:
+    """
+    Append the new time steps to the existing Zarr store in place.
+
+    The dask chunks are aligned on the Zarr chunks of the store so that
+    no Zarr chunk is written by two tasks.
+    """
+    dataset = dataset.drop_vars(
+        [
+            name
+            for name, variable in dataset.variables.items()
+            if TIME_DIMENSION not in variable.dims
+        ]
+    )
+    existing_length = existing_dataset.sizes[TIME_DIMENSION]
+    for name, variable in list(dataset.data_vars.items()):
+        zarr_chunks = existing_dataset[name].encoding.get("chunks")
+        if not zarr_chunks:
+            continue
+        dataset[name] = variable.chunk(
+            {
+                dimension: (
+                    _get_append_chunks(
+                        existing_length,
+                        zarr_chunk_length,
+                        variable.sizes[dimension],
+                    )
+                    if dimension == TIME_DIMENSION
+                    else zarr_chunk_length
+                )
+                for dimension, zarr_chunk_length in zip(
+                    variable.dims, zarr_chunks
+                )
+            }
+        )
+    dataset.to_zarr(
+        str(output_path),
+        mode="a",
+        append_dim=TIME_DIMENSION,
+        zarr_format=zarr_format,
+    )
+
+
+def append_to_netcdf(
+    dataset: xarray.Dataset,
+    output_path: pathlib.Path,
+    memory_budget: int | None = None,
+) -> bool:
+    """
+    Append the new time steps to the existing NetCDF file in place,
+    block by block along time, encoded like the variables of the file.
+
+    Returns False if the time dimension of the file is not unlimited or
+    not the outermost one: the file cannot be extended in place.
+
+    If the append fails, the time dimension of a NetCDF4 file is resized
+    back to its length. The records of a NetCDF3 file cannot be removed,
+    so they are appended to a copy that replaces the file once complete.
+    """
+    if any(
+        TIME_DIMENSION in variable.dims and variable.dims[0] != TIME_DIMENSION
+        for variable in dataset.variables.values()
+    ):
+        return False
+    with open(output_path, "rb") as header_file:
+        netcdf3 = header_file.read(3) == b"CDF"
+    if not netcdf3:
+        import h5netcdf
+
+        with h5netcdf.File(output_path, mode="a") as output_file:
+            return _append_blocks(
+                dataset, output_file, output_path, netcdf3, memory_budget
+            )
+
+    import netCDF4
+
+    copy_path = output_path.with_name(f".{output_path.name}.append")
+    shutil.copyfile(output_path, copy_path)
+    try:
+        with netCDF4.Dataset(copy_path, mode="a") as output_file:
+            # the values are already encoded
+            output_file.set_auto_maskandscale(False)
+            appended = _append_blocks(
+                dataset, output_file, output_path, netcdf3, memory_budget
+            )
+        if appended:
+            os.replace(copy_path, output_path)
+        return appended
+    finally:
+        copy_path.unlink(missing_ok=True)
+
+
+def _append_blocks(
+    dataset: xarray.Dataset,
+    output_file: Any,
+    output_path: pathlib.Path,
+    netcdf3: bool,
+    memory_budget: int | None,
+) -> bool:
+    time_dimension = output_file.dimensions[TIME_DIMENSION]
+    if not time_dimension.isunlimited():
+        return False
+    existing_length = len(time_dimension)
+    appended_variable_names = [
+        str(name)
+        for name, variable in dataset.variables.items()
+        if TIME_DIMENSION in variable.dims
+    ]
+    storage_encodings = {
+        name: get_storage_encoding(output_file.variables[name])
+        for name in appended_variable_names
+    }
+    blocks = get_blocks(
+        dataset,
+        TIME_DIMENSION,
+        memory_budget or DEFAULT_APPEND_MEMORY_BUDGET,
+    )
+    logger.debug(
+        f"Appending {dataset.sizes[TIME_DIMENSION]} time steps "
+        f"in {len(blocks)} blocks to {output_path}"
+    )
+    try:
+        for block in blocks:
+            block_dataset = dataset[appended_variable_names].isel(
+                {TIME_DIMENSION: block}
+            )
+            block_dataset = block_dataset.compute()
+            output_block = slice(
+                existing_length + block.start, existing_length + block.stop
+            )
+            if not netcdf3:
+                output_file.resize_dimension(TIME_DIMENSION, output_block.stop)
+            for name in appended_variable_names:
+                output_file.variables[name][
+                    output_block, ...
+                ] = encode_block_variable(
+                    block_dataset[name].variable,
+                    name,
+                    storage_encodings[name],
+                    netcdf3,
+                )
+            del block_dataset
+    except BaseException:
+        if not netcdf3:
+            logger.debug(
+                f"Append failed, resizing {output_path} back to "
+                f"{existing_length} time steps"
+            )
+            output_file.resize_dimension(TIME_DIMENSION, existing_length)
+        raise
+    return True
@@ -1,16 +1,23 @@
+import itertools
 import logging
 import math
 from datetime import datetime
+from typing import Sequence
+
+import numpy
 
 from copernicusmarine.catalogue_parser.models import (
     CopernicusMarineCoordinate,
     CopernicusMarinePart,
+    CopernicusMarineService,
     CopernicusMarineServiceNames,
+    CopernicusMarineVariable,
 )
 from copernicusmarine.core_functions.models import (
     ChunkType,
     CoordinateChunking,
     DatasetChunking,
+    IndexWindow,
     VariableChunking,
 )
 from copernicusmarine.core_functions.request_structure import SubsetRequest
@@ -25,6 +32,10 @@ from copernicusmarine.download_functions.subset_xarray import (
 
 logger = logging.getLogger("copernicusmarine")
 
+# Values added on each side of the index windows for the neighbours
+# needed by the "nearest" and "outside" selections
+INDEX_WINDOW_MARGIN = 1
+
 
 def _get_chunks_index_arithmetic(
     requested_value: float,
@@ -145,6 +156,305 @@ def _get_chunk_indexes_for_coordinate(
     return (index_min, index_max)
 
 
+def _get_coordinate_values(
+    coordinate: CopernicusMarineCoordinate,
+) -> list[int | float]:
+    """
+    Values of the coordinate in the order of the Zarr array,
+    the times as timestamps in milliseconds.
+    """
+    if coordinate.coordinate_id == "time":
+        return [
+            (
+                value
+                if isinstance(value, (int, float))
+                else float(
+                    timestamp_or_datestring_to_datetime(value).timestamp()
+                    * 1e3
+                )
+            )
+            for value in coordinate.values or []
+        ]
+    return list(coordinate.values or [])  # type: ignore
+
+
+def get_zarr_chunk_indexes(
+    coordinate: CopernicusMarineCoordinate,
+    requested_minimum: float | None,
+    requested_maximum: float | None,
+) -> range:
+    """
+    Indexes of the Zarr chunks of the coordinate that contain the requested
+    values. In the chunk keys, the chunks are counted from the first value
+    of the coordinate.
+    """
+    chunking_length = coordinate.chunking_length
+    if not chunking_length:
+        return range(1)
+    if (
+        coordinate.chunk_type is None
+        and coordinate.step is None
+        and coordinate.values
+    ):
+        selected_indexes = [
+            index
+            for index, value in enumerate(_get_coordinate_values(coordinate))
+            if (requested_minimum is None or requested_minimum <= value)
+            and (requested_maximum is None or value <= requested_maximum)
+        ]
+        if not selected_indexes:
+            return range(0)
+        return range(
+            int(selected_indexes[0] // chunking_length),
+            int(selected_indexes[-1] // chunking_length) + 1,
+        )
+    first_chunk_index, _ = _get_chunk_indexes_for_coordinate(
+        coordinate=coordinate,
+        requested_minimum=None,
+        requested_maximum=None,
+        chunking_length=chunking_length,
+    )
+    index_min, index_max = _get_chunk_indexes_for_coordinate(
+        coordinate=coordinate,
+        requested_minimum=requested_minimum,
+        requested_maximum=requested_maximum,
+        chunking_length=chunking_length,
+    )
+    return range(
+        index_min - first_chunk_index, index_max - first_chunk_index + 1
+    )
+
+
+def get_variable_chunk_indexes(
+    variable: CopernicusMarineVariable,
+    dataset_subset: SubsetRequest,
+    axis_coordinate_mapping: dict[str, str],
+) -> list[Sequence[int]]:
+    """
+    Indexes of the Zarr chunks of the variable that contain the requested
+    subset, per coordinate of the variable.
+
+    A longitude selection crossing the antimeridian needs the chunks at
+    both ends of the coordinate.
+    """
+    chunk_indexes: list[Sequence[int]] = []
+    for coordinate in variable.coordinates:
+        requested_minimum, requested_maximum = _extract_requested_min_max(
+            coordinate,
+            dataset_subset,
+            axis_coordinate_mapping,
+        )
+        if (
+            coordinate.coordinate_id == "longitude"
+            and requested_minimum is not None
+            and requested_maximum is not None
+            and requested_minimum < 180 < requested_maximum
+        ):
+            chunk_indexes.append(
+                sorted(
+                    set(
+                        get_zarr_chunk_indexes(
+                            coordinate, requested_minimum, 180
+                        )
+                    ).union(
+                        get_zarr_chunk_indexes(
+                            coordinate, -180, requested_maximum - 360
+                        )
+                    )
+                )
+            )
+            continue
+        chunk_indexes.append(
+            get_zarr_chunk_indexes(
+                coordinate, requested_minimum, requested_maximum
+            )
+        )
+    return chunk_indexes
+
+
+def get_variable_chunk_keys(
+    variable: CopernicusMarineVariable,
+    dataset_subset: SubsetRequest,
+    axis_coordinate_mapping: dict[str, str],
+) -> list[str]:
+    """
+    Keys of the Zarr chunks of the variable that contain the requested
+    subset, e.g. ``thetao/0.0.3.4``.
+    """
+    return [
+        f"{variable.short_name}/" + ".".join(map(str, chunk_index))
+        for chunk_index in itertools.product(
+            *get_variable_chunk_indexes(
+                variable, dataset_subset, axis_coordinate_mapping
+            )
+        )
+    ]
+
+
+def _widen_index_window(start: int, stop: int, number_of_values: int) -> slice:
+    start = max(start - INDEX_WINDOW_MARGIN, 0)
+    stop = stop + INDEX_WINDOW_MARGIN
+    return slice(start, stop if stop < number_of_values else None)
+
+
+def get_coordinate_index_window(
+    coordinate: CopernicusMarineCoordinate,
+    requested_minimum: float | None,
+    requested_maximum: float | None,
+) -> slice | None:
+    """
+    Indexes of the coordinate that contain the requested values, from the
+    values or the regular step of the coordinate in the catalogue.
+    None if the catalogue does not describe the coordinate well enough.
+    """
+    if coordinate.values and coordinate.step is None:
+        values = numpy.array(_get_coordinate_values(coordinate), dtype=float)
+        inside = numpy.ones(len(values), dtype=bool)
+        if requested_minimum is not None:
+            inside &= values >= requested_minimum
+        if requested_maximum is not None:
+            inside &= values <= requested_maximum
+        positions = numpy.flatnonzero(inside)
+        if len(positions):
+            return _widen_index_window(
+                int(positions[0]), int(positions[-1]) + 1, len(values)
+            )
+        # the value closest to the requested values
+        closest = int(
+            numpy.abs(
+                values
+                - (
+                    requested_minimum
+                    if requested_minimum is not None
+                    else requested_maximum
+                )
+            ).argmin()
+        )
+        return _widen_index_window(closest, closest + 1, len(values))
+    (
+        coordinate_minimum_value,
+        coordinate_maximum_value,
+    ) = _get_coordinate_extreme(coordinate)
+    if (
+        not coordinate.step
+        or coordinate_minimum_value is None
+        or coordinate_maximum_value is None
+    ):
+        return None
+    number_of_values = (
+        round(
+            (coordinate_maximum_value - coordinate_minimum_value)
+            / coordinate.step
+        )
+        + 1
+    )
+    start = (
+        math.floor(
+            (requested_minimum - coordinate_minimum_value) / coordinate.step
+        )
+        if requested_minimum is not None
+        else 0
+    )
+    stop = (
+        math.floor(
+            (requested_maximum - coordinate_minimum_value) / coordinate.step
+        )
+        + 1
+        if requested_maximum is not None
+        else number_of_values
+    )
+    start = min(max(start, 0), number_of_values - 1)
+    stop = max(min(stop, number_of_values), start + 1)
+    return _widen_index_window(start, stop, number_of_values)
+
+
+def get_index_windows(
+    service: CopernicusMarineService,
+    variables: list[str] | None,
+    subset_request: SubsetRequest,
+    axis_coordinate_id_mapping: dict[str, str],
+) -> dict[str, IndexWindow]:
+    """
+    Windows of indexes of the dimension coordinates that contain the
+    requested subset, computed from the catalogue only, so that the
+    dataset can be opened on the windows before reading any coordinate.
+
+    The coordinates without a window are read and selected as usual:
+    irregular coordinates, longitudes crossing the antimeridian
+    and coordinates that are not subsetted.
+    """
+    coordinates: dict[str, CopernicusMarineCoordinate] = {}
+    for variable in service.variables:
+        if (
+            not variables
+            or variable.short_name in variables
+            or variable.standard_name in variables
+        ):
+            for coordinate in variable.coordinates:
+                coordinates.setdefault(coordinate.coordinate_id, coordinate)
+    index_windows = {}
+    for coordinate_id, coordinate in coordinates.items():
+        requested_minimum, requested_maximum = _extract_requested_min_max(
+            coordinate, subset_request, axis_coordinate_id_mapping
+        )
+        if coordinate_id == "elevation":
+            requested_minimum, requested_maximum = (
+                -requested_maximum if requested_maximum is not None else None,
+                -requested_minimum if requested_minimum is not None else None,
+            )
+        if requested_minimum is None and requested_maximum is None:
+            continue
+        if (
+            coordinate_id == "longitude"
+            and requested_maximum is not None
+            and requested_maximum > 180
+        ):
+            continue
+        indexes = get_coordinate_index_window(
+            coordinate, requested_minimum, requested_maximum
+        )
+        if indexes is None or indexes == slice(0, None):
+            continue
+        index_windows[coordinate_id] = IndexWindow(
+            indexes=indexes,
+            requested_minimum=requested_minimum,
+            requested_maximum=requested_maximum,
+        )
+    logger.debug(f"Index windows from the catalogue: {index_windows}")
+    return index_windows
+
+
+def is_index_window_covering(
+    index_window: IndexWindow, values: numpy.ndarray
+) -> bool:
+    """
+    Whether the values of the coordinate read in the window contain the
+    requested values and their neighbours, i.e. whether the catalogue
+    metadata of the window matches the coordinate.
+    """
+    if not len(values):
+        return False
+    if numpy.issubdtype(values.dtype, numpy.datetime64):
+        values = values.astype("datetime64[ms]").astype("int64")
+    first_is_start = index_window.indexes.start == 0
+    last_is_end = index_window.indexes.stop is None
+    if values[-1] < values[0]:
+        values = values[::-1]
+        first_is_start, last_is_end = last_is_end, first_is_start
+    return bool(
+        (
+            first_is_start
+            or index_window.requested_minimum is not None
+            and values[0] < index_window.requested_minimum
+        )
+        and (
+            last_is_end
+            or index_window.requested_maximum is not None
+            and values[-1] > index_window.requested_maximum
+        )
+    )
+
+
 def get_dataset_chunking(
     dataset_subset: SubsetRequest,
     service_name: CopernicusMarineServiceNames,
@@ -0,0 +1,195 @@
+import json
+import logging
+import math
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+
+logger = logging.getLogger("copernicusmarine")
+
+# Rule of thumb of dask: chunks of around 100MB
+TARGET_DASK_CHUNK_SIZE = 100 * 1024 * 1024
+# Copies of a chunk held in memory while it is computed:
+# the downloaded values and the decoded ones
+MEMORY_COPIES_PER_TASK = 2
+# Number of tasks per worker so that the workers stay busy
+# until the end of the computation
+TASKS_PER_WORKER = 4
+# Size of the values when the data type is unknown,
+# e.g. float64 once decoded
+DEFAULT_ITEM_SIZE = 8
+
+
+@dataclass
+class DaskChunkingPlan:
+    """
+    Dask chunks chosen for a subset and why they were chosen.
+
+    The dask chunks are multiples of the Zarr chunks: the factor of each
+    coordinate is the number of Zarr chunks per dask chunk.
+    """
+
+    number_of_workers: int
+    maximum_chunk_size: int
+    minimum_number_of_tasks: int
+    zarr_chunks_per_dask_chunk_limit: int | None
+    #: False if the whole selection fits in one chunk
+    use_dask: bool = True
+    factors: dict[str, int] = field(default_factory=dict)
+    dask_chunking: dict[str, int] = field(default_factory=dict)
+    number_of_tasks: int = 1
+    largest_chunk_size: int = 0
+    stopped_because: dict[str, str] = field(default_factory=dict)
+
+    def log(self) -> None:
+        logger.debug(f"Dask chunking plan: {json.dumps(asdict(self))}")
+
+
+def get_decoded_item_size(dtype: str | None) -> int:
+    """
+    Size in memory of a value once decoded by xarray: packed integers
+    are converted to floats.
+    """
+    if dtype is None:
+        return DEFAULT_ITEM_SIZE
+    try:
+        numpy_dtype = np.dtype(dtype)
+    except TypeError:
+        return DEFAULT_ITEM_SIZE
+    if numpy_dtype.kind in "iu":
+        return DEFAULT_ITEM_SIZE
+    return numpy_dtype.itemsize
+
+
+def _get_next_factor(factor: int, number_of_chunks: int) -> int:
+    """
+    Smallest factor that reduces the number of dask chunks along the
+    coordinate, so that the dask chunks stay of similar sizes.
+    """
+    number_of_dask_chunks = math.ceil(number_of_chunks / factor)
+    return math.ceil(number_of_chunks / (number_of_dask_chunks - 1))
+
+
+def plan_dask_chunking(
+    zarr_chunk_lengths: dict[str, int],
+    number_of_zarr_chunks: dict[str, int],
+    variable_chunk_shapes: dict[str, dict[str, int]],
+    variable_item_sizes: dict[str, int],
+    memory_budget: int | None,
+    number_of_workers: int,
+    zarr_chunks_per_dask_chunk_limit: int | None = None,
+    coordinates_priority: list[str] | None = None,
+) -> DaskChunkingPlan:
+    """
+    Choose dask chunks as big as possible, to keep the dask graph small,
+    while:
+
+    - a chunk of any variable fits in the memory budget of a worker,
+    - there are enough tasks to keep all the workers busy,
+    - the chunks are not bigger than the selection: the number of Zarr
+      chunks per dask chunk along a coordinate is at most the number of
+      Zarr chunks selected along this coordinate.
+
+    The coordinates with the most Zarr chunks to download are enlarged
+    first, the ties are broken with ``coordinates_priority``.
+
+    If ``zarr_chunks_per_dask_chunk_limit`` is set, it caps the total
+    number of Zarr chunks per dask chunk instead of the parallelism.
+    Otherwise, dask is not used if the whole selection fits in one chunk.
+    """
+    maximum_chunk_size = TARGET_DASK_CHUNK_SIZE
+    if memory_budget:
+        maximum_chunk_size = min(
+            maximum_chunk_size,
+            memory_budget // (number_of_workers * MEMORY_COPIES_PER_TASK),
+        )
+    plan = DaskChunkingPlan(
+        number_of_workers=number_of_workers,
+        maximum_chunk_size=maximum_chunk_size,
+        minimum_number_of_tasks=(
+            1
+            if zarr_chunks_per_dask_chunk_limit
+            else number_of_workers * TASKS_PER_WORKER
+        ),
+        zarr_chunks_per_dask_chunk_limit=zarr_chunks_per_dask_chunk_limit,
+        factors={coordinate_id: 1 for coordinate_id in number_of_zarr_chunks},
+    )
+    priority = coordinates_priority or []
+
+    def number_of_tasks(factors: dict[str, int]) -> int:
+        return math.prod(
+            math.ceil(number_of_chunks / factors[coordinate_id])
+            for coordinate_id, number_of_chunks in (
+                number_of_zarr_chunks.items()
+            )
+        )
+
+    def largest_chunk_size(factors: dict[str, int]) -> int:
+        return max(
+            (
+                variable_item_sizes.get(variable, DEFAULT_ITEM_SIZE)
+                * math.prod(
+                    chunk_length * factors.get(coordinate_id, 1)
+                    for coordinate_id, chunk_length in chunk_shape.items()
+                )
+                for variable, chunk_shape in variable_chunk_shapes.items()
+            ),
+            default=0,
+        )
+
+    if (
+        not zarr_chunks_per_dask_chunk_limit
+        and largest_chunk_size(number_of_zarr_chunks) <= maximum_chunk_size
+    ):
+        plan.use_dask = False
+        plan.largest_chunk_size = largest_chunk_size(number_of_zarr_chunks)
+        return plan
+    candidates = set()
+    for coordinate_id, number_of_chunks in number_of_zarr_chunks.items():
+        if number_of_chunks > 1:
+            candidates.add(coordinate_id)
+        else:
+            plan.stopped_because[coordinate_id] = "selection"
+    while candidates:
+        coordinate_id = max(
+            candidates,
+            key=lambda candidate: (
+                math.ceil(
+                    number_of_zarr_chunks[candidate] / plan.factors[candidate]
+                ),
+                -priority.index(candidate)
+                if candidate in priority
+                else -len(priority),
+            ),
+        )
+        factors = dict(plan.factors)
+        factors[coordinate_id] = _get_next_factor(
+            plan.factors[coordinate_id],
+            number_of_zarr_chunks[coordinate_id],
+        )
+        reason = None
+        if largest_chunk_size(factors) > maximum_chunk_size:
+            reason = "memory"
+        elif number_of_tasks(factors) < plan.minimum_number_of_tasks:
+            reason = "parallelism"
+        elif (
+            zarr_chunks_per_dask_chunk_limit
+            and math.prod(factors.values()) > zarr_chunks_per_dask_chunk_limit
+        ):
+            reason = "limit"
+        if reason:
+            plan.stopped_because[coordinate_id] = reason
+            candidates.remove(coordinate_id)
+            continue
+        plan.factors = factors
+        if factors[coordinate_id] >= number_of_zarr_chunks[coordinate_id]:
+            plan.stopped_because[coordinate_id] = "selection"
+            candidates.remove(coordinate_id)
+    plan.dask_chunking = {
+        coordinate_id: zarr_chunk_lengths[coordinate_id] * factor
+        for coordinate_id, factor in plan.factors.items()
+        if coordinate_id in zarr_chunk_lengths
+    }
+    plan.number_of_tasks = number_of_tasks(plan.factors)
+    plan.largest_chunk_size = largest_chunk_size(plan.factors)
+    return plan
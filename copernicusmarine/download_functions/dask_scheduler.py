@@ -0,0 +1,100 @@
+import contextlib
+import logging
+from collections.abc import Iterator
+
+import dask
+from dask.system import CPU_COUNT
+from dask.utils import parse_bytes
+
+from copernicusmarine.core_functions.environment_variables import (
+    COPERNICUSMARINE_DASK_MEMORY_BUDGET,
+)
+from copernicusmarine.core_functions.models import (
+    DaskConfiguration,
+    DaskScheduler,
+)
+
+logger = logging.getLogger("copernicusmarine")
+
+try:
+    DASK_MEMORY_BUDGET_MB = float(COPERNICUSMARINE_DASK_MEMORY_BUDGET or 0)
+except ValueError:
+    DASK_MEMORY_BUDGET_MB = 0
+
+
+def get_dask_configuration(
+    scheduler: DaskScheduler | None,
+    number_of_workers: int | None,
+    memory_limit: str | None,
+) -> DaskConfiguration | None:
+    """
+    The scheduler to compute the subset with. None if no scheduler is
+    requested: the default scheduler of dask is then used, e.g. the
+    distributed client of the user if there is one.
+    """
+    if scheduler is None:
+        if number_of_workers or memory_limit:
+            logger.warning(
+                "The number of workers and the memory limit are ignored "
+                "when no dask scheduler is set."
+            )
+        return None
+    if memory_limit and scheduler != "distributed":
+        logger.warning(
+            "The memory limit is only used by the distributed scheduler."
+        )
+        memory_limit = None
+    return DaskConfiguration(
+        scheduler=scheduler,
+        number_of_workers=number_of_workers or CPU_COUNT,
+        memory_limit=memory_limit,
+    )
+
+
+def get_dask_memory_budget(
+    scheduler: DaskScheduler | None,
+    number_of_workers: int | None,
+    memory_limit: str | None,
+) -> int | None:
+    """
+    Memory available to compute a subset in bytes: the memory of all the
+    workers of the local distributed cluster if limited, else the
+    environment variable ``COPERNICUSMARINE_DASK_MEMORY_BUDGET``.
+    """
+    if scheduler == "distributed" and memory_limit:
+        return parse_bytes(memory_limit) * (number_of_workers or CPU_COUNT)
+    if DASK_MEMORY_BUDGET_MB > 0:
+        return int(DASK_MEMORY_BUDGET_MB * 1024 * 1024)
+    return None
+
+
+@contextlib.contextmanager
+def use_dask_scheduler(
+    dask_configuration: DaskConfiguration | None,
+) -> Iterator[None]:
+    """
+    Compute the dask graphs with the requested scheduler in the context:
+    a pool of threads, a pool of processes or a local distributed cluster.
+    """
+    if dask_configuration is None:
+        yield
+        return
+    logger.debug(f"Using dask scheduler: {dask_configuration}")
+    if dask_configuration.scheduler != "distributed":
+        with dask.config.set(
+            scheduler=dask_configuration.scheduler,
+            num_workers=dask_configuration.number_of_workers,
+        ):
+            yield
+        return
+    from distributed import (  # type: ignore[import-not-found]
+        Client,
+        LocalCluster,
+    )
+
+    with LocalCluster(
+        n_workers=dask_configuration.number_of_workers,
+        threads_per_worker=1,
+        memory_limit=dask_configuration.memory_limit or "auto",
+    ) as cluster, Client(cluster):
+        yield
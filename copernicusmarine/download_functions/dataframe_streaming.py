@@ -0,0 +1,191 @@
+import logging
+import pathlib
+from collections.abc import Iterator
+
+import pandas as pd
+import xarray
+from tqdm import tqdm
+
+from copernicusmarine.core_functions.utils import human_readable_size
+from copernicusmarine.download_functions.netcdf_streaming import (
+    get_block_length,
+    get_blocks,
+)
+
+logger = logging.getLogger("copernicusmarine")
+
+# Approximate memory used by a block of rows, including the index
+DATAFRAME_BLOCK_MEMORY_BUDGET = 256 * 1024 * 1024
+# A value in memory, and its label in the index
+BYTES_PER_DATAFRAME_CELL = 16
+# Maximum number of rows of a Parquet row group
+PARQUET_ROW_GROUP_SIZE = 1024 * 1024
+
+
+def _get_rows_per_index(dataset: xarray.Dataset, dimension: str) -> int:
+    rows = 1
+    for other_dimension, size in dataset.sizes.items():
+        if other_dimension != dimension:
+            rows *= size
+    return rows
+
+
+def iter_dataframe_blocks(
+    dataset: xarray.Dataset,
+    memory_budget: int = DATAFRAME_BLOCK_MEMORY_BUDGET,
+) -> Iterator[pd.DataFrame]:
+    """
+    Convert the dataset to dataframes block by block along its first
+    dimension, so that only one block is computed and held in memory
+    at a time.
+
+    The concatenation of the blocks is the same as
+    ``dataset.to_dataframe()``: the first dimension is the outermost
+    level of the index.
+    """
+    if not dataset.sizes:
+        yield dataset.to_dataframe()
+        return
+    dimension = str(next(iter(dataset.sizes)))
+    bytes_per_index = (
+        _get_rows_per_index(dataset, dimension)
+        * (len(dataset.variables) + len(dataset.sizes))
+        * BYTES_PER_DATAFRAME_CELL
+    )
+    dataset = _chunk_within_block_length(
+        dataset, dimension, get_block_length(memory_budget, bytes_per_index)
+    )
+    blocks = get_blocks(dataset, dimension, memory_budget, bytes_per_index)
+    logger.debug(
+        f"Converting dataset to dataframe in {len(blocks)} blocks "
+        f"along '{dimension}'"
+    )
+    for block in blocks:
+        yield dataset.isel({dimension: block}).compute().to_dataframe()
+
+
+def _get_stored_chunk_length(
+    dataset: xarray.Dataset, dimension: str
+) -> int | None:
+    for variable in dataset.data_vars.values():
+        preferred_chunks = variable.encoding.get("preferred_chunks") or {}
+        if dimension in preferred_chunks:
+            return int(preferred_chunks[dimension])
+    return None
+
+
+def _chunk_within_block_length(
+    dataset: xarray.Dataset, dimension: str, block_length: int
+) -> xarray.Dataset:
+    """
+    Split the dask chunks longer than a block, so that a block never holds
+    more than its budget. The split is aligned on the stored chunks when
+    they fit in a block: dask then reads each stored chunk only once.
+    """
+    chunks = dataset.chunks.get(dimension)
+    if not chunks or max(chunks) <= block_length:
+        return dataset
+    stored_chunk_length = _get_stored_chunk_length(dataset, dimension)
+    if stored_chunk_length and stored_chunk_length <= block_length:
+        block_length -= block_length % stored_chunk_length
+    split_chunks: list[int] = []
+    for chunk in chunks:
+        split_chunks.extend([block_length] * (chunk // block_length))
+        if chunk % block_length:
+            split_chunks.append(chunk % block_length)
+    logger.debug(
+        f"Splitting {len(chunks)} dask chunks along '{dimension}' "
+        f"in {len(split_chunks)} chunks of at most {block_length}"
+    )
+    return dataset.chunk({dimension: tuple(split_chunks)})
+
+
+def write_csv_by_blocks(
+    dataset: xarray.Dataset,
+    output_path: pathlib.Path,
+    disable_progress_bar: bool,
+    memory_budget: int = DATAFRAME_BLOCK_MEMORY_BUDGET,
+) -> None:
+    """
+    Append the rows of the dataset to the CSV file block by block.
+    The progress is reported in rows and the size of the file.
+    """
+    number_of_rows = 1
+    for size in dataset.sizes.values():
+        number_of_rows *= size
+    with tqdm(
+        total=number_of_rows,
+        unit="rows",
+        unit_scale=True,
+        disable=disable_progress_bar,
+        desc="Writing CSV",
+    ) as progress_bar, open(output_path, "w", newline="") as csv_file:
+        for index, dataframe in enumerate(
+            iter_dataframe_blocks(dataset, memory_budget)
+        ):
+            dataframe.to_csv(csv_file, header=index == 0)
+            progress_bar.update(len(dataframe))
+            progress_bar.set_postfix(
+                size=human_readable_size(csv_file.tell() / (1024 * 1024))
+            )
+
+
+def write_parquet_by_blocks(
+    dataset: xarray.Dataset,
+    output_path: pathlib.Path,
+    disable_progress_bar: bool,
+    memory_budget: int = DATAFRAME_BLOCK_MEMORY_BUDGET,
+) -> None:
+    """
+    Write the rows of the dataset to a Parquet file block by block,
+    each block being written as one or more row groups.
+
+    The dtypes of the variables are kept (e.g. float32), the coordinates
+    are dictionary encoded and the statistics of the columns are written
+    so that readers can skip row groups when filtering.
+    """
+    import pyarrow
+    import pyarrow.parquet
+
+    coordinate_names = [str(name) for name in dataset.coords] + [
+        str(name) for name in dataset.dims if name not in dataset.coords
+    ]
+    number_of_rows = 1
+    for size in dataset.sizes.values():
+        number_of_rows *= size
+    writer: pyarrow.parquet.ParquetWriter | None = None
+    with tqdm(
+        total=number_of_rows,
+        unit="rows",
+        unit_scale=True,
+        disable=disable_progress_bar,
+        desc="Writing Parquet",
+    ) as progress_bar:
+        try:
+            for dataframe in iter_dataframe_blocks(dataset, memory_budget):
+                table = pyarrow.Table.from_pandas(
+                    dataframe.reset_index(), preserve_index=False
+                )
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(
+                        output_path,
+                        table.schema,
+                        use_dictionary=[
+                            name
+                            for name in table.column_names
+                            if name in coordinate_names
+                        ],
+                        write_statistics=True,
+                    )
+                writer.write_table(
+                    table, row_group_size=PARQUET_ROW_GROUP_SIZE
+                )
+                progress_bar.update(len(dataframe))
+                progress_bar.set_postfix(
+                    size=human_readable_size(
+                        output_path.stat().st_size / (1024 * 1024)
+                    )
+                )
+        finally:
+            if writer is not None:
+                writer.close()
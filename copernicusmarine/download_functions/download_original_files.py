@@ -23,7 +23,11 @@ from copernicusmarine.core_functions.request_structure import (
     GetRequest,
     overload_regex_with_additional_filter,
 )
-from copernicusmarine.core_functions.sessions import ConfiguredBoto3Session
+from copernicusmarine.core_functions.retry_policy import RetryPolicy
+from copernicusmarine.core_functions.sessions import (
+    DEFAULT_MAX_POOL_CONNECTIONS,
+    ConfiguredBoto3Session,
+)
 from copernicusmarine.core_functions.utils import (
     get_unique_filepath,
     human_readable_size,
@@ -45,6 +49,8 @@ def download_original_files(
     endpoint, bucket, path = parse_access_dataset_url(
         str(get_request.dataset_url)
     )
+    # the retry budget is shared by all the requests of the job
+    retry_policy = RetryPolicy()
     if get_request.direct_download:
         files_headers = _download_header_for_direct_download(
             files_to_download=get_request.direct_download,
@@ -57,6 +63,7 @@ def download_original_files(
             no_directories=get_request.no_directories,
             overwrite=get_request.overwrite,
             skip_existing=get_request.skip_existing,
+            retry_policy=retry_policy,
         )
     else:
         files_headers = S3FilesDescriptor(endpoint=endpoint, bucket=bucket)
@@ -93,6 +100,7 @@ def download_original_files(
             overwrite=get_request.overwrite,
             disable_progress_bar=disable_progress_bar,
             only_list_root_path=get_request.index_parts,
+            retry_policy=retry_policy,
         )
         if files_headers_listing.create_file_list is True:
             return ResponseGet(
@@ -163,6 +171,7 @@ def download_original_files(
         filenames_out,
         max_concurrent_requests,
         disable_progress_bar,
+        retry_policy,
     )
     return response
 
@@ -263,16 +272,28 @@ def download_files(
     filenames_out: list[pathlib.Path],
     max_concurrent_requests: int,
     disable_progress_bar: bool,
+    retry_policy: RetryPolicy,
 ) -> None:
     for filename_out in filenames_out:
         parent_dir = pathlib.Path(filename_out).parent
         if not parent_dir.is_dir():
             pathlib.Path.mkdir(parent_dir, parents=True)
     if max_concurrent_requests:
+        max_pool_connections = max(
+            max_concurrent_requests, DEFAULT_MAX_POOL_CONNECTIONS
+        )
         run_concurrently(
             _download_one_file,
             [
-                (username, endpoint_url, bucket, in_file, str(out_file))
+                (
+                    username,
+                    endpoint_url,
+                    bucket,
+                    in_file,
+                    str(out_file),
+                    max_pool_connections,
+                    retry_policy,
+                )
                 for in_file, out_file in zip(
                     filenames_in,
                     filenames_out,
@@ -293,7 +314,12 @@ def download_files(
         ) as pbar:
             for in_file, out_file in zip(filenames_in, filenames_out):
                 _download_one_file(
-                    username, endpoint_url, bucket, in_file, str(out_file)
+                    username,
+                    endpoint_url,
+                    bucket,
+                    in_file,
+                    str(out_file),
+                    retry_policy=retry_policy,
                 )
                 pbar.update(1)
 
@@ -311,6 +337,7 @@ def _download_header(
     overwrite: bool,
     skip_existing: bool,
     disable_progress_bar: bool,
+    retry_policy: RetryPolicy,
     only_list_root_path: bool = False,
 ) -> S3FilesDescriptor:
     files_headers = S3FilesDescriptor(endpoint=endpoint_url, bucket=bucket)
@@ -322,6 +349,7 @@ def _download_header(
         path,
         not only_list_root_path,
         disable_progress_bar,
+        retry_policy,
     )
 
     for filename, size, last_modified_datetime, etag in raw_filenames:
@@ -392,6 +420,7 @@ def _download_header_for_direct_download(
     no_directories: bool,
     overwrite: bool,
     skip_existing: bool,
+    retry_policy: RetryPolicy,
 ) -> S3FilesDescriptor:
     files_headers = S3FilesDescriptor(endpoint=endpoint_url, bucket=bucket)
 
@@ -413,7 +442,7 @@ def _download_header_for_direct_download(
             f"{dataset_id_with_tag}/{file_path}"
         )
         size_last_modified_and_etag = _get_file_size_last_modified_and_etag(
-            endpoint_url, bucket, full_path, username
+            endpoint_url, bucket, full_path, username, retry_policy
         )
         if size_last_modified_and_etag:
             size, last_modified, etag = size_last_modified_and_etag
@@ -568,13 +597,18 @@ def _list_files_on_marine_data_lake_s3(
     prefix: str,
     recursive: bool,
     disable_progress_bar: bool,
+    retry_policy: RetryPolicy,
 ) -> list[tuple[str, int, datetime, str]]:
     with ConfiguredBoto3Session(
         endpoint_url, ["ListObjectsV2", "HeadObject"], username
     ) as session:
         if not prefix.endswith("/"):
             try:
-                session.s3_client.head_object(Bucket=bucket, Key=prefix)
+                retry_policy.call(
+                    lambda: session.s3_client.head_object(
+                        Bucket=bucket, Key=prefix
+                    )
+                )
             except ClientError as e:
                 error_code = e.response.get("Error", {}).get("Code")
                 if error_code == "404" or error_code == "NoSuchKey":
@@ -589,10 +623,15 @@ def _list_files_on_marine_data_lake_s3(
             Delimiter="/" if not recursive else "",
         )
     logger.info("Listing files on remote server...")
-    s3_objects = chain(
-        *map(
-            lambda page: page.get("Contents", []),
-            tqdm(page_iterator, disable=disable_progress_bar),
+    # the pages are fetched lazily: the listing restarts if a page fails
+    s3_objects = retry_policy.call(
+        lambda: list(
+            chain(
+                *map(
+                    lambda page: page.get("Contents", []),
+                    tqdm(page_iterator, disable=disable_progress_bar),
+                )
+            )
         )
     )
     files_already_found: list[tuple[str, int, datetime, str]] = []
@@ -609,15 +648,21 @@ def _list_files_on_marine_data_lake_s3(
 
 
 def _get_file_size_last_modified_and_etag(
-    endpoint_url: str, bucket: str, file_in: str, username: str
+    endpoint_url: str,
+    bucket: str,
+    file_in: str,
+    username: str,
+    retry_policy: RetryPolicy,
 ) -> tuple[int, datetime, str] | None:
     with ConfiguredBoto3Session(
         endpoint_url, ["HeadObject"], username
     ) as session:
         try:
-            s3_object = session.s3_client.head_object(
-                Bucket=bucket,
-                Key=file_in.replace(f"s3://{bucket}/", ""),
+            s3_object = retry_policy.call(
+                lambda: session.s3_client.head_object(
+                    Bucket=bucket,
+                    Key=file_in.replace(f"s3://{bucket}/", ""),
+                )
             )
             return (
                 s3_object["ContentLength"],
@@ -640,21 +685,25 @@ def _download_one_file(
     bucket: str,
     file_in: str,
     file_out: str,
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+    retry_policy: RetryPolicy | None = None,
 ) -> None:
+    retry_policy = retry_policy or RetryPolicy()
+    object_key = file_in.replace(f"s3://{bucket}/", "")
     with ConfiguredBoto3Session(
         endpoint_url,
         ["GetObject", "HeadObject"],
         username,
-        need_resources=True,
+        max_pool_connections=max_pool_connections,
     ) as session:
-        last_modified_date_epoch = session.s3_resource.Object(
-            bucket, file_in.replace(f"s3://{bucket}/", "")
-        ).last_modified.timestamp()
-
-        session.download_file(
-            bucket,
-            file_in.replace(f"s3://{bucket}/", ""),
-            file_out,
+        last_modified_date_epoch = retry_policy.call(
+            lambda: session.s3_client.head_object(
+                Bucket=bucket, Key=object_key
+            )
+        )["LastModified"].timestamp()
+
+        retry_policy.call(
+            lambda: session.download_file(bucket, object_key, file_out)
         )
 
     try:
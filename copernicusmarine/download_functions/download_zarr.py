@@ -1,12 +1,15 @@
 import logging
 import os
 import pathlib
+import time
 import warnings
 from copy import deepcopy
 from multiprocessing import current_process
+from typing import Any
 
 import xarray
 import zarr
+from dask.system import CPU_COUNT
 
 from copernicusmarine.core_functions.temporary_path_saver import (
     TemporaryPathSaver,
@@ -32,6 +35,10 @@ from copernicusmarine.catalogue_parser.models import (
     CopernicusMarineService,
 )
 from copernicusmarine.core_functions import custom_open_zarr
+from copernicusmarine.core_functions.environment_variables import (
+    COPERNICUSMARINE_NETCDF_COMPRESSION_WORKERS,
+    COPERNICUSMARINE_NETCDF_MEMORY_BUDGET,
+)
 from copernicusmarine.core_functions.exceptions import (
     NetCDFCompressionNotAvailable,
 )
@@ -39,16 +46,54 @@ from copernicusmarine.core_functions.models import (
     CoordinatesSelectionMethod,
     DatasetChunking,
     FileStatus,
+    IndexWindow,
     ResponseSubset,
+    ServiceVariables,
     StatusCode,
     StatusMessage,
 )
 from copernicusmarine.core_functions.request_structure import SubsetRequest
+from copernicusmarine.core_functions.retry_policy import RetryPolicy
 from copernicusmarine.core_functions.utils import (
     add_copernicusmarine_version_in_dataset_attributes,
     get_unique_filepath,
     human_readable_size,
 )
+from copernicusmarine.download_functions.append_subset import (
+    append_to_netcdf,
+    append_to_zarr,
+    check_append_compatibility,
+    get_append_output_path,
+    get_append_start_datetime,
+    get_catalogue_last_time,
+    get_last_time,
+    open_existing_output,
+    select_new_time_steps,
+)
+from copernicusmarine.download_functions.chunk_calculator import (
+    get_index_windows,
+    is_index_window_covering,
+)
+from copernicusmarine.download_functions.dask_chunking import (
+    get_decoded_item_size,
+    plan_dask_chunking,
+)
+from copernicusmarine.download_functions.dask_scheduler import (
+    get_dask_configuration,
+    get_dask_memory_budget,
+    use_dask_scheduler,
+)
+from copernicusmarine.download_functions.dataframe_streaming import (
+    write_csv_by_blocks,
+    write_parquet_by_blocks,
+)
+from copernicusmarine.download_functions.netcdf_streaming import (
+    write_netcdf_by_blocks,
+    write_netcdf_with_parallel_compression,
+)
+from copernicusmarine.download_functions.resumable_zarr import (
+    write_zarr_resumably,
+)
 from copernicusmarine.download_functions.subset_parameters import (
     DepthParameters,
     GeographicalParameters,
@@ -66,6 +111,49 @@ from copernicusmarine.download_functions.utils import (
 
 logger = logging.getLogger("copernicusmarine")
 
+try:
+    NETCDF_MEMORY_BUDGET_MB = float(COPERNICUSMARINE_NETCDF_MEMORY_BUDGET or 0)
+except ValueError:
+    NETCDF_MEMORY_BUDGET_MB = 0
+
+try:
+    NETCDF_COMPRESSION_WORKERS = int(
+        COPERNICUSMARINE_NETCDF_COMPRESSION_WORKERS
+    )
+except ValueError:
+    NETCDF_COMPRESSION_WORKERS = 0
+
+# Memory used to compress the chunks in parallel if no budget is set
+DEFAULT_NETCDF_COMPRESSION_MEMORY_BUDGET_MB = 256
+
+
+def _get_subset_dask_chunking(
+    subset_request: SubsetRequest,
+    service: CopernicusMarineService,
+    variables: list[str] | None,
+    dataset_chunking: DatasetChunking | None,
+    axis_coordinate_id_mapping: dict[str, str],
+) -> dict[str, int] | None:
+    if not (subset_request.chunk_size_limit and dataset_chunking):
+        return None
+    return get_optimum_dask_chunking(
+        service=service,
+        variables=variables,
+        dataset_chunking=dataset_chunking,
+        chunk_size_limit=subset_request.chunk_size_limit,
+        axis_coordinate_id_mapping=axis_coordinate_id_mapping,
+        number_of_workers=(
+            subset_request.dask_number_of_workers
+            if subset_request.dask_scheduler
+            else None
+        ),
+        memory_budget=get_dask_memory_budget(
+            subset_request.dask_scheduler,
+            subset_request.dask_number_of_workers,
+            subset_request.dask_memory_limit,
+        ),
+    )
+
 
 def get_dataset_and_parameters(
     subset_request: SubsetRequest,
@@ -75,6 +163,8 @@ def get_dataset_and_parameters(
     dataset_chunking: DatasetChunking | None,
     is_original_grid: bool,
     dataset_valid_start_date: str | int | float | None,
+    arco_updated_date: str | None,
+    mixed_services: list[ServiceVariables] | None = None,
 ) -> tuple[xarray.Dataset, GeographicalParameters, DepthParameters]:
     if dataset_valid_start_date:
         minimum_start_date = timestamp_or_datestring_to_datetime(
@@ -86,36 +176,68 @@ def get_dataset_and_parameters(
         ):
             subset_request.start_datetime = minimum_start_date
 
-    if subset_request.chunk_size_limit and dataset_chunking:
-        optimum_dask_chunking = get_optimum_dask_chunking(
-            service=service,
-            variables=subset_request.variables,
-            dataset_chunking=dataset_chunking,
-            chunk_size_limit=subset_request.chunk_size_limit,
-            axis_coordinate_id_mapping=axis_coordinate_id_mapping,
-        )
-    else:
-        optimum_dask_chunking = None
-
-    logger.debug(f"Dask chunking selected: {optimum_dask_chunking}")
     geographical_parameters = subset_request.get_geographical_parameters(
         axis_coordinate_id_mapping, is_original_grid
     )
     depth_parameters = subset_request.get_depth_parameters(
         axis_coordinate_id_mapping,
     )
-    dataset = open_dataset_from_arco_series(
-        username=subset_request.username,
-        dataset_url=dataset_url,
-        variables=subset_request.variables,
-        geographical_parameters=geographical_parameters,
-        temporal_parameters=subset_request.get_temporal_parameters(
-            axis_coordinate_id_mapping,
-        ),
-        depth_parameters=depth_parameters,
-        coordinates_selection_method=subset_request.coordinates_selection_method,
-        optimum_dask_chunking=optimum_dask_chunking,
+    temporal_parameters = subset_request.get_temporal_parameters(
+        axis_coordinate_id_mapping,
     )
+    if not mixed_services:
+        mixed_services = [
+            ServiceVariables(
+                service=service,
+                variables=subset_request.variables or [],
+                dataset_chunking=dataset_chunking,
+            )
+        ]
+    # the retry budget is shared by all the requests of the job
+    retry_policy = RetryPolicy()
+    datasets = []
+    for service_variables in mixed_services:
+        optimum_dask_chunking = _get_subset_dask_chunking(
+            subset_request,
+            service_variables.service,
+            service_variables.variables or None,
+            service_variables.dataset_chunking,
+            axis_coordinate_id_mapping,
+        )
+        logger.debug(f"Dask chunking selected: {optimum_dask_chunking}")
+        datasets.append(
+            open_dataset_from_arco_series(
+                username=subset_request.username,
+                dataset_url=(
+                    dataset_url
+                    if service_variables.service is service
+                    else service_variables.service.uri
+                ),
+                variables=service_variables.variables or None,
+                geographical_parameters=geographical_parameters,
+                temporal_parameters=temporal_parameters,
+                depth_parameters=depth_parameters,
+                coordinates_selection_method=(
+                    subset_request.coordinates_selection_method
+                ),
+                optimum_dask_chunking=optimum_dask_chunking,
+                arco_updated_date=arco_updated_date,
+                index_windows=get_index_windows(
+                    service_variables.service,
+                    service_variables.variables or None,
+                    subset_request,
+                    axis_coordinate_id_mapping,
+                ),
+                retry_policy=retry_policy,
+            )
+        )
+    if len(datasets) == 1:
+        dataset = datasets[0]
+    else:
+        # the services store the same grid with different chunks
+        dataset = xarray.merge(
+            datasets, join="exact", combine_attrs="override"
+        )
 
     dataset = add_copernicusmarine_version_in_dataset_attributes(dataset)
     return dataset, geographical_parameters, depth_parameters
@@ -130,7 +252,54 @@ def download_zarr(
     dataset_chunking: DatasetChunking | None,
     is_original_grid: bool,
     tdqm_configuration: dict,
+    arco_updated_date: str | None = None,
+    mixed_services: list[ServiceVariables] | None = None,
 ) -> ResponseSubset:
+    existing_dataset = None
+    last_time = None
+    if subset_request.append and subset_request.output_filename:
+        append_path = get_append_output_path(
+            subset_request.output_directory,
+            subset_request.output_filename,
+            subset_request.file_format,
+        )
+        if append_path.exists():
+            existing_dataset = open_existing_output(append_path)
+            last_time = get_last_time(existing_dataset)
+            if last_time is None:
+                existing_dataset.close()
+                existing_dataset = None
+        if existing_dataset is not None and last_time is not None:
+            logger.info(
+                f"Appending the time steps after {last_time} "
+                f"to {append_path}."
+            )
+            requested_last_time = min(
+                (
+                    end_datetime
+                    for end_datetime in [
+                        get_catalogue_last_time(
+                            service, axis_coordinate_id_mapping
+                        ),
+                        subset_request.end_datetime,
+                    ]
+                    if end_datetime is not None
+                ),
+                default=None,
+            )
+            if (
+                requested_last_time is not None
+                and last_time >= requested_last_time
+            ):
+                return _get_up_to_date_response(
+                    existing_dataset,
+                    append_path,
+                    subset_request,
+                    axis_coordinate_id_mapping,
+                )
+            subset_request.start_datetime = get_append_start_datetime(
+                last_time, subset_request.start_datetime
+            )
     (
         dataset,
         geographical_parameters,
@@ -143,9 +312,28 @@ def download_zarr(
         dataset_chunking=dataset_chunking,
         is_original_grid=is_original_grid,
         dataset_valid_start_date=dataset_valid_start_date,
+        arco_updated_date=arco_updated_date,
+        mixed_services=mixed_services,
     )
     if depth_parameters.vertical_axis == "elevation":
         axis_coordinate_id_mapping["z"] = "elevation"
+    if existing_dataset is not None and last_time is not None:
+        dataset = select_new_time_steps(dataset, last_time)
+        if not dataset.sizes.get("time"):
+            return _get_up_to_date_response(
+                existing_dataset,
+                append_path,
+                subset_request,
+                axis_coordinate_id_mapping,
+            )
+        check_append_compatibility(existing_dataset, dataset)
+    elif (
+        subset_request.append
+        and subset_request.file_format == "netcdf"
+        and "time" in dataset.dims
+    ):
+        # so that the next time steps can be appended in place
+        dataset.encoding["unlimited_dims"] = {"time"}
 
     if not subset_request.output_directory.is_dir():
         pathlib.Path.mkdir(subset_request.output_directory, parents=True)
@@ -164,8 +352,8 @@ def download_zarr(
             logger.warning(
                 "The estimated size of the final CSV output is "
                 f"{human_readable_size(final_result_size_estimation)}. "
-                "Generating such a large file may result in high memory "
-                "consumption and significant storage requirements. "
+                "Generating such a large file may take a long time "
+                "and require significant storage. "
                 f"The same data in NetCDF or Zarr format is estimated at "
                 f"{human_readable_size(non_csv_size_estimation)}. Using "
                 "these formats is recommended for large or complex datasets."
@@ -185,7 +373,18 @@ def download_zarr(
         axis_coordinate_id_mapping,
         geographical_parameters,
     )
-    if dataset_chunking:
+    data_needed_approximation: float | None
+    if mixed_services:
+        data_needed_approximation = sum(
+            get_approximation_size_data_downloaded(
+                dataset[service_variables.variables],
+                service_variables.dataset_chunking,
+            )
+            or 0
+            for service_variables in mixed_services
+            if service_variables.dataset_chunking
+        )
+    elif dataset_chunking:
         data_needed_approximation = get_approximation_size_data_downloaded(
             dataset, dataset_chunking
         )
@@ -194,7 +393,11 @@ def download_zarr(
 
     output_path = pathlib.Path(subset_request.output_directory, filename)
 
-    if not subset_request.overwrite and not subset_request.skip_existing:
+    if not (
+        subset_request.overwrite
+        or subset_request.skip_existing
+        or subset_request.append
+    ):
         output_path = get_unique_filepath(
             filepath=output_path,
         )
@@ -212,6 +415,11 @@ def download_zarr(
         status=StatusCode.SUCCESS,
         message=StatusMessage.SUCCESS,
         file_status=FileStatus.DOWNLOADED,
+        dask_configuration=get_dask_configuration(
+            subset_request.dask_scheduler,
+            subset_request.dask_number_of_workers,
+            subset_request.dask_memory_limit,
+        ),
     )
 
     if subset_request.dry_run:
@@ -228,22 +436,36 @@ def download_zarr(
     if (
         "disable" not in tdqm_configuration
         or not tdqm_configuration["disable"]
-    ) and subset_request.file_format == "csv":
+    ) and subset_request.file_format in ["csv", "parquet"]:
         tdqm_configuration["disable"] = True
 
     bar_format = "{l_bar}{bar}| [{elapsed}<{remaining}]"
-    with TqdmCallback(
+    with use_dask_scheduler(response.dask_configuration), TqdmCallback(
         **tdqm_configuration,
         bar_format=bar_format,
     ):
-        _save_dataset_locally(
-            dataset,
-            output_path,
-            subset_request.netcdf_compression_level,
-            subset_request.netcdf3_compatible,
-        )
+        if existing_dataset is not None and last_time is not None:
+            _append_dataset_locally(
+                dataset,
+                existing_dataset,
+                output_path,
+                subset_request.netcdf_compression_level,
+                subset_request.netcdf3_compatible,
+            )
+        else:
+            _save_dataset_locally(
+                dataset,
+                output_path,
+                subset_request.netcdf_compression_level,
+                subset_request.netcdf3_compatible,
+                subset_request.disable_progress_bar,
+                subset_request.resumable,
+            )
 
     dataset.close()
+    if existing_dataset is not None:
+        existing_dataset.close()
+        response.file_status = FileStatus.APPENDED
 
     if subset_request.overwrite:
         response.status = StatusCode.SUCCESS
@@ -253,6 +475,30 @@ def download_zarr(
     return response
 
 
+def _get_up_to_date_response(
+    existing_dataset: xarray.Dataset,
+    output_path: pathlib.Path,
+    subset_request: SubsetRequest,
+    axis_coordinate_id_mapping: dict[str, str],
+) -> ResponseSubset:
+    logger.info(f"{output_path} is up to date, no time step to append.")
+    existing_dataset.close()
+    return ResponseSubset(
+        file_path=output_path,
+        output_directory=subset_request.output_directory,
+        filename=output_path.name,
+        file_size=None,
+        data_transfer_size=None,
+        variables=[str(name) for name in existing_dataset.data_vars],
+        coordinates_extent=get_dataset_coordinates_extent(
+            existing_dataset, axis_coordinate_id_mapping
+        ),
+        status=StatusCode.NO_DATA_TO_DOWNLOAD,
+        message=StatusMessage.NO_DATA_TO_DOWNLOAD,
+        file_status=FileStatus.IGNORED,
+    )
+
+
 def open_dataset_from_arco_series(
     username: str,
     dataset_url: str,
@@ -262,14 +508,53 @@ def open_dataset_from_arco_series(
     depth_parameters: DepthParameters,
     coordinates_selection_method: CoordinatesSelectionMethod,
     optimum_dask_chunking: dict[str, int] | None,
+    arco_updated_date: str | None = None,
+    index_windows: dict[str, IndexWindow] | None = None,
+    retry_policy: RetryPolicy | None = None,
 ) -> xarray.Dataset:
+    """
+    Open the dataset restricted to the index windows computed from the
+    catalogue, then select the subset from the values of the coordinates.
+    If the coordinates read do not match the catalogue, the whole
+    dataset is opened instead.
+
+    With dask chunks, the dask graph only has tasks for the chunks of the
+    index windows. Its size and the time to build it are logged.
+    """
+    start_time = time.perf_counter()
     with warnings.catch_warnings():
         warnings.simplefilter("ignore", category=UserWarning)
         dataset = custom_open_zarr.open_zarr(
             dataset_url,
             chunks=optimum_dask_chunking,
             copernicus_marine_username=username,
+            cache_version=arco_updated_date,
+            retry_policy=retry_policy,
+            index_windows={
+                coordinate_id: index_window.indexes
+                for coordinate_id, index_window in (
+                    index_windows or {}
+                ).items()
+            },
         )
+        if index_windows and not all(
+            is_index_window_covering(
+                index_window, dataset[coordinate_id].values
+            )
+            for coordinate_id, index_window in index_windows.items()
+            if coordinate_id in dataset.coords
+        ):
+            logger.debug(
+                "The coordinates do not match the index windows "
+                "of the catalogue. Opening the whole dataset."
+            )
+            dataset = custom_open_zarr.open_zarr(
+                dataset_url,
+                chunks=optimum_dask_chunking,
+                copernicus_marine_username=username,
+                cache_version=arco_updated_date,
+                retry_policy=retry_policy,
+            )
     for variable in dataset:
         del dataset[variable].encoding["chunks"]
     dataset = subset(
@@ -288,6 +573,12 @@ def open_dataset_from_arco_series(
         dataset = dataset.chunk(optimum_chunks_depth)
     elif optimum_dask_chunking:
         dataset = dataset.chunk(optimum_dask_chunking)
+    dask_graph = dataset.__dask_graph__()
+    if dask_graph is not None:
+        logger.debug(
+            f"Dask graph of {len(dask_graph)} tasks built in "
+            f"{time.perf_counter() - start_time:.3f} s"
+        )
     return dataset
 
 
@@ -344,22 +635,26 @@ def get_optimum_dask_chunking(
     dataset_chunking: DatasetChunking,
     chunk_size_limit: int,
     axis_coordinate_id_mapping: dict[str, str],
+    number_of_workers: int | None = None,
+    memory_budget: int | None = None,
 ) -> dict[str, int] | None:
     """
-    We have some problems with overly big dask graphs (we think) that introduces huge overheads
-    and memory usage. We are trying to find the optimum chunking for dask arrays.
+    We have some problems with overly big dask graphs that introduce huge
+    overheads and memory usage. We are trying to find the optimum chunking
+    for dask arrays.
 
     By default, the chunking is the zarr chunking ie 1MB for each tile.
-    The rule of thumb for dask chunking is to have chunks of size 100MB.
+    The dask chunks are multiples of the zarr chunking, as big as possible
+    within the memory budget of the workers while keeping enough tasks
+    for all the workers, see ``plan_dask_chunking``.
 
     To avoid downloading too much data we should also be careful not to
     increase the size of the chunks more than the size of the data we are interested in.
     Eg: you want 1 time point, increasing size of the chunk on time dimension by x
     will lead to downloading x times more data than needed.
 
-    Knowing that, we should cap the size of the chunk to 100MB and use multiples of the zarr chunking.
-
-    If the factors sum up to less than 100, no chunking is needed.
+    A positive ``chunk_size_limit`` caps the number of zarr chunks
+    per dask chunk.
 
     Returns
     -------
@@ -380,38 +675,52 @@ def get_optimum_dask_chunking(
     ) = get_coordinates_dask_and_zarr_chunks_info(
         service, variables, dataset_chunking
     )
-    zarr_chunks_to_download = dataset_chunking.number_chunks
-    # it seems that dask chunks increases more
-    # with the number of variables
-    chunks_and_variables_size = zarr_chunks_to_download * len(
-        dataset_chunking.chunking_per_variable
-    )
-    if chunk_size_limit == -1:
-        # TODO: investigate in depth what are the optimal values.
-        # For now, we use the default values that seem to work well
-        # for our examples but we should investigate more.
-        if zarr_chunks_to_download <= 50:
-            return None
-        elif chunks_and_variables_size <= 1500:
-            chunk_size_limit = 20
-        elif chunks_and_variables_size <= 4000:
-            chunk_size_limit = 50
-        else:
-            chunk_size_limit = 100
-    logger.debug(f"Chunk size limit: {chunk_size_limit}")
-    logger.debug(f"Zarr chunking: {coordinate_zarr_chunk_length}")
-    logger.debug(f"Max dask chunk factor: {max_dask_chunk_factor}")
-    optimum_dask_factors = _get_optimum_factors(
-        max_dask_chunk_factor,
-        chunk_size_limit,
-        axis_coordinate_id_mapping,
+    set_variables = set(variables) if variables else set()
+    selected_variables = [
+        variable
+        for variable in service.variables
+        if variable.short_name in dataset_chunking.chunking_per_variable
+        and (
+            not set_variables
+            or variable.short_name in set_variables
+            or variable.standard_name in set_variables
+        )
+    ]
+    plan = plan_dask_chunking(
+        zarr_chunk_lengths=coordinate_zarr_chunk_length,
+        number_of_zarr_chunks={
+            coordinate_id: int(number_of_chunks)
+            for coordinate_id, number_of_chunks in (
+                max_dask_chunk_factor.items()
+            )
+        },
+        variable_chunk_shapes={
+            variable.short_name: {
+                coordinate.coordinate_id: int(coordinate.chunking_length)
+                for coordinate in variable.coordinates
+                if coordinate.chunking_length
+            }
+            for variable in selected_variables
+        },
+        variable_item_sizes={
+            variable.short_name: get_decoded_item_size(variable._dtype)
+            for variable in selected_variables
+        },
+        memory_budget=memory_budget,
+        number_of_workers=number_of_workers or CPU_COUNT,
+        zarr_chunks_per_dask_chunk_limit=(
+            chunk_size_limit if chunk_size_limit > 0 else None
+        ),
+        coordinates_priority=[
+            axis_coordinate_id_mapping[axis]
+            for axis in ["z", "t", "y", "x"]
+            if axis in axis_coordinate_id_mapping
+        ],
     )
-    optimum_dask_chunking = {
-        coordinate_id: coordinate_zarr_chunk_length[coordinate_id]
-        * optimum_dask_factors[coordinate_id]
-        for coordinate_id in optimum_dask_factors
-    }
-    logger.debug(f"Optimum dask chunking: {optimum_dask_chunking}")
+    plan.log()
+    if not plan.use_dask:
+        return None
+    optimum_dask_chunking = plan.dask_chunking
 
     if (
         "z" in axis_coordinate_id_mapping
@@ -425,59 +734,29 @@ def get_optimum_dask_chunking(
     return optimum_dask_chunking
 
 
-def _product(iterable) -> int:
-    result = 1
-    for i in iterable:
-        result *= i
-    return result
-
-
-def _get_optimum_factors(
-    coordinate_max_dask_chunk_factor: dict[str, int],
-    limit: int,
-    axis_coordinate_id_mapping: dict[str, str],
-) -> dict[str, int]:
-    optimum_factors = {
-        coordinate_name: 1
-        for coordinate_name in coordinate_max_dask_chunk_factor
-    }
-    coordinate_selection_pool = {
-        coordinate_name
-        for coordinate_name, max_factor in coordinate_max_dask_chunk_factor.items()
-        if max_factor > 1
-    }
-    while (
-        _product(optimum_factors.values()) < limit
-        and coordinate_selection_pool
-    ):
-        selected_coordinate = max(
-            coordinate_selection_pool,
-            key=lambda x: (
-                coordinate_max_dask_chunk_factor[x],
-                x in axis_coordinate_id_mapping.get("z", ""),
-                x in axis_coordinate_id_mapping.get("t", ""),
-                x in axis_coordinate_id_mapping.get("y", ""),
-                x in axis_coordinate_id_mapping.get("x", ""),
-            ),
-        )
-
-        optimum_factors[selected_coordinate] += 1
-        if optimum_factors[
-            selected_coordinate
-        ] == coordinate_max_dask_chunk_factor[selected_coordinate] or (
-            len(coordinate_selection_pool) > 1
-            and optimum_factors[selected_coordinate] >= limit // 2
-        ):
-            coordinate_selection_pool.remove(selected_coordinate)
-    return optimum_factors
-
-
 def _save_dataset_locally(
     dataset: xarray.Dataset,
     output_path: pathlib.Path,
     netcdf_compression_level: int,
     netcdf3_compatible: bool,
+    disable_progress_bar: bool = True,
+    resumable: bool = False,
 ) -> None:
+    if output_path.suffix != ".nc" and (
+        netcdf_compression_level > 0 or netcdf3_compatible
+    ):
+        raise NetCDFCompressionNotAvailable(
+            "--netcdf-compression-level option cannot be used when "
+            "writing to ZARR, CSV or Parquet format."
+        )
+    if resumable and output_path.suffix == ".zarr":
+        logger.debug("Writing dataset to Zarr through a staging store.")
+        write_zarr_resumably(dataset, output_path, ZARR_FORMAT)
+        return
+    if resumable:
+        logger.warning(
+            "The resumable option is only available for the Zarr format."
+        )
     with TemporaryPathSaver(output_path) as temp_path:
         if output_path.suffix == ".nc":
             _download_dataset_as_netcdf(
@@ -486,16 +765,57 @@ def _save_dataset_locally(
                 netcdf_compression_level,
                 netcdf3_compatible,
             )
-            return
-        if netcdf_compression_level > 0 or netcdf3_compatible:
-            raise NetCDFCompressionNotAvailable(
-                "--netcdf-compression-level option cannot be used when "
-                "writing to ZARR or CSV format."
-            )
-        if output_path.suffix == ".zarr":
+        elif output_path.suffix == ".zarr":
             _download_dataset_as_zarr(dataset, temp_path)
         elif output_path.suffix == ".csv":
-            _download_dataset_as_csv(dataset, temp_path)
+            _download_dataset_as_csv(dataset, temp_path, disable_progress_bar)
+        elif output_path.suffix == ".parquet":
+            _download_dataset_as_parquet(
+                dataset, temp_path, disable_progress_bar
+            )
+
+
+def _append_dataset_locally(
+    dataset: xarray.Dataset,
+    existing_dataset: xarray.Dataset,
+    output_path: pathlib.Path,
+    netcdf_compression_level: int,
+    netcdf3_compatible: bool,
+) -> None:
+    if output_path.suffix == ".zarr":
+        logger.debug("Appending dataset to Zarr.")
+        append_to_zarr(dataset, existing_dataset, output_path, ZARR_FORMAT)
+        return
+    logger.debug("Appending dataset to NetCDF.")
+    # the file cannot be opened for writing while it is open for reading
+    existing_dataset.close()
+    if append_to_netcdf(
+        dataset,
+        output_path,
+        memory_budget=int(NETCDF_MEMORY_BUDGET_MB * 1024 * 1024) or None,
+    ):
+        return
+    logger.warning(
+        f"The time dimension of {output_path} is not unlimited. "
+        "The file is rewritten with the new time steps."
+    )
+    existing_dataset = open_existing_output(output_path)
+    dataset = xarray.concat(
+        [existing_dataset, dataset],
+        dim="time",
+        data_vars="minimal",
+        coords="minimal",
+        compat="override",
+        join="override",
+    )
+    dataset.encoding["unlimited_dims"] = {"time"}
+    _save_dataset_locally(
+        dataset,
+        output_path,
+        netcdf_compression_level,
+        netcdf3_compatible,
+    )
+    existing_dataset.close()
 
 
 def _download_dataset_as_zarr(
@@ -516,6 +836,7 @@ def _download_dataset_as_netcdf(
     netcdf3_compatible: bool,
 ):
     logger.debug("Writing dataset to NetCDF.")
+    encoding: dict[str, dict[str, Any]] | None
     for coord in dataset.coords:
         dataset[coord].encoding["_FillValue"] = None
     if netcdf_compression_level > 0:
@@ -537,7 +858,7 @@ def _download_dataset_as_netcdf(
             "units",
         }
         encoding = {
-            name: {
+            str(name): {
                 **{
                     key: value
                     for key, value in var.encoding.items()
@@ -550,6 +871,35 @@ def _download_dataset_as_netcdf(
     else:
         encoding = None
 
+    if (
+        encoding is not None
+        and not netcdf3_compatible
+        and NETCDF_COMPRESSION_WORKERS > 0
+    ):
+        return write_netcdf_with_parallel_compression(
+            dataset,
+            output_path,
+            encoding,
+            number_of_workers=NETCDF_COMPRESSION_WORKERS,
+            memory_budget=int(
+                (
+                    NETCDF_MEMORY_BUDGET_MB
+                    or DEFAULT_NETCDF_COMPRESSION_MEMORY_BUDGET_MB
+                )
+                * 1024
+                * 1024
+            ),
+        )
+
+    if NETCDF_MEMORY_BUDGET_MB and write_netcdf_by_blocks(
+        dataset,
+        output_path,
+        encoding,
+        netcdf3_compatible,
+        memory_budget=int(NETCDF_MEMORY_BUDGET_MB * 1024 * 1024),
+    ):
+        return None
+
     xarray_download_format = "NETCDF3_CLASSIC" if netcdf3_compatible else None
     engine = "h5netcdf" if not netcdf3_compatible else "netcdf4"
     return dataset.to_netcdf(
@@ -562,8 +912,18 @@ def _download_dataset_as_netcdf(
 
 
 def _download_dataset_as_csv(
-    dataset: xarray.Dataset, output_path: pathlib.Path
+    dataset: xarray.Dataset,
+    output_path: pathlib.Path,
+    disable_progress_bar: bool = True,
 ):
     logger.debug("Writing dataset to CSV.")
-    df = dataset.to_dataframe()
-    df.to_csv(output_path)
+    write_csv_by_blocks(dataset, output_path, disable_progress_bar)
+
+
+def _download_dataset_as_parquet(
+    dataset: xarray.Dataset,
+    output_path: pathlib.Path,
+    disable_progress_bar: bool = True,
+):
+    logger.debug("Writing dataset to Parquet.")
+    write_parquet_by_blocks(dataset, output_path, disable_progress_bar)
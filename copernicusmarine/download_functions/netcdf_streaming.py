@@ -0,0 +1,428 @@
+import itertools
+import logging
+import pathlib
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from functools import partial
+from typing import Any
+
+import numpy as np
+import xarray
+from xarray.conventions import encode_cf_variable
+
+logger = logging.getLogger("copernicusmarine")
+
+# attributes that define how the values are stored in the file
+STORAGE_ATTRIBUTES = (
+    "scale_factor",
+    "add_offset",
+    "_FillValue",
+    "missing_value",
+    "units",
+    "calendar",
+)
+
+# HDF5 filter identifiers
+H5Z_FILTER_DEFLATE = 1
+H5Z_FILTER_SHUFFLE = 2
+
+
+def get_streaming_dimension(dataset: xarray.Dataset) -> str | None:
+    """
+    The dimension along which the dataset can be written block by block:
+    the outermost dimension of all the variables that depend on it,
+    usually the time. None if the dataset cannot be streamed.
+    """
+    first_dimensions = Counter(
+        variable.dims[0]
+        for variable in dataset.data_vars.values()
+        if variable.dims
+    )
+    if not first_dimensions:
+        return None
+    dimension = str(first_dimensions.most_common(1)[0][0])
+    if dataset.sizes[dimension] <= 1:
+        return None
+    for variable in dataset.variables.values():
+        if dimension in variable.dims and variable.dims[0] != dimension:
+            return None
+    return dimension
+
+
+def get_block_length(memory_budget: int, bytes_per_index: int) -> int:
+    return max(1, memory_budget // max(bytes_per_index, 1))
+
+
+def get_blocks(
+    dataset: xarray.Dataset,
+    dimension: str,
+    memory_budget: int,
+    bytes_per_index: int | None = None,
+) -> list[slice]:
+    """
+    Split the dimension in blocks that fit in the memory budget.
+    The blocks are aligned on the dask chunks of the dataset
+    so that each chunk is downloaded only once when possible.
+
+    By default, the size of a block is the size of the variables
+    that depend on the dimension.
+    """
+    if bytes_per_index is None:
+        bytes_per_index = sum(
+            variable.dtype.itemsize * variable.size // dataset.sizes[dimension]
+            for variable in dataset.variables.values()
+            if dimension in variable.dims
+        )
+    block_length = get_block_length(memory_budget, bytes_per_index)
+    chunks = dataset.chunks.get(dimension) or (dataset.sizes[dimension],)
+    blocks: list[slice] = []
+    start = 0
+    stop = 0
+    for chunk in chunks:
+        if stop - start + chunk > block_length and stop > start:
+            blocks.append(slice(start, stop))
+            start = stop
+        stop += chunk
+        # chunks bigger than the budget are split
+        while stop - start > block_length:
+            blocks.append(slice(start, start + block_length))
+            start += block_length
+    if stop > start:
+        blocks.append(slice(start, stop))
+    return blocks
+
+
+def _set_time_encoding(
+    dataset: xarray.Dataset, template: xarray.Dataset, dimension: str
+) -> None:
+    """
+    The units of the datetimes are inferred from the values when not set:
+    they are computed from the complete variables so that all the blocks
+    are encoded the same way.
+    """
+    for name, variable in dataset.variables.items():
+        if (
+            dimension not in variable.dims
+            or variable.dtype.kind not in "mM"
+            or "units" in variable.encoding
+        ):
+            continue
+        if variable.chunks is None:
+            encoded_variable = encode_cf_variable(variable, name=name)
+            template[name].encoding.update(
+                {
+                    key: encoded_variable.attrs[key]
+                    for key in ("units", "calendar")
+                    if key in encoded_variable.attrs
+                }
+            )
+        elif variable.dtype.kind == "M":
+            template[name].encoding["units"] = "seconds since 1970-01-01"
+
+
+def _get_chunk_sizes(
+    variable: xarray.Variable, dimension: str, block_length: int
+) -> tuple[int, ...] | None:
+    if variable.chunks is None:
+        return None
+    return tuple(
+        (
+            min(chunks[0], block_length)
+            if variable_dimension == dimension
+            else chunks[0]
+        )
+        for variable_dimension, chunks in zip(variable.dims, variable.chunks)
+    )
+
+
+def get_storage_encoding(file_variable: Any) -> dict[str, Any]:
+    if hasattr(file_variable, "ncattrs"):
+        attributes = {
+            key: file_variable.getncattr(key)
+            for key in file_variable.ncattrs()
+        }
+    else:
+        attributes = dict(file_variable.attrs)
+    return {
+        "dtype": file_variable.dtype,
+        **{
+            key: attributes[key]
+            for key in STORAGE_ATTRIBUTES
+            if key in attributes
+        },
+    }
+
+
+def encode_block_variable(
+    variable: xarray.Variable,
+    name: str,
+    storage_encoding: dict[str, Any],
+    netcdf3_compatible: bool,
+) -> np.ndarray:
+    variable = variable.copy(deep=False)
+    variable.encoding = dict(storage_encoding)
+    if variable.dtype.kind not in "mM":
+        # the attribute would conflict with the encoding of datetimes
+        variable.encoding.pop("calendar", None)
+    encoded_variable = encode_cf_variable(variable, name=name)
+    if netcdf3_compatible:
+        from xarray.backends.netcdf3 import encode_nc3_variable
+
+        encoded_variable = encode_nc3_variable(encoded_variable, name=name)
+    return np.asarray(encoded_variable.values).astype(
+        storage_encoding["dtype"], copy=False
+    )
+
+
+def write_netcdf_by_blocks(
+    dataset: xarray.Dataset,
+    output_path: pathlib.Path,
+    encoding: dict[str, dict[str, Any]] | None,
+    netcdf3_compatible: bool,
+    memory_budget: int,
+) -> bool:
+    """
+    Write the dataset to NetCDF block by block along its outermost
+    dimension, so that only one block is held in memory at a time.
+
+    The file is first created with all the variables and an empty
+    unlimited dimension, then each block is computed, encoded like
+    the variables of the file and appended.
+
+    Returns False if the dataset cannot be written this way.
+    """
+    dimension = get_streaming_dimension(dataset)
+    if dimension is None:
+        return False
+    blocks = get_blocks(dataset, dimension, memory_budget)
+    logger.debug(
+        f"Writing NetCDF in {len(blocks)} blocks along '{dimension}' "
+        f"with a memory budget of {memory_budget} bytes"
+    )
+    block_length = max(block.stop - block.start for block in blocks)
+    template = dataset.isel({dimension: slice(0, 0)})
+    _set_time_encoding(dataset, template, dimension)
+    if encoding is not None and not netcdf3_compatible:
+        # the chunks cannot be guessed from the empty unlimited dimension
+        encoding = deepcopy(encoding)
+        for name, variable_encoding in encoding.items():
+            chunk_sizes = _get_chunk_sizes(
+                dataset[name].variable, dimension, block_length
+            )
+            if chunk_sizes:
+                variable_encoding["chunksizes"] = chunk_sizes
+    template.to_netcdf(
+        output_path,
+        mode="w",
+        encoding=encoding,
+        format="NETCDF3_CLASSIC" if netcdf3_compatible else None,
+        engine="netcdf4" if netcdf3_compatible else "h5netcdf",
+        unlimited_dims=[dimension],
+    )
+    streamed_variable_names = [
+        str(name)
+        for name, variable in dataset.variables.items()
+        if dimension in variable.dims
+    ]
+    if netcdf3_compatible:
+        import netCDF4
+
+        output_file: Any = netCDF4.Dataset(output_path, mode="a")
+        # the values are already encoded
+        output_file.set_auto_maskandscale(False)
+    else:
+        import h5netcdf
+
+        output_file = h5netcdf.File(output_path, mode="a")
+    with output_file:
+        storage_encodings = {
+            name: get_storage_encoding(output_file.variables[name])
+            for name in streamed_variable_names
+        }
+        for block in blocks:
+            logger.debug(f"Writing block {block.start}:{block.stop}")
+            block_dataset = dataset[streamed_variable_names].isel(
+                {dimension: block}
+            )
+            block_dataset = block_dataset.compute()
+            if not netcdf3_compatible:
+                output_file.resize_dimension(dimension, block.stop)
+            for name in streamed_variable_names:
+                output_file.variables[name][
+                    block, ...
+                ] = encode_block_variable(
+                    block_dataset[name].variable,
+                    name,
+                    storage_encodings[name],
+                    netcdf3_compatible,
+                )
+            del block_dataset
+    return True
+
+
+def _shuffle(data: np.ndarray) -> bytes:
+    """
+    Same as the HDF5 shuffle filter: the first bytes of all the values,
+    then the second bytes of all the values, etc.
+    """
+    return (
+        np.ascontiguousarray(data)
+        .view(np.uint8)
+        .reshape(-1, data.dtype.itemsize)
+        .T.tobytes()
+    )
+
+
+def _compress_chunk(
+    data: np.ndarray,
+    chunk_shape: tuple[int, ...],
+    shuffle: bool,
+    compression_level: int,
+) -> bytes:
+    """
+    Apply the filters of the variable to one chunk. Chunks on the edges
+    of the variable are padded: HDF5 always stores complete chunks.
+    """
+    if data.shape != chunk_shape:
+        data = np.pad(
+            data,
+            [
+                (0, chunk_size - size)
+                for size, chunk_size in zip(data.shape, chunk_shape)
+            ],
+        )
+    raw_chunk = _shuffle(data) if shuffle else data.tobytes()
+    return zlib.compress(raw_chunk, compression_level)
+
+
+def _get_deflate_filters(h5_dataset: Any) -> tuple[bool, int] | None:
+    """
+    Whether the values are shuffled and the deflate level, if the only
+    filters of the variable are shuffle followed by deflate.
+    """
+    property_list = h5_dataset.id.get_create_plist()
+    filters = [
+        property_list.get_filter(index)
+        for index in range(property_list.get_nfilters())
+    ]
+    filter_codes = [code for code, *_ in filters]
+    if filter_codes == [H5Z_FILTER_SHUFFLE, H5Z_FILTER_DEFLATE]:
+        return True, filters[1][2][0]
+    if filter_codes == [H5Z_FILTER_DEFLATE]:
+        return False, filters[0][2][0]
+    return None
+
+
+def _iter_chunk_slices(
+    shape: tuple[int, ...], chunk_shape: tuple[int, ...]
+) -> list[tuple[slice, ...]]:
+    return [
+        tuple(
+            slice(start, min(start + chunk_size, size))
+            for start, chunk_size, size in zip(starts, chunk_shape, shape)
+        )
+        for starts in itertools.product(
+            *(
+                range(0, size, chunk_size)
+                for size, chunk_size in zip(shape, chunk_shape)
+            )
+        )
+    ]
+
+
+def write_netcdf_with_parallel_compression(
+    dataset: xarray.Dataset,
+    output_path: pathlib.Path,
+    encoding: dict[str, dict[str, Any]],
+    number_of_workers: int,
+    memory_budget: int,
+) -> None:
+    """
+    Write the dataset to a compressed NetCDF4 file, compressing the
+    chunks of the variables in parallel.
+
+    The file is first created with all the variables, without writing
+    the dask backed ones. Each of them is then computed by blocks of
+    complete HDF5 chunks that fit in the memory budget, the chunks of a
+    block are encoded, shuffled and deflated in worker threads and the
+    compressed chunks are written directly to the file. The filters are
+    the standard HDF5 ones so the file can be read by any NetCDF4 reader.
+    """
+    import h5py
+
+    store = xarray.backends.H5NetCDFStore.open(output_path, mode="w")
+    try:
+        # the dask arrays are only written when the writer is synced
+        dataset.dump_to_store(
+            store,
+            encoding=encoding,
+            unlimited_dims=dataset.encoding.get("unlimited_dims"),
+        )
+        variable_names = [
+            name
+            for name in encoding
+            if dataset[name].chunks is not None and dataset[name].ndim
+        ]
+        storage_encodings = {
+            name: get_storage_encoding(store.ds.variables[name])
+            for name in variable_names
+        }
+    finally:
+        store.close()
+    logger.debug(
+        f"Compressing {len(variable_names)} variables "
+        f"with {number_of_workers} workers"
+    )
+    with h5py.File(output_path, mode="r+") as output_file, ThreadPoolExecutor(
+        max_workers=number_of_workers
+    ) as executor:
+        for name in variable_names:
+            variable = dataset[name].variable
+            h5_dataset = output_file[name]
+            chunk_shape = h5_dataset.chunks
+            filters = _get_deflate_filters(h5_dataset) if chunk_shape else None
+            bytes_per_index = (
+                h5_dataset.dtype.itemsize
+                * variable.size
+                // max(variable.shape[0], 1)
+            )
+            chunk_length = chunk_shape[0] if chunk_shape else 1
+            block_length = chunk_length * max(
+                1, memory_budget // max(bytes_per_index * chunk_length, 1)
+            )
+            for start in range(0, variable.shape[0], block_length):
+                block = slice(start, start + block_length)
+                values = encode_block_variable(
+                    variable[block].compute(),
+                    name,
+                    storage_encodings[name],
+                    False,
+                )
+                if filters is None:
+                    h5_dataset[block, ...] = values
+                    continue
+                shuffle, compression_level = filters
+                chunk_slices = _iter_chunk_slices(values.shape, chunk_shape)
+                compressed_chunks = executor.map(
+                    partial(
+                        _compress_chunk,
+                        chunk_shape=chunk_shape,
+                        shuffle=shuffle,
+                        compression_level=compression_level,
+                    ),
+                    (values[chunk_slice] for chunk_slice in chunk_slices),
+                )
+                for chunk_slice, compressed_chunk in zip(
+                    chunk_slices, compressed_chunks
+                ):
+                    h5_dataset.id.write_direct_chunk(
+                        (chunk_slice[0].start + start,)
+                        + tuple(
+                            dimension_slice.start
+                            for dimension_slice in chunk_slice[1:]
+                        ),
+                        compressed_chunk,
+                    )
+                del values
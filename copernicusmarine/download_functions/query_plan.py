@@ -0,0 +1,357 @@
+import logging
+import math
+
+import numpy as np
+import zarr
+from dask.system import CPU_COUNT
+
+from copernicusmarine.catalogue_parser.models import (
+    CopernicusMarinePart,
+    CopernicusMarineService,
+    CopernicusMarineServiceNames,
+    CopernicusMarineVariable,
+)
+from copernicusmarine.core_functions.models import (
+    QueryPlan,
+    ServiceCost,
+    ServicePlan,
+    ServiceQueryPlan,
+    VariableQueryPlan,
+)
+from copernicusmarine.core_functions.request_structure import SubsetRequest
+from copernicusmarine.core_functions.utils import human_readable_size
+from copernicusmarine.download_functions.chunk_calculator import (
+    get_variable_chunk_indexes,
+    get_variable_chunk_keys,
+)
+
+logger = logging.getLogger("copernicusmarine")
+
+# Requests in flight in the custom store for Zarr Python library v3
+ZARR_V3_MAX_CONCURRENT_REQUESTS = 32
+# Size of the chunks intended by the ARCO producer
+DEFAULT_CHUNK_SIZE = 2_000_000
+EXPLAINED_SERVICE_NAMES = [
+    CopernicusMarineServiceNames.GEOSERIES,
+    CopernicusMarineServiceNames.TIMESERIES,
+]
+# Time to first byte of a request to the Marine Data Store
+DEFAULT_REQUEST_LATENCY_SECONDS = 0.1
+# Download throughput shared by the concurrent requests
+DEFAULT_BANDWIDTH_BYTES_PER_SECOND = 50 * 1024 * 1024
+
+
+def get_request_concurrency(number_of_workers: int | None) -> int:
+    """
+    Number of chunk requests in flight during a subset. With Zarr Python
+    library v2, each dask worker fetches its chunks one after the other.
+    With v3, the custom store fetches the chunks concurrently.
+    """
+    if zarr.__version__.startswith("2"):
+        return number_of_workers or CPU_COUNT
+    return ZARR_V3_MAX_CONCURRENT_REQUESTS
+
+
+def get_compressed_chunk_size(variable: CopernicusMarineVariable) -> int:
+    """
+    Average size of the compressed chunks of the variable according to the
+    catalogue, else the size of the uncompressed chunks.
+    """
+    if variable._chunk_size:
+        return int(variable._chunk_size)
+    if variable._dtype:
+        return np.dtype(variable._dtype).itemsize * math.prod(
+            int(coordinate.chunking_length or 1)
+            for coordinate in variable.coordinates
+        )
+    return DEFAULT_CHUNK_SIZE
+
+
+def _get_requested_variables(
+    service: CopernicusMarineService, subset_request: SubsetRequest
+) -> list[CopernicusMarineVariable]:
+    if not subset_request.variables:
+        return service.variables
+    return [
+        variable
+        for variable in service.variables
+        if variable.short_name in subset_request.variables
+        or variable.standard_name in subset_request.variables
+    ]
+
+
+def _get_number_of_requests(
+    variables: list[CopernicusMarineVariable], number_of_chunks: int
+) -> int:
+    # one request per coordinate array and one for the metadata
+    return (
+        number_of_chunks
+        + len(
+            {
+                coordinate.coordinate_id
+                for variable in variables
+                for coordinate in variable.coordinates
+            }
+        )
+        + 1
+    )
+
+
+def get_service_query_plan(
+    service: CopernicusMarineService,
+    subset_request: SubsetRequest,
+    concurrency: int,
+    include_chunk_keys: bool = True,
+) -> ServiceQueryPlan:
+    axis_coordinate_mapping = service.get_axis_coordinate_id_mapping()
+    variables = _get_requested_variables(service, subset_request)
+    variable_plans = []
+    for variable in variables:
+        if include_chunk_keys:
+            chunk_keys = get_variable_chunk_keys(
+                variable, subset_request, axis_coordinate_mapping
+            )
+            number_of_chunks = len(chunk_keys)
+        else:
+            chunk_keys = []
+            number_of_chunks = math.prod(
+                map(
+                    len,
+                    get_variable_chunk_indexes(
+                        variable, subset_request, axis_coordinate_mapping
+                    ),
+                )
+            )
+        variable_plans.append(
+            VariableQueryPlan(
+                variable_id=variable.short_name,
+                number_of_chunks=number_of_chunks,
+                estimated_compressed_bytes=number_of_chunks
+                * get_compressed_chunk_size(variable),
+                chunk_keys=chunk_keys,
+            )
+        )
+    number_of_chunks = sum(
+        variable_plan.number_of_chunks for variable_plan in variable_plans
+    )
+    number_of_requests = _get_number_of_requests(variables, number_of_chunks)
+    return ServiceQueryPlan(
+        service_name=service.service_name,
+        number_of_chunks=number_of_chunks,
+        number_of_requests=number_of_requests,
+        estimated_compressed_bytes=sum(
+            variable_plan.estimated_compressed_bytes
+            for variable_plan in variable_plans
+        ),
+        number_of_request_waves=math.ceil(
+            number_of_requests / max(concurrency, 1)
+        ),
+        variables=variable_plans,
+    )
+
+
+class ServiceCostModel:
+    """
+    Cost of downloading the chunks of a subset from a service.
+
+    Each wave of concurrent requests waits for the latency of a request
+    and all the bytes share the bandwidth. Subclass it and override
+    ``get_cost`` to compare the services with another model.
+    """
+
+    def __init__(
+        self,
+        request_latency_seconds: float = DEFAULT_REQUEST_LATENCY_SECONDS,
+        bandwidth_bytes_per_second: float = (
+            DEFAULT_BANDWIDTH_BYTES_PER_SECOND
+        ),
+    ):
+        self.request_latency_seconds = request_latency_seconds
+        self.bandwidth_bytes_per_second = bandwidth_bytes_per_second
+
+    def get_cost(
+        self,
+        number_of_requests: int,
+        estimated_compressed_bytes: int,
+        concurrency: int,
+    ) -> ServiceCost:
+        number_of_request_waves = math.ceil(
+            number_of_requests / max(concurrency, 1)
+        )
+        return ServiceCost(
+            estimated_compressed_bytes=estimated_compressed_bytes,
+            number_of_requests=number_of_requests,
+            expected_wall_time_seconds=(
+                number_of_request_waves * self.request_latency_seconds
+                + estimated_compressed_bytes / self.bandwidth_bytes_per_second
+            ),
+        )
+
+
+def _get_mixed_cost(
+    services: list[CopernicusMarineService],
+    service_plans: list[ServiceQueryPlan],
+    variable_services: dict[str, str],
+    cost_model: ServiceCostModel,
+    concurrency: int,
+) -> ServiceCost:
+    number_of_requests = 0
+    estimated_compressed_bytes = 0
+    for service, service_plan in zip(services, service_plans):
+        variable_plans = [
+            variable_plan
+            for variable_plan in service_plan.variables
+            if variable_services[variable_plan.variable_id]
+            == service.service_name
+        ]
+        if not variable_plans:
+            continue
+        number_of_requests += _get_number_of_requests(
+            [
+                variable
+                for variable in service.variables
+                if variable.short_name in variable_services
+                and variable_services[variable.short_name]
+                == service.service_name
+            ],
+            sum(
+                variable_plan.number_of_chunks
+                for variable_plan in variable_plans
+            ),
+        )
+        estimated_compressed_bytes += sum(
+            variable_plan.estimated_compressed_bytes
+            for variable_plan in variable_plans
+        )
+    return cost_model.get_cost(
+        number_of_requests, estimated_compressed_bytes, concurrency
+    )
+
+
+def plan_arco_services(
+    subset_request: SubsetRequest,
+    dataset_part: CopernicusMarinePart,
+    concurrency: int,
+    cost_model: ServiceCostModel | None = None,
+) -> ServicePlan:
+    """
+    Compare the cost of the subset with each ARCO service of the dataset
+    and select the cheapest one. The geoseries service wins the ties and
+    is selected when the dataset has no ARCO service to compare.
+
+    If the cheapest service is not the same for all the variables, e.g.
+    2D and 3D variables chunked differently, the variables are taken
+    from their cheapest service when it is cheaper overall.
+    """
+    cost_model = cost_model or ServiceCostModel()
+    services = [
+        service
+        for service in dataset_part.services
+        if service.service_name in EXPLAINED_SERVICE_NAMES
+    ]
+    service_plans = [
+        get_service_query_plan(
+            service, subset_request, concurrency, include_chunk_keys=False
+        )
+        for service in services
+    ]
+    costs = {
+        service_plan.service_name: cost_model.get_cost(
+            service_plan.number_of_requests,
+            service_plan.estimated_compressed_bytes,
+            concurrency,
+        )
+        for service_plan in service_plans
+    }
+    for service_name, cost in costs.items():
+        logger.debug(f"Cost with {service_name}: {cost}")
+    if not costs:
+        return ServicePlan(
+            selected_service=CopernicusMarineServiceNames.GEOSERIES,
+            costs=costs,
+        )
+    selected_service = min(
+        costs,
+        key=lambda name: (
+            costs[name].expected_wall_time_seconds,
+            name != CopernicusMarineServiceNames.GEOSERIES,
+        ),
+    )
+    service_plan = ServicePlan(selected_service=selected_service, costs=costs)
+
+    variable_services: dict[str, str] = {}
+    variable_costs: dict[str, float] = {}
+    for current_plan in service_plans:
+        for variable_plan in current_plan.variables:
+            variable_cost = cost_model.get_cost(
+                variable_plan.number_of_chunks,
+                variable_plan.estimated_compressed_bytes,
+                concurrency,
+            ).expected_wall_time_seconds
+            if (
+                variable_plan.variable_id not in variable_costs
+                or variable_cost < variable_costs[variable_plan.variable_id]
+            ):
+                variable_services[
+                    variable_plan.variable_id
+                ] = current_plan.service_name
+                variable_costs[variable_plan.variable_id] = variable_cost
+    if len(set(variable_services.values())) > 1:
+        service_plan.mixed_cost = _get_mixed_cost(
+            services,
+            service_plans,
+            variable_services,
+            cost_model,
+            concurrency,
+        )
+        if (
+            service_plan.mixed_cost.expected_wall_time_seconds
+            < costs[selected_service].expected_wall_time_seconds
+        ):
+            service_plan.variable_services = variable_services
+            logger.debug(
+                f"Mixed cost: {service_plan.mixed_cost}, "
+                f"services per variable: {variable_services}"
+            )
+    return service_plan
+
+
+def get_query_plan(
+    subset_request: SubsetRequest,
+    dataset_part: CopernicusMarinePart,
+    selected_service_name: CopernicusMarineServiceNames,
+    concurrency: int,
+    variable_services: dict[str, str] | None = None,
+) -> QueryPlan:
+    """
+    Resolve the Zarr chunks needed by the subset from the chunking metadata
+    of the catalogue, for the service used and for the other ARCO services
+    of the dataset.
+    """
+    services = [
+        service
+        for service in dataset_part.services
+        if service.service_name in EXPLAINED_SERVICE_NAMES
+        or service.service_name == selected_service_name
+    ]
+    query_plan = QueryPlan(
+        selected_service=selected_service_name,
+        concurrency=concurrency,
+        services=[
+            get_service_query_plan(service, subset_request, concurrency)
+            for service in services
+        ],
+        variable_services=variable_services,
+    )
+    for service_plan in query_plan.services:
+        estimated_size = human_readable_size(
+            service_plan.estimated_compressed_bytes / (1024 * 1024)
+        )
+        logger.info(
+            f"Service {service_plan.service_name}: "
+            f"{service_plan.number_of_chunks} chunks, "
+            f"{service_plan.number_of_requests} requests in "
+            f"{service_plan.number_of_request_waves} waves of "
+            f"{concurrency}, about {estimated_size} to download."
+        )
+    return query_plan
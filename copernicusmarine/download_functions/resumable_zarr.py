@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+from typing import Any
+
+import xarray
+
+from copernicusmarine.download_functions.netcdf_streaming import (
+    get_streaming_dimension,
+)
+
+logger = logging.getLogger("copernicusmarine")
+
+STAGING_SUFFIX = ".staging"
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def get_staging_paths(
+    output_path: pathlib.Path,
+) -> tuple[pathlib.Path, pathlib.Path]:
+    """
+    The staging Zarr store and its manifest, next to the output.
+    """
+    staging_path = output_path.with_name(output_path.name + STAGING_SUFFIX)
+    manifest_path = output_path.with_name(
+        output_path.name + STAGING_SUFFIX + MANIFEST_SUFFIX
+    )
+    return staging_path, manifest_path
+
+
+def get_regions(dataset: xarray.Dataset, dimension: str) -> list[slice]:
+    """
+    One region per dask chunk along the dimension, so that each region
+    covers complete chunks of the output store.
+    """
+    regions = []
+    start = 0
+    for chunk in dataset.chunks.get(dimension) or (dataset.sizes[dimension],):
+        regions.append(slice(start, start + chunk))
+        start += chunk
+    return regions
+
+
+def get_dataset_fingerprint(dataset: xarray.Dataset, dimension: str) -> str:
+    """
+    Identify the content of the output: a staging store written for
+    another request or with other chunks cannot be resumed.
+    """
+    description = {
+        "sizes": {str(name): size for name, size in dataset.sizes.items()},
+        "variables": sorted(str(name) for name in dataset.data_vars),
+        "coordinates": {
+            str(name): [
+                str(coordinate.values[0]),
+                str(coordinate.values[-1]),
+            ]
+            for name, coordinate in dataset.coords.items()
+            if coordinate.ndim == 1 and coordinate.size
+        },
+        "dimension": dimension,
+        "chunks": list(dataset.chunks.get(dimension) or ()),
+    }
+    return hashlib.sha256(
+        json.dumps(description, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def _read_manifest(manifest_path: pathlib.Path) -> dict[str, Any] | None:
+    try:
+        with open(manifest_path) as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(
+    manifest_path: pathlib.Path, manifest: dict[str, Any]
+) -> None:
+    temporary_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(temporary_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(temporary_path, manifest_path)
+
+
+def write_zarr_resumably(
+    dataset: xarray.Dataset,
+    output_path: pathlib.Path,
+    zarr_format: int | None,
+) -> None:
+    """
+    Write the dataset to a persistent staging Zarr store, region by region
+    along its outermost dimension. The completed regions are recorded in
+    a manifest so that, if the download is interrupted, running the same
+    request again only downloads the missing regions.
+
+    Once all the regions are written, the staging store is renamed to the
+    output path and the manifest is deleted.
+    """
+    if not dataset.chunks:
+        dataset = dataset.chunk()
+    dimension = get_streaming_dimension(dataset) or str(
+        next(iter(dataset.sizes))
+    )
+    staging_path, manifest_path = get_staging_paths(output_path)
+    fingerprint = get_dataset_fingerprint(dataset, dimension)
+
+    manifest = _read_manifest(manifest_path)
+    if (
+        manifest is None
+        or manifest.get("fingerprint") != fingerprint
+        or not staging_path.is_dir()
+    ):
+        if manifest is not None:
+            logger.info(
+                f"The staging store {staging_path} does not match "
+                "the request. Starting the download from the beginning."
+            )
+        shutil.rmtree(staging_path, ignore_errors=True)
+        # only the metadata and the variables not backed by dask
+        dataset.to_zarr(
+            str(staging_path),
+            mode="w",
+            compute=False,
+            zarr_format=zarr_format,
+        )
+        manifest = {
+            "fingerprint": fingerprint,
+            "dimension": dimension,
+            "completed_regions": [],
+        }
+        _write_manifest(manifest_path, manifest)
+    completed_regions = {
+        (start, stop) for start, stop in manifest["completed_regions"]
+    }
+    regions = get_regions(dataset, dimension)
+    if completed_regions:
+        logger.info(
+            f"Resuming download: {len(completed_regions)} of "
+            f"{len(regions)} regions already downloaded."
+        )
+    region_dataset = dataset.drop_vars(
+        [
+            name
+            for name, variable in dataset.variables.items()
+            if dimension not in variable.dims
+        ]
+    )
+    for region in regions:
+        if (region.start, region.stop) in completed_regions:
+            continue
+        logger.debug(f"Writing region {dimension}={region}")
+        region_dataset.isel({dimension: region}).to_zarr(
+            str(staging_path),
+            mode="r+",
+            region={dimension: region},
+            zarr_format=zarr_format,
+        )
+        manifest["completed_regions"].append([region.start, region.stop])
+        _write_manifest(manifest_path, manifest)
+
+    if output_path.exists():
+        shutil.rmtree(output_path)
+    staging_path.rename(output_path)
+    manifest_path.unlink()
@@ -47,81 +47,198 @@ NETCDF_CONVENTION_COORDINATE_ATTRIBUTES = [
 ]
 
 
-@typing.no_type_check
-def _choose_extreme_point(
-    dataset: xarray.Dataset,
-    coord_label: str,
-    actual_extreme: float | datetime,
-    method: Literal["pad", "backfill", "nearest"],
-) -> float | datetime:
-    if (
-        coord_label == "time"
-        and actual_extreme
-        >= timestamp_or_datestring_to_datetime(
-            dataset[coord_label].values.min()
-        ).replace(tzinfo=None)
-        and actual_extreme
-        <= timestamp_or_datestring_to_datetime(
-            dataset[coord_label].values.max()
-        ).replace(tzinfo=None)
-    ):
-        external_point = dataset.sel(
-            {coord_label: actual_extreme}, method=method
-        )[coord_label].values
-        external_point = timestamp_or_datestring_to_datetime(
-            external_point
-        ).replace(tzinfo=None)
-    elif (
-        coord_label != "time"
-        and actual_extreme > dataset[coord_label].min()
-        and method == "nearest"
-    ):
-        external_point = dataset.sel(
-            {coord_label: actual_extreme}, method=method
-        )[coord_label].values
-    elif (
-        coord_label != "time"
-        and actual_extreme > dataset[coord_label].min()
-        and actual_extreme < dataset[coord_label].max()
+SelectionMethod = Literal["pad", "backfill", "nearest"]
+
+
+def _get_coordinate_value(values: numpy.ndarray, value: Any) -> Any:
+    """
+    The requested value in the type of the values of the coordinate,
+    e.g. a datetime as a numpy datetime64.
+    """
+    if numpy.issubdtype(values.dtype, numpy.datetime64) and isinstance(
+        value, datetime
     ):
-        external_point = dataset.sel(
-            {coord_label: actual_extreme}, method=method
-        )[coord_label].values
+        return numpy.datetime64(value.replace(tzinfo=None)).astype(
+            values.dtype
+        )
+    return value
+
+
+def _is_decreasing(values: numpy.ndarray) -> bool:
+    return len(values) > 1 and values[0] > values[1]
+
+
+def _get_pad_index(
+    values: numpy.ndarray, value: Any, decreasing: bool
+) -> int | None:
+    """
+    Index of the value, else of the previous one in the coordinate.
+    """
+    if decreasing:
+        index = (
+            len(values)
+            - 1
+            - int(numpy.searchsorted(values[::-1], value, side="left"))
+        )
     else:
-        external_point = actual_extreme
-    return external_point
+        index = int(numpy.searchsorted(values, value, side="right")) - 1
+    return index if index >= 0 else None
 
 
-def _enlarge_selection(
-    dataset: xarray.Dataset,
-    coord_label: str,
-    coord_selection: slice,
+def _get_backfill_index(
+    values: numpy.ndarray, value: Any, decreasing: bool
+) -> int | None:
+    """
+    Index of the value, else of the next one in the coordinate.
+    """
+    if decreasing:
+        index = len(values) - int(
+            numpy.searchsorted(values[::-1], value, side="right")
+        )
+    else:
+        index = int(numpy.searchsorted(values, value, side="left"))
+    return index if index < len(values) else None
+
+
+def _get_nearest_index(
+    values: numpy.ndarray, value: Any, decreasing: bool
+) -> int:
+    """
+    Index of the closest value of the coordinate, the largest value
+    if two are as close.
+    """
+    pad_index = _get_pad_index(values, value, decreasing)
+    backfill_index = _get_backfill_index(values, value, decreasing)
+    if pad_index is None:
+        return typing.cast(int, backfill_index)
+    if backfill_index is None:
+        return pad_index
+    pad_distance = abs(values[pad_index] - value)
+    backfill_distance = abs(values[backfill_index] - value)
+    if pad_distance < backfill_distance or (
+        decreasing and pad_distance == backfill_distance
+    ):
+        return pad_index
+    return backfill_index
+
+
+def _get_index_slice(
+    values: numpy.ndarray, start: Any, stop: Any, decreasing: bool
 ) -> slice:
-    external_minimum = _choose_extreme_point(
-        dataset, coord_label, coord_selection.start, "pad"
-    )
+    """
+    Indexes of the values between start and stop included,
+    in the order of the coordinate.
+    """
+    if decreasing:
+        reversed_values = values[::-1]
+        start_index = (
+            0
+            if start is None
+            else len(values)
+            - int(numpy.searchsorted(reversed_values, start, side="right"))
+        )
+        stop_index = (
+            len(values)
+            if stop is None
+            else len(values)
+            - int(numpy.searchsorted(reversed_values, stop, side="left"))
+        )
+    else:
+        start_index = (
+            0
+            if start is None
+            else int(numpy.searchsorted(values, start, side="left"))
+        )
+        stop_index = (
+            len(values)
+            if stop is None
+            else int(numpy.searchsorted(values, stop, side="right"))
+        )
+    return slice(start_index, max(start_index, stop_index))
 
-    external_maximum = _choose_extreme_point(
-        dataset, coord_label, coord_selection.stop, "backfill"
-    )
 
-    return slice(external_minimum, external_maximum)
+def _choose_extreme_point(
+    values: numpy.ndarray,
+    actual_extreme: Any,
+    method: SelectionMethod,
+) -> Any:
+    """
+    Replace a bound of the selection by a value of the coordinate:
+    the previous one (pad), the next one (backfill) or the closest one.
+    The bound is kept if it is not within the coordinate.
+    """
+    if actual_extreme is None or not len(values):
+        return actual_extreme
+    decreasing = _is_decreasing(values)
+    minimum_value = values.min()
+    maximum_value = values.max()
+    if numpy.issubdtype(values.dtype, numpy.datetime64):
+        is_replaced = minimum_value <= actual_extreme <= maximum_value
+    elif method == "nearest":
+        is_replaced = actual_extreme > minimum_value
+    else:
+        is_replaced = minimum_value < actual_extreme < maximum_value
+    if not is_replaced:
+        return actual_extreme
+    if method == "pad":
+        index = _get_pad_index(values, actual_extreme, decreasing)
+    elif method == "backfill":
+        index = _get_backfill_index(values, actual_extreme, decreasing)
+    else:
+        index = _get_nearest_index(values, actual_extreme, decreasing)
+    return actual_extreme if index is None else values[index]
 
 
-def _nearest_selection(
-    dataset: xarray.Dataset,
-    coord_label: str,
-    coord_selection: slice,
+def get_selection_indexes(
+    values: numpy.ndarray,
+    coord_selection: Any,
+    coordinates_selection_method: CoordinatesSelectionMethod,
 ) -> slice:
-    external_minimum = _choose_extreme_point(
-        dataset, coord_label, coord_selection.start, "nearest"
-    )
+    """
+    Resolve the selection of a coordinate into a slice of indexes.
 
-    external_maximum = _choose_extreme_point(
-        dataset, coord_label, coord_selection.stop, "nearest"
-    )
+    The values of the coordinate are sorted, increasing or decreasing.
+    If the selection is empty, or for a single value, the closest value
+    to the start of the selection is selected.
+    """
+    decreasing = _is_decreasing(values)
+    if isinstance(coord_selection, slice):
+        start = _get_coordinate_value(values, coord_selection.start)
+        stop = _get_coordinate_value(values, coord_selection.stop)
+        if (
+            decreasing
+            and start is not None
+            and stop is not None
+            and start < stop
+        ):
+            start, stop = stop, start
+        if stop is not None and coordinates_selection_method == "outside":
+            start = _choose_extreme_point(values, start, "pad")
+            stop = _choose_extreme_point(values, stop, "backfill")
+        elif stop is not None and coordinates_selection_method == "nearest":
+            start = _choose_extreme_point(values, start, "nearest")
+            stop = _choose_extreme_point(values, stop, "nearest")
+        index_slice = _get_index_slice(values, start, stop, decreasing)
+        if index_slice.stop > index_slice.start:
+            return index_slice
+        target = start if start is not None else stop
+    else:
+        target = _get_coordinate_value(values, coord_selection)
+    nearest_value = values[_get_nearest_index(values, target, decreasing)]
+    return _get_index_slice(values, nearest_value, nearest_value, decreasing)
 
-    return slice(external_minimum, external_maximum)
+
+def _get_index_ranges(positions: numpy.ndarray) -> list[slice]:
+    """
+    The positions as ranges of consecutive indexes, e.g. on either side
+    of the bounds of a longitude coordinate.
+    """
+    breaks = numpy.flatnonzero(numpy.diff(positions) != 1) + 1
+    return [
+        slice(int(run[0]), int(run[-1]) + 1)
+        for run in numpy.split(positions, breaks)
+        if len(run)
+    ]
 
 
 def _dataset_custom_sel(
@@ -131,62 +248,15 @@ def _dataset_custom_sel(
     coordinates_selection_method: CoordinatesSelectionMethod,
 ) -> xarray.Dataset:
     if coordinate_label in dataset.sizes:
-        if isinstance(coord_selection, slice):
-            if (
-                len(dataset[coordinate_label].values) > 1
-                and (
-                    dataset[coordinate_label].values[0]
-                    > dataset[coordinate_label].values[1]
-                )
-                and coord_selection.start < coord_selection.stop
-            ):
-                coord_selection = slice(
-                    coord_selection.stop, coord_selection.start
-                )
-        if coordinates_selection_method == "outside":
-            if (
-                isinstance(coord_selection, slice)
-                and coord_selection.stop is not None
-            ):
-                coord_selection = _enlarge_selection(
-                    dataset, coordinate_label, coord_selection
-                )
-        if coordinates_selection_method == "nearest":
-            if (
-                isinstance(coord_selection, slice)
-                and coord_selection.stop is not None
-            ):
-                coord_selection = _nearest_selection(
-                    dataset, coordinate_label, coord_selection
+        return dataset.isel(
+            {
+                coordinate_label: get_selection_indexes(
+                    dataset[coordinate_label].values,
+                    coord_selection,
+                    coordinates_selection_method,
                 )
-        if isinstance(coord_selection, slice):
-            tmp_dataset = dataset.sel(
-                {coordinate_label: coord_selection}, method=None
-            )
-        else:
-            tmp_dataset = dataset.sel(
-                {coordinate_label: coord_selection}, method="nearest"
-            )
-        if tmp_dataset.coords[coordinate_label].size == 0 or (
-            coordinate_label not in tmp_dataset.sizes
-        ):
-            target = (
-                coord_selection.start
-                if isinstance(coord_selection, slice)
-                else coord_selection
-            )
-            nearest_neighbour_value = dataset.sel(
-                {coordinate_label: target}, method="nearest"
-            )[coordinate_label].values
-            dataset = dataset.sel(
-                {
-                    coordinate_label: slice(
-                        nearest_neighbour_value, nearest_neighbour_value
-                    )
-                }
-            )
-        else:
-            dataset = tmp_dataset
+            }
+        )
     return dataset
 
 
@@ -210,68 +280,67 @@ def get_size_of_coordinate_subset(
         )
 
 
-def _shift_longitude_dimension(
-    dataset: xarray.Dataset,
+def _get_longitude_window(
+    values: numpy.ndarray,
     minimum_longitude_modulus: float,
-    coordinate_id: str,
     coordinates_selection_method: CoordinatesSelectionMethod,
-):
+) -> float:
+    """
+    Degrees needed to move the longitudes so that the selection starting
+    at the minimum longitude does not cross the bounds of the coordinate.
+    """
     if coordinates_selection_method == "outside":
         minimum_longitude_modulus = _choose_extreme_point(
-            dataset,
-            coordinate_id,
-            minimum_longitude_modulus,
-            "pad",
-        )  # type: ignore
+            values, minimum_longitude_modulus, "pad"
+        )
     if coordinates_selection_method == "nearest":
         minimum_longitude_modulus = _choose_extreme_point(
-            dataset,
-            coordinate_id,
-            minimum_longitude_modulus,
-            "nearest",
-        )  # type: ignore
-    window = (
-        minimum_longitude_modulus + 180
-    )  # compute the degrees needed to move the dataset
-    if coordinate_id in dataset.sizes:
-        attrs = dataset[coordinate_id].attrs
-        if "valid_min" in attrs:
-            attrs["valid_min"] += window
-        if "valid_max" in attrs:
-            attrs["valid_max"] += window
-        dataset = dataset.assign_coords(
-            {
-                coordinate_id: (
-                    (dataset[coordinate_id] + (180 - window)) % 360
-                )
-                - (180 - window)
-            }
-        ).sortby(coordinate_id)
-        dataset[coordinate_id].attrs = attrs
-    return dataset
+            values, minimum_longitude_modulus, "nearest"
+        )
+    return minimum_longitude_modulus + 180
 
 
-def _y_axis_subset(
+def _shift_longitude_values(longitudes: Any, window: float) -> Any:
+    return ((longitudes + (180 - window)) % 360) - (180 - window)
+
+
+def _shift_longitude_dimension(
     dataset: xarray.Dataset,
-    y_parameters: YParameters,
-    coordinates_selection_method: CoordinatesSelectionMethod,
+    window: float,
+    coordinate_id: str,
 ) -> xarray.Dataset:
+    """
+    Move the longitudes of the already selected dataset by the window.
+    The selection keeps the shifted longitudes sorted.
+    """
+    attrs = dataset[coordinate_id].attrs
+    if "valid_min" in attrs:
+        attrs["valid_min"] += window
+    if "valid_max" in attrs:
+        attrs["valid_max"] += window
+    dataset = dataset.assign_coords(
+        {
+            coordinate_id: _shift_longitude_values(
+                dataset[coordinate_id], window
+            )
+        }
+    )
+    dataset[coordinate_id].attrs = attrs
+    return dataset
+
+
+def _y_axis_selection(
+    y_parameters: YParameters,
+) -> float | slice | None:
     minimum_y = y_parameters.minimum_y
     maximum_y = y_parameters.maximum_y
     if minimum_y is not None or maximum_y is not None:
-        y_selection = (
+        return (
             minimum_y
             if minimum_y == maximum_y
             else slice(minimum_y, maximum_y)
         )
-        return _dataset_custom_sel(
-            dataset,
-            y_parameters.coordinate_id,
-            y_selection,
-            coordinates_selection_method,
-        )
-
-    return dataset
+    return None
 
 
 def x_axis_selection(
@@ -307,29 +376,55 @@ def x_axis_selection(
     return None, shift_window
 
 
-def _x_axis_subset(
+def _get_x_axis_ranges(
     dataset: xarray.Dataset,
     longitude_parameters: XParameters,
     coordinates_selection_method: CoordinatesSelectionMethod,
-) -> xarray.Dataset:
+) -> tuple[list[slice] | None, float | None]:
+    """
+    Ranges of indexes of the selected longitudes and, if the selection
+    crosses the bounds of the coordinate, the window to shift the
+    longitudes by. The selection is then made of the ranges on either
+    side of the bounds, in the order of the shifted longitudes.
+    """
+    coordinate_id = longitude_parameters.coordinate_id
     x_selection, shift_window = x_axis_selection(longitude_parameters)
-    if shift_window and isinstance(x_selection, slice):
-        dataset = _shift_longitude_dimension(
-            dataset,
-            x_selection.start,
-            longitude_parameters.coordinate_id,
-            coordinates_selection_method,
-        )
+    if x_selection is None or coordinate_id not in dataset.sizes:
+        return None, None
+    values = dataset[coordinate_id].values
+    if not (shift_window and isinstance(x_selection, slice)):
+        return [
+            get_selection_indexes(
+                values, x_selection, coordinates_selection_method
+            )
+        ], None
+    window = _get_longitude_window(
+        values, x_selection.start, coordinates_selection_method
+    )
+    shifted_values = _shift_longitude_values(values, window)
+    order = numpy.argsort(shifted_values, kind="stable")
+    selection_indexes = get_selection_indexes(
+        shifted_values[order], x_selection, coordinates_selection_method
+    )
+    return _get_index_ranges(order[selection_indexes]), window
 
-    if x_selection is not None:
 
-        return _dataset_custom_sel(
-            dataset,
-            longitude_parameters.coordinate_id,
-            x_selection,
-            coordinates_selection_method,
-        )
-    return dataset
+def _concatenate_ranges(
+    dataset: xarray.Dataset, dimension: str, ranges: list[slice]
+) -> xarray.Dataset:
+    """
+    Select each range of the dimension on its own and put them end to end,
+    so that only the chunks of the ranges are in the dask graph.
+    """
+    return xarray.concat(
+        [dataset.isel({dimension: index_range}) for index_range in ranges],
+        dim=dimension,
+        data_vars="minimal",
+        coords="minimal",
+        compat="override",
+        join="override",
+        combine_attrs="override",
+    )
 
 
 def t_axis_selection(
@@ -355,81 +450,83 @@ def t_axis_selection(
     return None
 
 
-def _temporal_subset(
-    dataset: xarray.Dataset,
-    temporal_parameters: TemporalParameters,
-    coordinates_selection_method: CoordinatesSelectionMethod,
-) -> xarray.Dataset:
-    temporal_selection = t_axis_selection(temporal_parameters)
-    if temporal_selection is not None:
-        dataset = _dataset_custom_sel(
-            dataset,
-            "time",
-            temporal_selection,
-            coordinates_selection_method,
-        )
+def _convert_elevation_to_depth(dataset: xarray.Dataset) -> xarray.Dataset:
+    """
+    The elevation of the already selected dataset as a depth.
+    The selection reverses the order of the elevations.
+    """
+    attrs = dataset["elevation"].attrs
+    dataset["elevation"] = dataset.elevation * (-1)
+    attrs["positive"] = "down"
+    attrs["standard_name"] = "depth"
+    attrs["long_name"] = "Depth"
+    attrs["units"] = "m"
+    dataset = dataset.rename({"elevation": "depth"})
+    dataset.depth.attrs = attrs
     return dataset
 
 
-def _depth_subset(
+def _update_elevation_attributes(dataset: xarray.Dataset) -> xarray.Dataset:
+    if "elevation" in dataset.sizes:
+        attrs = dataset["elevation"].attrs
+        attrs["positive"] = "up"
+        attrs["standard_name"] = "elevation"
+        attrs["long_name"] = "Elevation"
+        attrs["units"] = "m"
+        dataset["elevation"].attrs = attrs
+    return dataset
+
+
+def _get_depth_indexer(
     dataset: xarray.Dataset,
     depth_parameters: DepthParameters,
     coordinates_selection_method: CoordinatesSelectionMethod,
-) -> xarray.Dataset:
-    def convert_elevation_to_depth(dataset: xarray.Dataset):
-        if "elevation" in dataset.sizes:
-            attrs = dataset["elevation"].attrs
-            dataset = dataset.reindex(elevation=dataset.elevation[::-1])
-            dataset["elevation"] = dataset.elevation * (-1)
-            attrs["positive"] = "down"
-            attrs["standard_name"] = "depth"
-            attrs["long_name"] = "Depth"
-            attrs["units"] = "m"
-            dataset = dataset.rename({"elevation": "depth"})
-            dataset.depth.attrs = attrs
-        return dataset
-
-    def update_elevation_attributes(dataset: xarray.Dataset):
-        if "elevation" in dataset.sizes:
-            attrs = dataset["elevation"].attrs
-            attrs["positive"] = "up"
-            attrs["standard_name"] = "elevation"
-            attrs["long_name"] = "Elevation"
-            attrs["units"] = "m"
-            dataset["elevation"].attrs = attrs
-        return dataset
-
-    if depth_parameters.vertical_axis == "depth":
-        dataset = convert_elevation_to_depth(dataset)
-    else:
-        dataset = update_elevation_attributes(dataset)
+    convert_elevation_to_depth: bool,
+) -> tuple[str, slice] | None:
     minimum_depth = depth_parameters.minimum_depth
     maximum_depth = depth_parameters.maximum_depth
-    if minimum_depth is not None or maximum_depth is not None:
-        coords = (
-            dataset.coords if isinstance(dataset, xarray.Dataset) else dataset
-        )
-        if "elevation" in coords:
-            minimum_depth = (
-                minimum_depth * -1.0 if minimum_depth is not None else None
-            )
-            maximum_depth = (
-                maximum_depth * -1.0 if maximum_depth is not None else None
-            )
-            minimum_depth, maximum_depth = maximum_depth, minimum_depth
-
+    if convert_elevation_to_depth:
+        elevations = dataset["elevation"].values
+        number_of_values = len(elevations)
+        if minimum_depth is None and maximum_depth is None:
+            return "elevation", slice(None, None, -1)
         depth_selection = (
             minimum_depth
             if minimum_depth == maximum_depth
             else slice(minimum_depth, maximum_depth)
         )
-        dataset = _dataset_custom_sel(
-            dataset,
-            depth_parameters.vertical_axis,
+        selection_indexes = get_selection_indexes(
+            elevations[::-1] * (-1),
             depth_selection,
             coordinates_selection_method,
         )
-    return dataset
+        # the same elevations in the order of the dataset
+        stop = number_of_values - 1 - selection_indexes.stop
+        return "elevation", slice(
+            number_of_values - 1 - selection_indexes.start,
+            stop if stop >= 0 else None,
+            -1,
+        )
+    if minimum_depth is None and maximum_depth is None:
+        return None
+    coordinate_label = depth_parameters.vertical_axis
+    if coordinate_label not in dataset.sizes:
+        return None
+    if coordinate_label == "elevation":
+        minimum_depth, maximum_depth = (
+            maximum_depth * -1.0 if maximum_depth is not None else None,
+            minimum_depth * -1.0 if minimum_depth is not None else None,
+        )
+    depth_selection = (
+        minimum_depth
+        if minimum_depth == maximum_depth
+        else slice(minimum_depth, maximum_depth)
+    )
+    return coordinate_label, get_selection_indexes(
+        dataset[coordinate_label].values,
+        depth_selection,
+        coordinates_selection_method,
+    )
 
 
 def _get_variable_name_from_standard_name(
@@ -565,27 +662,64 @@ def subset(
     depth_parameters: DepthParameters,
     coordinates_selection_method: CoordinatesSelectionMethod,
 ) -> xarray.Dataset:
+    """
+    Resolve the selection of each coordinate into indexes, from the
+    values of the coordinate loaded once, and select them all at once.
+    """
     dataset = _variables_subset(dataset, variables)
-    dataset = _y_axis_subset(
-        dataset,
-        geographical_parameters.y_axis_parameters,
-        coordinates_selection_method,
-    )
-    dataset = _x_axis_subset(
-        dataset,
-        geographical_parameters.x_axis_parameters,
-        coordinates_selection_method,
-    )
+    indexers: dict[str, slice] = {}
+
+    y_parameters = geographical_parameters.y_axis_parameters
+    y_selection = _y_axis_selection(y_parameters)
+    if y_selection is not None and y_parameters.coordinate_id in dataset.sizes:
+        indexers[y_parameters.coordinate_id] = get_selection_indexes(
+            dataset[y_parameters.coordinate_id].values,
+            y_selection,
+            coordinates_selection_method,
+        )
 
-    dataset = _temporal_subset(
-        dataset, temporal_parameters, coordinates_selection_method
+    x_parameters = geographical_parameters.x_axis_parameters
+    x_ranges, longitude_window = _get_x_axis_ranges(
+        dataset, x_parameters, coordinates_selection_method
     )
+    if x_ranges and len(x_ranges) == 1:
+        indexers[x_parameters.coordinate_id] = x_ranges[0]
+
+    temporal_selection = t_axis_selection(temporal_parameters)
+    if temporal_selection is not None and "time" in dataset.sizes:
+        indexers["time"] = get_selection_indexes(
+            dataset["time"].values,
+            temporal_selection,
+            coordinates_selection_method,
+        )
 
-    dataset = _depth_subset(
+    convert_elevation_to_depth = (
+        depth_parameters.vertical_axis == "depth"
+        and "elevation" in dataset.sizes
+    )
+    if depth_parameters.vertical_axis != "depth":
+        dataset = _update_elevation_attributes(dataset)
+    depth_indexer = _get_depth_indexer(
         dataset,
         depth_parameters,
         coordinates_selection_method,
+        convert_elevation_to_depth,
     )
+    if depth_indexer is not None:
+        indexers[depth_indexer[0]] = depth_indexer[1]
+
+    if indexers:
+        dataset = dataset.isel(indexers)
+    if x_ranges and len(x_ranges) > 1:
+        dataset = _concatenate_ranges(
+            dataset, x_parameters.coordinate_id, x_ranges
+        )
+    if longitude_window is not None:
+        dataset = _shift_longitude_dimension(
+            dataset, longitude_window, x_parameters.coordinate_id
+        )
+    if convert_elevation_to_depth:
+        dataset = _convert_elevation_to_depth(dataset)
 
     dataset = _update_dataset_coordinate_attributes(
         dataset,
@@ -419,7 +419,7 @@ def get_approximation_size_data_downloaded(
     for variable_name in temp_dataset.data_vars:
         download_estimated_size += (
             dataset_chunking.get_number_values_variable(str(variable_name))
-            * temp_dataset[list(temp_dataset.data_vars)[0]].dtype.itemsize
+            * temp_dataset[variable_name].dtype.itemsize
             / 1048e3
         )
 
@@ -1,4 +1,5 @@
 import pathlib
+from collections.abc import Iterator
 from datetime import datetime
 
 import pandas as pd
@@ -14,6 +15,7 @@ from copernicusmarine.core_functions.models import (
     VerticalAxis,
 )
 from copernicusmarine.core_functions.read_dataframe import (
+    iter_dataframe_function,
     read_dataframe_function,
 )
 from copernicusmarine.core_functions.request_structure import (
@@ -54,8 +56,9 @@ def read_dataframe(
     raise_if_updating: bool = False,
     disable_progress_bar: bool = False,
     platform_ids: list[str] | None = None,
+    by_blocks: bool = False,
     staging: bool = False,
-) -> pd.DataFrame:
+) -> pd.DataFrame | Iterator[pd.DataFrame]:
     """
     Immediately loads a Pandas DataFrame into memory from a specified dataset.
 
@@ -114,11 +117,13 @@ def read_dataframe(
         Flag to hide progress bar.
     platform_ids : list[str], optional
         List of platform IDs to extract. Only available for platform chunked datasets.
+    by_blocks : bool, optional
+        If set, returns an iterator over DataFrames of consecutive blocks of rows instead of a single DataFrame. Only one block is loaded into memory at a time. Sparse datasets are returned in one block.
 
     Returns
     -------
-    pandas.DataFrame
-        A DataFrame containing the loaded Copernicus Marine data.
+    pandas.DataFrame | Iterator[pandas.DataFrame]
+        A DataFrame containing the loaded Copernicus Marine data, or an iterator over the blocks of the DataFrame if ``by_blocks`` is set.
     """  # noqa
 
     if variables is not None:
@@ -157,6 +162,10 @@ def read_dataframe(
         platform_ids=platform_ids,
     )
 
+    if by_blocks:
+        return iter_dataframe_function(
+            subset_request=subset_request,
+        )
     return read_dataframe_function(
         subset_request=subset_request,
     )
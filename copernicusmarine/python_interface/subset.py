@@ -14,6 +14,7 @@ from copernicusmarine.core_functions.models import (
     DEFAULT_COORDINATES_SELECTION_METHOD,
     DEFAULT_VERTICAL_AXIS,
     CoordinatesSelectionMethod,
+    DaskScheduler,
     FileFormat,
     ResponseSubset,
     VerticalAxis,
@@ -62,6 +63,7 @@ def subset(
     overwrite: bool = False,
     skip_existing: bool = False,
     dry_run: bool = False,
+    explain: bool = False,
     disable_progress_bar: bool = False,
     staging: bool = False,
     netcdf_compression_level: int = 0,
@@ -69,6 +71,11 @@ def subset(
     chunk_size_limit: int = -1,
     raise_if_updating: bool = False,
     platform_ids: list[str] | None = None,
+    dask_scheduler: DaskScheduler | None = None,
+    dask_number_of_workers: int | None = None,
+    dask_memory_limit: str | None = None,
+    resumable: bool = False,
+    append: bool = False,
 ) -> ResponseSubset:
     """
     Extract a subset of data from a specified dataset using given parameters.
@@ -124,7 +131,7 @@ def subset(
     output_filename : str, optional
         Save the downloaded data with the given file name (under the output directory). Extension is optional and will be added if not set. Extension takes priority over the file format option if both are set.
     file_format : str, optional
-        Format of the downloaded dataset. If not set or set to ``None``, defaults to NetCDF '.nc' for gridded datasets and to CSV '.csv' for sparse datasets. Output filename extension takes priority over this option if both are set. For gridded datasets, the following formats are available: netcdf, zarr, csv. For sparse datasets, the following formats are available: csv, netcdf, parquet.
+        Format of the downloaded dataset. If not set or set to ``None``, defaults to NetCDF '.nc' for gridded datasets and to CSV '.csv' for sparse datasets. Output filename extension takes priority over this option if both are set. For gridded datasets, the following formats are available: netcdf, zarr, csv, parquet. For sparse datasets, the following formats are available: csv, netcdf, parquet.
     overwrite : bool, optional
         If specified and if the file already exists on destination, then it will be overwritten. By default, the toolbox creates a new file with a new index (eg 'filename_(1).nc').
         Mutually exclusive with ``skip_existing``.
@@ -139,6 +146,8 @@ def subset(
         Option to pass a complete MOTU API request as a string. Caution, user has to replace double quotes " with single quotes ' in the request.
     dry_run : bool, optional
         If True, runs query without downloading data.
+    explain : bool, optional
+        If True, runs query without downloading data and returns the plan of the query for gridded datasets: the keys of the Zarr chunks needed per variable, the number of requests, the estimated compressed size and the number of waves of concurrent requests, for each ARCO service of the dataset.
     netcdf_compression_level : int, optional
         Specify a compression level to apply on the NetCDF output file. A value of 0 means no compression, and 9 is the highest level of compression available.
     netcdf3_compatible : bool, optional
@@ -149,6 +158,17 @@ def subset(
         If set, raises a :class:`copernicusmarine.DatasetUpdating` error if the dataset is being updated and the subset interval requested overpasses the updating start date of the dataset. Otherwise, a simple warning is displayed.
     platform_ids : list[str], optional
         List of platform IDs to extract. Only available for platform chunked datasets.
+    dask_scheduler : str, optional
+        Dask scheduler used to compute gridded subsets: 'threads' for a pool of threads, 'processes' for a pool of processes or 'distributed' for a local cluster of the ``distributed`` library. If not set, the default scheduler of dask is used.
+    dask_number_of_workers : int, optional
+        Number of threads, processes or workers of the dask scheduler. Default is the number of CPUs. Only used with ``dask_scheduler``.
+    dask_memory_limit : str, optional
+        Memory limit of each worker of the local distributed cluster, e.g. '4GB'. Only used with the 'distributed' dask scheduler.
+    resumable : bool, optional
+        If set, Zarr subsets are written to a staging store next to the output file, along with the list of the parts already downloaded. If the download is interrupted, running the same request again only downloads the missing parts. Only for the Zarr format.
+    append : bool, optional
+        If the output file already exists, only the time steps after its last one are downloaded and appended to it in place. The grid, the variables and the encoding of the file must match the request. Requires an output filename in NetCDF or Zarr format.
+        Mutually exclusive with ``overwrite`` and ``skip_existing``.
 
     Returns
     -------
@@ -158,6 +178,11 @@ def subset(
     if overwrite:
         if skip_existing:
             raise MutuallyExclusiveArguments("overwrite", "skip_existing")
+    if append:
+        if overwrite:
+            raise MutuallyExclusiveArguments("append", "overwrite")
+        if skip_existing:
+            raise MutuallyExclusiveArguments("append", "skip_existing")
 
     if variables is not None:
         _check_type(variables, list, "variables")
@@ -199,6 +224,7 @@ def subset(
         overwrite=overwrite,
         skip_existing=skip_existing,
         dry_run=dry_run,
+        explain=explain,
         disable_progress_bar=disable_progress_bar,
         staging=staging,
         netcdf_compression_level=netcdf_compression_level,
@@ -206,6 +232,11 @@ def subset(
         chunk_size_limit=chunk_size_limit,
         raise_if_updating=raise_if_updating,
         platform_ids=platform_ids,
+        dask_scheduler=dask_scheduler,
+        dask_number_of_workers=dask_number_of_workers,
+        dask_memory_limit=dask_memory_limit,
+        resumable=resumable,
+        append=append,
     )
 
     return subset_function(
@@ -0,0 +1,183 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray
+
+from copernicusmarine import OutputNotCompatibleForAppend
+from copernicusmarine.download_functions import append_subset
+from copernicusmarine.download_functions.append_subset import (
+    append_to_netcdf,
+    append_to_zarr,
+    check_append_compatibility,
+    get_append_start_datetime,
+    get_last_time,
+    open_existing_output,
+    select_new_time_steps,
+)
+
+VALUES = np.random.rand(10, 4, 5).astype("float32")
+ENCODING = {
+    "thetao": {"dtype": "int16", "scale_factor": 0.001, "_FillValue": -32767}
+}
+
+
+def create_dataset(time_steps: slice) -> xarray.Dataset:
+    return xarray.Dataset(
+        {
+            "thetao": (
+                ("time", "latitude", "longitude"),
+                VALUES[time_steps],
+            ),
+        },
+        coords={
+            "time": pd.date_range("2020-01-01", periods=10)[time_steps],
+            "latitude": np.arange(4.0),
+            "longitude": np.arange(5.0),
+        },
+    )
+
+
+def open_new_time_steps() -> xarray.Dataset:
+    """
+    The new time steps as opened from the remote dataset:
+    lazy and encoded like the existing output.
+    """
+    dataset = create_dataset(slice(3, 10)).chunk({"time": 3})
+    dataset["thetao"].encoding.update(ENCODING["thetao"])
+    return dataset
+
+
+class TestAppendSubset:
+    def test_missing_time_window(self):
+        last_time = datetime(2020, 1, 6, tzinfo=timezone.utc)
+        start_datetime = get_append_start_datetime(
+            last_time, datetime(2020, 1, 1, tzinfo=timezone.utc)
+        )
+        assert (
+            last_time
+            < start_datetime
+            < datetime(2020, 1, 7, tzinfo=timezone.utc)
+        )
+        new_time_steps = select_new_time_steps(
+            create_dataset(slice(0, 10)), last_time
+        )
+        assert new_time_steps["time"].size == 4
+
+    def test_append_to_zarr(self, tmp_path):
+        output_path = tmp_path / "subset.zarr"
+        create_dataset(slice(0, 6)).chunk({"time": 4}).to_zarr(
+            output_path, encoding=ENCODING, zarr_format=2
+        )
+        existing_dataset = open_existing_output(output_path)
+        last_time = get_last_time(existing_dataset)
+        dataset = select_new_time_steps(open_new_time_steps(), last_time)
+        check_append_compatibility(existing_dataset, dataset)
+        append_to_zarr(dataset, existing_dataset, output_path, 2)
+        existing_dataset.close()
+        with xarray.open_zarr(output_path) as result:
+            assert result["time"].size == 10
+            np.testing.assert_allclose(
+                result["thetao"].values, VALUES, atol=0.001
+            )
+
+    def test_append_to_netcdf_in_place(self, tmp_path):
+        output_path = tmp_path / "subset.nc"
+        create_dataset(slice(0, 6)).to_netcdf(
+            output_path,
+            encoding=ENCODING,
+            engine="h5netcdf",
+            unlimited_dims=["time"],
+        )
+        with open_existing_output(output_path) as existing_dataset:
+            last_time = get_last_time(existing_dataset)
+            dataset = select_new_time_steps(open_new_time_steps(), last_time)
+            check_append_compatibility(existing_dataset, dataset)
+        assert append_to_netcdf(dataset, output_path)
+        with xarray.open_dataset(output_path) as result:
+            np.testing.assert_array_equal(
+                result["time"].values,
+                pd.date_range("2020-01-01", periods=10).values,
+            )
+            np.testing.assert_allclose(
+                result["thetao"].values, VALUES, atol=0.001
+            )
+
+    @pytest.mark.parametrize(
+        "netcdf_format, engine",
+        [("NETCDF4", "h5netcdf"), ("NETCDF3_64BIT", "netcdf4")],
+    )
+    def test_failed_netcdf_append_is_rolled_back(
+        self, tmp_path, monkeypatch, netcdf_format, engine
+    ):
+        output_path = tmp_path / "subset.nc"
+        create_dataset(slice(0, 6)).to_netcdf(
+            output_path,
+            encoding=ENCODING,
+            format=netcdf_format,
+            engine=engine,
+            unlimited_dims=["time"],
+        )
+        dataset = select_new_time_steps(
+            open_new_time_steps(), datetime(2020, 1, 6)
+        )
+        original_encode_block_variable = append_subset.encode_block_variable
+        encoded_variables = []
+
+        def encode_block_variable(*args):
+            # the connection is lost after the first block is written
+            if len(encoded_variables) == 2:
+                raise OSError("Connection lost")
+            encoded_variables.append(args[1])
+            return original_encode_block_variable(*args)
+
+        monkeypatch.setattr(
+            append_subset, "encode_block_variable", encode_block_variable
+        )
+        with pytest.raises(OSError):
+            append_to_netcdf(dataset, output_path, memory_budget=1)
+        assert list(tmp_path.iterdir()) == [output_path]
+        with xarray.open_dataset(output_path) as result:
+            assert result["time"].size == 6
+            np.testing.assert_allclose(
+                result["thetao"].values, VALUES[:6], atol=0.001
+            )
+
+        monkeypatch.undo()
+        assert append_to_netcdf(dataset, output_path, memory_budget=1)
+        with xarray.open_dataset(output_path) as result:
+            assert result["time"].size == 10
+            np.testing.assert_allclose(
+                result["thetao"].values, VALUES, atol=0.001
+            )
+
+    def test_netcdf_without_unlimited_time_is_not_appended(self, tmp_path):
+        output_path = tmp_path / "subset.nc"
+        create_dataset(slice(0, 6)).to_netcdf(
+            output_path, encoding=ENCODING, engine="h5netcdf"
+        )
+        assert not append_to_netcdf(create_dataset(slice(6, 10)), output_path)
+        with xarray.open_dataset(output_path) as result:
+            assert result["time"].size == 6
+
+    def test_incompatible_output_raises(self, tmp_path):
+        output_path = tmp_path / "subset.zarr"
+        create_dataset(slice(0, 6)).to_zarr(
+            output_path, encoding=ENCODING, zarr_format=2
+        )
+        dataset = open_new_time_steps()
+        with open_existing_output(output_path) as existing_dataset:
+            with pytest.raises(OutputNotCompatibleForAppend):
+                check_append_compatibility(
+                    existing_dataset,
+                    dataset.assign_coords(latitude=np.arange(1.0, 5.0)),
+                )
+            with pytest.raises(OutputNotCompatibleForAppend):
+                check_append_compatibility(
+                    existing_dataset,
+                    dataset.rename({"thetao": "so"}),
+                )
+            dataset["thetao"].encoding["scale_factor"] = 0.01
+            with pytest.raises(OutputNotCompatibleForAppend):
+                check_append_compatibility(existing_dataset, dataset)
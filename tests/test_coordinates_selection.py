@@ -0,0 +1,132 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import xarray
+
+from copernicusmarine.download_functions.subset_parameters import (
+    DepthParameters,
+    GeographicalParameters,
+    TemporalParameters,
+    XParameters,
+    YParameters,
+)
+from copernicusmarine.download_functions.subset_xarray import (
+    get_selection_indexes,
+    subset,
+)
+
+VALUES = np.array([0.0, 1.0, 2.0, 3.0, 4.0, 5.0])
+
+
+def select(values, coord_selection, coordinates_selection_method):
+    return values[
+        get_selection_indexes(
+            values, coord_selection, coordinates_selection_method
+        )
+    ].tolist()
+
+
+class TestCoordinatesSelection:
+    def test_selection_methods(self):
+        selection = slice(1.5, 3.5)
+        assert select(VALUES, selection, "inside") == [2.0, 3.0]
+        assert select(VALUES, selection, "strict-inside") == [2.0, 3.0]
+        assert select(VALUES, selection, "outside") == [1.0, 2.0, 3.0, 4.0]
+        # as close, the largest value is chosen
+        assert select(VALUES, selection, "nearest") == [2.0, 3.0, 4.0]
+        assert select(VALUES, slice(1.2, 3.9), "nearest") == [
+            1.0,
+            2.0,
+            3.0,
+            4.0,
+        ]
+
+    def test_decreasing_coordinate(self):
+        values = VALUES[::-1]
+        assert select(values, slice(1.5, 3.5), "inside") == [3.0, 2.0]
+        assert select(values, slice(1.5, 3.5), "outside") == [
+            4.0,
+            3.0,
+            2.0,
+            1.0,
+        ]
+
+    def test_empty_selection_and_single_value(self):
+        # the closest value to the start of the selection
+        assert select(VALUES, slice(2.2, 2.4), "inside") == [2.0]
+        assert select(VALUES, slice(8.0, 9.0), "inside") == [5.0]
+        assert select(VALUES, 3.4, "inside") == [3.0]
+        times = pd.date_range("2020-01-01", periods=5).values
+        assert get_selection_indexes(
+            times, datetime(2020, 1, 3, 11), "nearest"
+        ) == slice(2, 3)
+        assert get_selection_indexes(
+            times,
+            slice(datetime(2020, 1, 1, 12), datetime(2020, 1, 3, 12)),
+            "outside",
+        ) == slice(0, 4)
+
+    def test_subset_across_the_antimeridian_from_elevations(self):
+        longitudes = np.arange(-180.0, 180.0, 10.0)
+        elevations = np.array([-100.0, -10.0, -1.0])
+        dataset = xarray.Dataset(
+            {
+                "thetao": (
+                    ("time", "elevation", "latitude", "longitude"),
+                    np.random.rand(3, 3, 4, len(longitudes)),
+                )
+            },
+            coords={
+                "time": pd.date_range("2020-01-01", periods=3),
+                "elevation": elevations,
+                "latitude": np.arange(4.0),
+                "longitude": longitudes,
+            },
+        )
+        dataset["time"].encoding["units"] = "days since 1950-01-01"
+        result = subset(
+            dataset=dataset.chunk(),
+            variables=None,
+            geographical_parameters=GeographicalParameters(
+                YParameters(1.0, 2.0), XParameters(165.0, 195.0)
+            ),
+            temporal_parameters=TemporalParameters(
+                datetime(2020, 1, 2), datetime(2020, 1, 3)
+            ),
+            depth_parameters=DepthParameters(0.0, 10.0),
+            coordinates_selection_method="inside",
+        )
+        assert result["longitude"].values.tolist() == [170.0, 180.0, 190.0]
+        assert result["depth"].values.tolist() == [1.0, 10.0]
+        assert result["latitude"].values.tolist() == [1.0, 2.0]
+        assert result["time"].size == 2
+        np.testing.assert_array_equal(
+            result["thetao"].values,
+            dataset["thetao"].values[1:3, [2, 1], 1:3][..., [-1, 0, 1]],
+        )
+
+    def test_antimeridian_selection_keeps_the_chunks_of_the_ranges(self):
+        longitudes = np.arange(-180.0, 180.0, 1.0)
+        dataset = xarray.Dataset(
+            {"zos": (("longitude",), np.arange(len(longitudes)))},
+            coords={"longitude": longitudes},
+        ).chunk({"longitude": 10})
+        result = subset(
+            dataset=dataset,
+            variables=None,
+            geographical_parameters=GeographicalParameters(
+                x_axis_parameters=XParameters(175.0, 185.0)
+            ),
+            temporal_parameters=TemporalParameters(),
+            depth_parameters=DepthParameters(),
+            coordinates_selection_method="inside",
+        )
+        # one piece on each side of the antimeridian
+        assert result["zos"].chunks == ((5, 6),)
+        assert result["longitude"].values.tolist() == list(
+            np.arange(175.0, 186.0)
+        )
+        assert result["zos"].values.tolist() == list(range(355, 360)) + list(
+            range(0, 6)
+        )
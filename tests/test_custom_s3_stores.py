@@ -0,0 +1,604 @@
+import asyncio
+import concurrent.futures
+import pickle
+import time
+
+import botocore.exceptions
+import pytest
+import zarr
+
+from copernicusmarine.core_functions.chunk_cache import (
+    DiskChunkCache,
+    MemoryChunkCache,
+    _get_shared_memory_chunk_cache,
+)
+from copernicusmarine.core_functions.custom_s3_store_zarr_v2 import (
+    CustomS3StoreZarrV2,
+)
+from copernicusmarine.core_functions.request_hedging import RequestHedging
+from copernicusmarine.core_functions.retry_policy import (
+    RetryBudget,
+    RetryPolicy,
+)
+from copernicusmarine.core_functions.s3_errors import (
+    get_retry_after_seconds,
+    is_missing_object_error,
+    is_retryable_error,
+)
+from copernicusmarine.core_functions.sessions import get_boto3_client
+
+
+def client_error(
+    status: int, code: str, headers: dict | None = None
+) -> botocore.exceptions.ClientError:
+    return botocore.exceptions.ClientError(
+        {
+            "Error": {"Code": code, "Message": ""},
+            "ResponseMetadata": {
+                "HTTPStatusCode": status,
+                "HTTPHeaders": headers or {},
+            },
+        },
+        "GetObject",
+    )
+
+
+class FakeBody:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def read(self) -> bytes:
+        return self.content
+
+
+class FakeSession:
+    def __init__(self, objects: dict[str, bytes], errors: list | None = None):
+        self.objects = objects
+        self.errors = errors or []
+        self.calls: list[str] = []
+        self.byte_ranges: list[str | None] = []
+        self.head_calls: list[str] = []
+
+    def get_object(self, bucket_name: str, object_key: str, byte_range=None):
+        self.calls.append(object_key)
+        self.byte_ranges.append(byte_range)
+        if self.errors:
+            raise self.errors.pop(0)
+        if object_key not in self.objects:
+            raise client_error(404, "NoSuchKey")
+        content = self.objects[object_key]
+        if byte_range:
+            start, end = byte_range.removeprefix("bytes=").split("-")
+            if not start:
+                content = content[-int(end) :]
+            else:
+                content = content[int(start) : int(end) + 1 if end else None]
+        return {"Body": FakeBody(content)}
+
+    @property
+    def s3_client(self):
+        return self
+
+    def list_objects_v2(self, Bucket: str, Prefix: str, StartAfter: str):
+        if self.errors:
+            raise self.errors.pop(0)
+        return {
+            "Contents": [
+                {"Key": key}
+                for key in sorted(self.objects)
+                if key.startswith(Prefix) and key > StartAfter
+            ],
+            "IsTruncated": False,
+        }
+
+    def head_object(self, bucket_name: str, object_key: str):
+        self.head_calls.append(object_key)
+        if self.errors:
+            raise self.errors.pop(0)
+        if object_key not in self.objects:
+            raise client_error(404, "404")
+        return {"ContentLength": len(self.objects[object_key])}
+
+
+def create_store_v2(session: FakeSession, **kwargs) -> CustomS3StoreZarrV2:
+    store = CustomS3StoreZarrV2(
+        endpoint="https://s3.example.com",
+        bucket="bucket",
+        root_path="/root",
+        initial_retry_wait_seconds=0,
+        **kwargs,
+    )
+    store._session = session  # type: ignore
+    return store
+
+
+def create_store_v3(session: FakeSession):
+    from copernicusmarine.core_functions.custom_s3_store_zarr_v3 import (
+        CustomS3StoreZarrV3,
+    )
+
+    store = CustomS3StoreZarrV3(
+        endpoint="https://s3.example.com",
+        bucket="bucket",
+        root_path="/root",
+        initial_retry_wait_seconds=0,
+        read_only=True,
+    )
+    store._session = session  # type: ignore
+    return store
+
+
+class TestCustomS3Stores:
+    def test_s3_errors_classification(self):
+        for status, code in [(404, "NoSuchKey"), (403, "AccessDenied")]:
+            assert is_missing_object_error(client_error(status, code))
+            assert not is_retryable_error(client_error(status, code))
+        for status, code in [
+            (503, "SlowDown"),
+            (500, "InternalError"),
+            (429, "TooManyRequests"),
+        ]:
+            assert not is_missing_object_error(client_error(status, code))
+            assert is_retryable_error(client_error(status, code))
+        assert not is_retryable_error(client_error(400, "BadRequest"))
+        assert is_retryable_error(
+            botocore.exceptions.EndpointConnectionError(endpoint_url="url")
+        )
+        assert not is_retryable_error(ValueError())
+
+    def test_boto3_clients_are_shared(self):
+        endpoint = "https://pool.example.com"
+        client = get_boto3_client(endpoint, ["GetObject", "HeadObject"])
+        assert client is get_boto3_client(
+            endpoint, ["HeadObject", "GetObject"]
+        )
+        assert client is not get_boto3_client(
+            endpoint, ["GetObject", "HeadObject"], "user"
+        )
+        assert client is not get_boto3_client(endpoint, ["GetObject"])
+        bigger_client = get_boto3_client(
+            endpoint, ["GetObject", "HeadObject"], max_pool_connections=50
+        )
+        assert bigger_client.meta.config.max_pool_connections == 50
+        assert bigger_client is get_boto3_client(
+            endpoint, ["GetObject", "HeadObject"], max_pool_connections=20
+        )
+
+    def test_retry_after_header(self):
+        assert get_retry_after_seconds(client_error(503, "SlowDown")) is None
+        assert (
+            get_retry_after_seconds(
+                client_error(503, "SlowDown", {"retry-after": "3"})
+            )
+            == 3
+        )
+        assert (
+            get_retry_after_seconds(
+                client_error(
+                    429,
+                    "TooManyRequests",
+                    {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"},
+                )
+            )
+            == 0
+        )
+
+    def test_retry_policy(self):
+        policy = RetryPolicy(
+            number_of_retries=3,
+            initial_retry_wait_seconds=0,
+            retry_budget=RetryBudget(ratio=0, minimum_retries=2),
+        )
+        errors = [
+            client_error(503, "SlowDown", {"Retry-After": "0"}),
+            client_error(500, "InternalError"),
+        ]
+
+        def fn():
+            if errors:
+                raise errors.pop(0)
+            return "data"
+
+        assert policy.call(fn) == "data"
+        # the budget of the policy is exhausted
+        errors.append(client_error(500, "InternalError"))
+        with pytest.raises(botocore.exceptions.ClientError):
+            policy.call(fn)
+        assert policy.statistics.as_dict() == {
+            "requests": 2,
+            "retries": 2,
+            "retry_after_honoured": 1,
+            "budget_exhausted": 1,
+            "failures": 1,
+        }
+        # non retryable errors are raised immediately
+        other_policy = RetryPolicy(initial_retry_wait_seconds=0)
+        errors.append(client_error(400, "BadRequest"))
+        with pytest.raises(botocore.exceptions.ClientError):
+            other_policy.call(fn)
+        assert other_policy.statistics.as_dict()["retries"] == 0
+
+    def test_request_hedging(self):
+        hedging = RequestHedging(
+            max_hedged_requests_ratio=0.34, minimum_number_of_samples=2
+        )
+        delays = [0, 0, 5, 0]
+        cancelled = []
+
+        async def fn():
+            delay = delays.pop(0)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            # the latency of each try is recorded by the store
+            hedging.record_latency(delay)
+            return delay
+
+        async def run():
+            return [await hedging.run(fn) for _ in range(3)]
+
+        # the third request is slow: it is hedged and cancelled
+        assert asyncio.run(asyncio.wait_for(run(), timeout=4)) == [0, 0, 0]
+        assert cancelled == [5]
+        assert hedging.statistics() == {
+            "requests": 3,
+            "hedged_requests": 1,
+            "hedged_requests_won": 1,
+        }
+        # at most a third of the requests can be hedged
+        assert not hedging._try_spend_hedged_request()
+        # no hedge when there is no room left for one more request
+        delays.append(0.2)
+        assert asyncio.run(hedging.run(fn, can_hedge=lambda: False)) == 0.2
+        assert hedging.statistics()["hedged_requests"] == 1
+
+    def test_missing_chunk_is_not_retried_and_cached(self):
+        session = FakeSession({"root/0.0": b"data"})
+        store = create_store_v2(session)
+        assert store["0.0"] == b"data"
+        with pytest.raises(KeyError):
+            store["1.0"]
+        assert session.calls == ["root/0.0", "root/1.0"]
+        with pytest.raises(KeyError):
+            store["1.0"]
+        assert "1.0" not in store
+        assert session.calls == ["root/0.0", "root/1.0"]
+
+    def test_throttled_chunk_is_retried(self):
+        session = FakeSession(
+            {"root/0.0": b"data"},
+            errors=[client_error(503, "SlowDown")],
+        )
+        store = create_store_v2(session)
+        assert store["0.0"] == b"data"
+        assert session.calls == ["root/0.0", "root/0.0"]
+
+    def test_listing_is_retried_with_the_shared_retry_policy(self):
+        retry_policy = RetryPolicy(initial_retry_wait_seconds=0)
+        session = FakeSession(
+            {"root/.zattrs": b"{}", "root/0.0": b"data"},
+            errors=[client_error(503, "SlowDown")],
+        )
+        store = create_store_v2(session, retry_policy=retry_policy)
+        other_store = create_store_v2(
+            FakeSession({}), retry_policy=retry_policy
+        )
+        assert store.keys() == [".zattrs", "0.0"]
+        # the retry budget of the job is shared by its stores
+        assert other_store.retry_policy.statistics.as_dict()["retries"] == 1
+
+    def test_disk_chunk_cache(self, tmp_path):
+        cache = DiskChunkCache(tmp_path, max_size_mb=12 / (1024 * 1024))
+        session = FakeSession({"root/0.0": b"data", "root/1.0": b"other"})
+        store = create_store_v2(
+            session, chunk_cache=cache, cache_version="2024-01-01"
+        )
+        assert store["0.0"] == b"data"
+        assert store["0.0"] == b"data"
+        assert session.calls == ["root/0.0"]
+
+        new_version_store = create_store_v2(
+            session, chunk_cache=cache, cache_version="2024-06-01"
+        )
+        assert new_version_store["0.0"] == b"data"
+        assert session.calls == ["root/0.0", "root/0.0"]
+
+        # the oldest object is evicted to go under 80% of 12 bytes
+        time.sleep(0.01)
+        assert new_version_store["1.0"] == b"other"
+        key = DiskChunkCache.build_key
+        assert (
+            cache.get(key(store._endpoint, "bucket", "root/0.0", "2024-01-01"))
+            is None
+        )
+        assert (
+            cache.get(key(store._endpoint, "bucket", "root/0.0", "2024-06-01"))
+            == b"data"
+        )
+
+    def test_disk_chunk_cache_bookkeeping(self, tmp_path):
+        cache = DiskChunkCache(tmp_path, max_size_mb=100 / (1024 * 1024))
+        for index in range(10):
+            cache.set(str(index), b"0123456789")
+        cache.set("0", b"01234")
+        connection = cache._get_connection()
+        assert cache._get_total_size(connection) == 95
+        # the eviction goes down to the low-water mark at once
+        cache.set("10", b"0123456789")
+        assert cache._get_total_size(connection) == 75
+        (last_access,) = connection.execute(
+            "SELECT last_access FROM chunks WHERE key = '9'"
+        ).fetchone()
+        # the access times of the hits are written in batches
+        assert cache.get("9") == b"0123456789"
+        assert connection.execute(
+            "SELECT last_access FROM chunks WHERE key = '9'"
+        ).fetchone() == (last_access,)
+        assert list(cache._access_times) == ["9"]
+
+    def test_memory_chunk_cache(self):
+        cache = MemoryChunkCache(
+            "https://s3.example.com", "bucket", "root", 10 / (1024 * 1024)
+        )
+        session = FakeSession({"root/0.0": b"data", "root/1.0": b"another"})
+        store = create_store_v2(session, memory_chunk_cache=cache)
+        assert store["0.0"] == b"data"
+        assert store["0.0"] == b"data"
+        assert session.calls == ["root/0.0"]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        # the least recently used object is evicted to stay under 10 bytes
+        assert store["1.0"] == b"another"
+        assert store["0.0"] == b"data"
+        assert session.calls == ["root/0.0", "root/1.0", "root/0.0"]
+        assert cache.statistics() == {
+            "hits": 1,
+            "misses": 3,
+            "number_of_objects": 1,
+            "size": 4,
+        }
+
+    def test_memory_chunk_cache_is_shared(self):
+        cache = _get_shared_memory_chunk_cache(
+            "https://s3.example.com", "bucket", "shared", 1
+        )
+        assert cache is _get_shared_memory_chunk_cache(
+            "https://s3.example.com", "bucket", "shared", 1
+        )
+        assert pickle.loads(pickle.dumps(cache)) is cache
+        assert cache is not _get_shared_memory_chunk_cache(
+            "https://s3.example.com", "bucket", "other", 1
+        )
+
+    def test_concurrent_requests_are_coalesced(self):
+        session = FakeSession({"root/0.0": b"data"})
+        store = create_store_v2(session)
+        get_object = session.get_object
+
+        def slow_get_object(*args, **kwargs):
+            # wait for the other requests to join the one in flight
+            deadline = time.monotonic() + 5
+            while (
+                store._single_flight.requests < 5
+                and time.monotonic() < deadline
+            ):
+                time.sleep(0.01)
+            return get_object(*args, **kwargs)
+
+        session.get_object = slow_get_object  # type: ignore
+        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+            results = list(executor.map(lambda _: store["0.0"], range(5)))
+        assert results == [b"data"] * 5
+        assert session.calls == ["root/0.0"]
+        assert store._single_flight.statistics() == {
+            "requests": 5,
+            "coalesced_requests": 4,
+        }
+
+    @pytest.mark.skipif(
+        zarr.__version__.startswith("2"), reason="Requires zarr>=3"
+    )
+    def test_concurrent_requests_are_coalesced_zarr_v3(self):
+        from zarr.core.buffer import default_buffer_prototype
+
+        session = FakeSession({"root/0.0": b"data"})
+        store = create_store_v3(session)
+        get_object = session.get_object
+
+        def slow_get_object(*args, **kwargs):
+            deadline = time.monotonic() + 5
+            while (
+                store._single_flight.requests < 5
+                and time.monotonic() < deadline
+            ):
+                time.sleep(0.01)
+            return get_object(*args, **kwargs)
+
+        session.get_object = slow_get_object  # type: ignore
+
+        async def run():
+            return await asyncio.gather(
+                *(
+                    store.get("0.0", default_buffer_prototype())
+                    for _ in range(5)
+                )
+            )
+
+        results = asyncio.run(run())
+        assert [result.to_bytes() for result in results] == [b"data"] * 5
+        assert session.calls == ["root/0.0"]
+        assert store._single_flight.coalesced_requests == 4
+
+    @pytest.mark.skipif(
+        zarr.__version__.startswith("2"), reason="Requires zarr>=3"
+    )
+    def test_byte_range_requests_zarr_v3(self):
+        from zarr.abc.store import (
+            OffsetByteRequest,
+            RangeByteRequest,
+            SuffixByteRequest,
+        )
+        from zarr.core.buffer import default_buffer_prototype
+
+        session = FakeSession({"root/0.0": b"0123456789"})
+        store = create_store_v3(session)
+        prototype = default_buffer_prototype()
+
+        def get(byte_range):
+            buffer = asyncio.run(store.get("0.0", prototype, byte_range))
+            return buffer.to_bytes()
+
+        assert get(None) == b"0123456789"
+        assert get(RangeByteRequest(2, 5)) == b"234"
+        assert get(OffsetByteRequest(7)) == b"789"
+        assert get(SuffixByteRequest(4)) == b"6789"
+        assert get(RangeByteRequest(3, 3)) == b""
+        assert session.byte_ranges == [
+            None,
+            "bytes=2-4",
+            "bytes=7-",
+            "bytes=-4",
+        ]
+
+    @pytest.mark.skipif(
+        zarr.__version__.startswith("2"), reason="Requires zarr>=3"
+    )
+    def test_exists_uses_head_requests_zarr_v3(self):
+        session = FakeSession(
+            {"root/0.0": b"0123456789"},
+            errors=[client_error(503, "SlowDown")],
+        )
+        store = create_store_v3(session)
+        assert asyncio.run(store.exists("0.0"))
+        assert not asyncio.run(store.exists("1.0"))
+        assert not asyncio.run(store.exists("1.0"))
+        assert session.head_calls == ["root/0.0", "root/0.0", "root/1.0"]
+        assert session.calls == []
+
+    @pytest.mark.skipif(
+        zarr.__version__.startswith("2"), reason="Requires zarr>=3"
+    )
+    def test_get_partial_values_zarr_v3(self):
+        from zarr.abc.store import RangeByteRequest
+        from zarr.core.buffer import default_buffer_prototype
+
+        from copernicusmarine.core_functions.custom_s3_store_zarr_v3 import (
+            PartialValuesError,
+        )
+
+        session = FakeSession(
+            {f"root/{index}.0": str(index).encode() for index in range(20)}
+        )
+        store = create_store_v3(session)
+        store.max_concurrent_requests = 4
+        key_ranges = [(f"{index}.0", None) for index in reversed(range(20))]
+        key_ranges.append(("missing", None))
+        key_ranges.append(("10.0", RangeByteRequest(1, 2)))
+        results = asyncio.run(
+            store.get_partial_values(default_buffer_prototype(), key_ranges)
+        )
+        assert [
+            result.to_bytes() if result is not None else None
+            for result in results
+        ] == [str(index).encode() for index in reversed(range(20))] + [
+            None,
+            b"0",
+        ]
+
+        session.errors = [
+            client_error(400, "BadRequest"),
+            client_error(400, "InvalidRequest"),
+        ]
+        with pytest.raises(PartialValuesError) as error:
+            asyncio.run(
+                store.get_partial_values(
+                    default_buffer_prototype(),
+                    [("0.0", None), ("1.0", None), ("2.0", None)],
+                )
+            )
+        # all the failed keys are reported
+        assert len(error.value.errors) == 2
+        assert str(error.value).startswith("Failed to get 2 values")
+        # a single failure is raised as is
+        session.errors = [client_error(400, "BadRequest")]
+        with pytest.raises(botocore.exceptions.ClientError):
+            asyncio.run(
+                store.get_partial_values(
+                    default_buffer_prototype(),
+                    [("0.0", None), ("1.0", None)],
+                )
+            )
+        # the requests run in the threads of the store
+        assert store._executor is not None
+        assert store._executor._max_workers == 4
+        # the threads are given back once the requests end
+        assert store._threads_in_use == 0
+        assert store._has_free_thread()
+        store.close()
+        assert store._executor is None
+
+    @pytest.mark.skipif(
+        zarr.__version__.startswith("2"), reason="Requires zarr>=3"
+    )
+    def test_aiohttp_transport_zarr_v3(self):
+        web = pytest.importorskip("aiohttp.web")
+        from zarr.abc.store import RangeByteRequest
+        from zarr.core.buffer import default_buffer_prototype
+
+        requests = []
+
+        async def handler(request):
+            requests.append(request)
+            if request.path != "/bucket/root/0.0":
+                return web.Response(status=404)
+            content = b"0123456789"
+            if "Range" in request.headers:
+                start, end = (
+                    request.headers["Range"].removeprefix("bytes=").split("-")
+                )
+                return web.Response(
+                    status=206, body=content[int(start) : int(end) + 1]
+                )
+            return web.Response(body=content)
+
+        async def run():
+            app = web.Application()
+            app.router.add_get("/{tail:.*}", handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            store = create_store_v3(FakeSession({}))
+            store._endpoint = f"http://127.0.0.1:{port}"
+            store._copernicus_marine_username = "user"
+            store.s3_transport = "aiohttp"
+            prototype = default_buffer_prototype()
+            try:
+                return [
+                    await store.get("0.0", prototype),
+                    await store.get("0.0", prototype, RangeByteRequest(1, 3)),
+                    await store.get("1.0", prototype),
+                    await store.exists("0.0"),
+                    await store.exists("2.0"),
+                ]
+            finally:
+                await store._get_async_transport()._client_session.close()
+                await runner.cleanup()
+
+        full, partial, missing, exists, not_exists = asyncio.run(run())
+        assert full.to_bytes() == b"0123456789"
+        assert partial.to_bytes() == b"12"
+        assert missing is None
+        assert exists and not not_exists
+        assert [request.method for request in requests] == [
+            "GET",
+            "GET",
+            "GET",
+            "HEAD",
+            "HEAD",
+        ]
+        assert requests[0].query["x-cop-client"] == "copernicus-marine-toolbox"
+        assert requests[0].query["x-cop-user"] == "user"
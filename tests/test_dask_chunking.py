@@ -0,0 +1,69 @@
+from copernicusmarine.download_functions.dask_chunking import (
+    get_decoded_item_size,
+    plan_dask_chunking,
+)
+
+MB = 1024 * 1024
+
+
+def plan(**kwargs):
+    arguments = {
+        "zarr_chunk_lengths": {"time": 1, "latitude": 512, "longitude": 512},
+        "number_of_zarr_chunks": {"time": 100, "latitude": 4, "longitude": 1},
+        "variable_chunk_shapes": {
+            "thetao": {"time": 1, "latitude": 512, "longitude": 512}
+        },
+        "variable_item_sizes": {"thetao": 4},
+        "memory_budget": None,
+        "number_of_workers": 4,
+        "coordinates_priority": ["time", "latitude", "longitude"],
+    }
+    arguments.update(kwargs)
+    return plan_dask_chunking(**arguments)
+
+
+class TestDaskChunking:
+    def test_chunks_stay_within_memory_budget(self):
+        # 1MB per zarr chunk, 8MB per dask chunk at most
+        dask_chunking_plan = plan(memory_budget=64 * MB)
+        assert dask_chunking_plan.maximum_chunk_size == 8 * MB
+        assert dask_chunking_plan.largest_chunk_size <= 8 * MB
+        assert dask_chunking_plan.factors == {
+            "time": 8,
+            "latitude": 1,
+            "longitude": 1,
+        }
+        assert dask_chunking_plan.dask_chunking == {
+            "time": 8,
+            "latitude": 512,
+            "longitude": 512,
+        }
+        assert dask_chunking_plan.stopped_because["time"] == "memory"
+        assert dask_chunking_plan.stopped_because["longitude"] == "selection"
+
+    def test_enough_tasks_for_the_workers(self):
+        dask_chunking_plan = plan(number_of_workers=32)
+        assert dask_chunking_plan.number_of_tasks >= 32 * 4
+        assert "parallelism" in dask_chunking_plan.stopped_because.values()
+
+    def test_chunks_are_not_bigger_than_the_selection(self):
+        dask_chunking_plan = plan(number_of_workers=1)
+        assert dask_chunking_plan.factors["latitude"] <= 4
+        assert dask_chunking_plan.factors["time"] <= 100
+
+    def test_small_selection_does_not_use_dask(self):
+        dask_chunking_plan = plan(
+            number_of_zarr_chunks={"time": 2, "latitude": 2, "longitude": 1}
+        )
+        assert not dask_chunking_plan.use_dask
+
+    def test_chunk_size_limit(self):
+        dask_chunking_plan = plan(zarr_chunks_per_dask_chunk_limit=20)
+        assert dask_chunking_plan.use_dask
+        factors = dask_chunking_plan.factors
+        assert factors["time"] * factors["latitude"] <= 20
+
+    def test_decoded_item_size(self):
+        assert get_decoded_item_size("<f4") == 4
+        assert get_decoded_item_size("<i2") == 8
+        assert get_decoded_item_size(None) == 8
@@ -0,0 +1,33 @@
+import dask
+import dask.array
+
+from copernicusmarine.core_functions.models import DaskConfiguration
+from copernicusmarine.download_functions.dask_scheduler import (
+    get_dask_configuration,
+    use_dask_scheduler,
+)
+
+
+class TestDaskScheduler:
+    def test_default_scheduler_is_not_changed(self):
+        assert get_dask_configuration(None, 4, None) is None
+        with use_dask_scheduler(None):
+            assert dask.config.get("scheduler", None) is None
+
+    def test_dask_configuration(self):
+        dask_configuration = get_dask_configuration("threads", 4, "4GB")
+        assert dask_configuration == DaskConfiguration(
+            scheduler="threads", number_of_workers=4, memory_limit=None
+        )
+        dask_configuration = get_dask_configuration("distributed", None, "4GB")
+        assert dask_configuration.memory_limit == "4GB"
+
+    def test_scheduler_is_used_in_context(self):
+        array = dask.array.ones((10, 10), chunks=5)
+        with use_dask_scheduler(
+            DaskConfiguration(scheduler="threads", number_of_workers=2)
+        ):
+            assert dask.config.get("scheduler") == "threads"
+            assert dask.config.get("num_workers") == 2
+            assert array.sum().compute() == 100
+        assert dask.config.get("scheduler", None) is None
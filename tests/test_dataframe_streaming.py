@@ -0,0 +1,115 @@
+import logging
+
+import dask.callbacks
+import numpy as np
+import pandas as pd
+import pytest
+import xarray
+import zarr
+
+from copernicusmarine.download_functions.dataframe_streaming import (
+    iter_dataframe_blocks,
+    write_csv_by_blocks,
+    write_parquet_by_blocks,
+)
+
+
+def create_dataset() -> xarray.Dataset:
+    return xarray.Dataset(
+        {
+            "thetao": (
+                ("time", "depth", "latitude"),
+                np.random.rand(10, 2, 3),
+            ),
+            "zos": (("time", "latitude"), np.random.rand(10, 3)),
+        },
+        coords={
+            "time": pd.date_range("2020-01-01", periods=10),
+            "depth": [0.5, 1.5],
+            "latitude": [10.0, 10.5, 11.0],
+        },
+    ).chunk({"time": 4})
+
+
+class TestDataframeStreaming:
+    def test_blocks_concatenate_to_dataframe(self):
+        dataset = create_dataset()
+        blocks = list(iter_dataframe_blocks(dataset, memory_budget=1000))
+        assert len(blocks) > 1
+        pd.testing.assert_frame_equal(
+            pd.concat(blocks), dataset.to_dataframe()
+        )
+
+    @pytest.mark.skipif(
+        zarr.__version__.startswith("2"), reason="Requires zarr>=3"
+    )
+    def test_chunks_bigger_than_a_block_are_split(self, tmp_path):
+        create_dataset().to_zarr(
+            tmp_path / "dataset.zarr",
+            encoding={"thetao": {"chunks": (1, 2, 3)}},
+            zarr_format=3,
+            consolidated=False,
+        )
+        store = zarr.storage.LoggingStore(
+            zarr.storage.LocalStore(tmp_path / "dataset.zarr", read_only=True),
+            log_handler=logging.NullHandler(),
+        )
+        dataset = xarray.open_zarr(
+            store, chunks={"time": 4}, consolidated=False
+        )[["thetao"]]
+        store.counter.clear()
+        computed_lengths = []
+
+        def record_computed_length(key, result, dsk, state, worker_id):
+            if isinstance(result, np.ndarray) and result.ndim == 3:
+                computed_lengths.append(result.shape[0])
+
+        with dask.callbacks.Callback(posttask=record_computed_length):
+            blocks = list(iter_dataframe_blocks(dataset, memory_budget=2000))
+        # the chunks of 4 time steps are computed by blocks of 2
+        assert [len(block) for block in blocks] == [12] * 5
+        assert max(computed_lengths) == 2
+        # each stored chunk is read once
+        assert store.counter["get"] == 10
+        pd.testing.assert_frame_equal(
+            pd.concat(blocks), dataset.to_dataframe()
+        )
+
+    def test_csv_written_by_blocks(self, tmp_path):
+        dataset = create_dataset()
+        write_csv_by_blocks(
+            dataset,
+            tmp_path / "streamed.csv",
+            disable_progress_bar=True,
+            memory_budget=1000,
+        )
+        dataset.to_dataframe().to_csv(tmp_path / "expected.csv")
+        assert (tmp_path / "streamed.csv").read_text() == (
+            tmp_path / "expected.csv"
+        ).read_text()
+
+    def test_parquet_written_by_blocks(self, tmp_path):
+        import pyarrow.parquet
+
+        dataset = create_dataset().astype("float32")
+        write_parquet_by_blocks(
+            dataset,
+            tmp_path / "streamed.parquet",
+            disable_progress_bar=True,
+            memory_budget=1000,
+        )
+        parquet_file = pyarrow.parquet.ParquetFile(
+            tmp_path / "streamed.parquet"
+        )
+        assert parquet_file.metadata.num_row_groups > 1
+        assert parquet_file.schema_arrow.field("thetao").type == "float"
+        row_group = parquet_file.metadata.row_group(0)
+        latitude = row_group.column(
+            parquet_file.schema_arrow.names.index("latitude")
+        )
+        assert "RLE_DICTIONARY" in latitude.encodings
+        assert latitude.statistics.has_min_max
+        pd.testing.assert_frame_equal(
+            pd.read_parquet(tmp_path / "streamed.parquet"),
+            dataset.to_dataframe().reset_index(),
+        )
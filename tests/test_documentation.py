@@ -157,6 +157,11 @@ class TestDocumentation:
                     "Only available for platform chunked datasets."
                 ]
                 continue
+            if name_of_variable == "by_blocks":
+                assert parameter_desc[0].startswith(
+                    "If set, returns an iterator over DataFrames"
+                )
+                continue
             if name_of_variable == "dataset_id":
                 assert parameter_desc == ["The datasetID, required."]
                 continue
@@ -0,0 +1,157 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray
+
+from copernicusmarine.core_functions.custom_open_zarr import open_zarr_store
+from copernicusmarine.core_functions.models import IndexWindow
+from copernicusmarine.download_functions.chunk_calculator import (
+    get_index_windows,
+    is_index_window_covering,
+)
+from copernicusmarine.download_functions.subset_parameters import (
+    DepthParameters,
+    GeographicalParameters,
+    TemporalParameters,
+    XParameters,
+    YParameters,
+)
+from copernicusmarine.download_functions.subset_xarray import subset
+from tests.test_query_plan import get_services, get_subset_request
+
+
+def get_index_window_indexes(service, subset_request):
+    return {
+        coordinate_id: index_window.indexes
+        for coordinate_id, index_window in get_index_windows(
+            service,
+            subset_request.variables,
+            subset_request,
+            service.get_axis_coordinate_id_mapping(),
+        ).items()
+    }
+
+
+class TestIndexWindows:
+    def test_index_windows_from_the_catalogue(self):
+        service, _ = get_services()
+        # one value more on each side of the requested values,
+        # the depths are stored from the bottom
+        assert get_index_window_indexes(service, get_subset_request()) == {
+            "time": slice(9860, 9870),
+            "depth": slice(20, None),
+            "latitude": slice(147, 180),
+            "longitude": slice(133, 154),
+        }
+
+    def test_coordinates_without_window(self):
+        service, _ = get_services()
+        for coordinate in service.variables[0].coordinates:
+            if coordinate.coordinate_id == "latitude":
+                coordinate.step = None
+        subset_request = get_subset_request()
+        subset_request.minimum_x = 170
+        subset_request.maximum_x = -170
+        subset_request.minimum_depth = None
+        subset_request.maximum_depth = None
+        assert list(get_index_window_indexes(service, subset_request)) == [
+            "time"
+        ]
+
+    def test_index_windows_are_checked_against_the_coordinates(self):
+        index_window = IndexWindow(slice(2, 6), 3.5, 4.5)
+        assert is_index_window_covering(index_window, np.arange(2.0, 6.0))
+        assert is_index_window_covering(
+            index_window, np.arange(2.0, 6.0)[::-1]
+        )
+        assert not is_index_window_covering(index_window, np.arange(4.0, 8.0))
+        assert is_index_window_covering(
+            IndexWindow(slice(0, None), 3.5, 4.5), np.arange(4.0, 5.0)
+        )
+        times = pd.date_range("2020-01-01", periods=3).values
+        assert is_index_window_covering(
+            IndexWindow(slice(1, 4), 1577880000000, 1577966400000), times
+        )
+
+    @pytest.mark.parametrize(
+        "coordinates_selection_method", ["inside", "outside", "nearest"]
+    )
+    def test_subset_of_the_index_windows(
+        self, tmp_path, coordinates_selection_method
+    ):
+        dataset = xarray.Dataset(
+            {
+                "thetao": (
+                    ("time", "depth", "latitude", "longitude"),
+                    np.random.rand(20, 5, 10, 12).astype("float32"),
+                )
+            },
+            coords={
+                "time": pd.date_range("2020-01-01", periods=20),
+                "depth": np.arange(5.0),
+                "latitude": np.arange(10.0),
+                "longitude": np.arange(12.0),
+            },
+        )
+        dataset["latitude"].attrs["units"] = "degrees_north"
+        dataset.to_zarr(tmp_path / "dataset.zarr", zarr_format=2)
+
+        def open_and_subset(index_windows):
+            return subset(
+                dataset=open_zarr_store(
+                    str(tmp_path / "dataset.zarr"), index_windows, chunks={}
+                ),
+                variables=None,
+                geographical_parameters=GeographicalParameters(
+                    YParameters(2.5, 5.5), XParameters(3.0, 4.2)
+                ),
+                temporal_parameters=TemporalParameters(
+                    datetime(2020, 1, 5, 12), datetime(2020, 1, 8)
+                ),
+                depth_parameters=DepthParameters(),
+                coordinates_selection_method=coordinates_selection_method,
+            )
+
+        result = open_and_subset(
+            {
+                "time": slice(3, 9),
+                "latitude": slice(1, 7),
+                "longitude": slice(2, 6),
+            }
+        )
+        xarray.testing.assert_identical(result, open_and_subset(None))
+        assert result["time"].encoding["units"].startswith("days since")
+
+    def test_dask_graph_of_the_index_windows(self, tmp_path):
+        dataset = xarray.Dataset(
+            {
+                "thetao": (
+                    ("time", "latitude", "longitude"),
+                    np.random.rand(100, 10, 12).astype("float32"),
+                )
+            },
+            coords={
+                "time": pd.date_range("2020-01-01", periods=100),
+                "latitude": np.arange(10.0),
+                "longitude": np.arange(12.0),
+            },
+        )
+        dataset.to_zarr(
+            tmp_path / "dataset.zarr",
+            zarr_format=2,
+            encoding={"thetao": {"chunks": (1, 5, 5)}},
+        )
+        store = str(tmp_path / "dataset.zarr")
+        index_windows = {"time": slice(3, 9), "latitude": slice(2, None)}
+        for chunks in [{}, {"time": 4, "longitude": -1}]:
+            whole_dataset = open_zarr_store(store, chunks=chunks)
+            result = open_zarr_store(store, index_windows, chunks=chunks)
+            expected = whole_dataset.isel(index_windows)
+            xarray.testing.assert_identical(result, expected)
+            # the chunks are aligned on the stored chunks
+            assert result["thetao"].chunks == expected["thetao"].chunks
+        # only the tasks of the chunks of the windows and the array
+        assert len(result.__dask_graph__()) == 3 * 2 + 1
+        assert len(whole_dataset.__dask_graph__()) == 25 * 2 + 1
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray
+
+from copernicusmarine.download_functions import download_zarr
+from copernicusmarine.download_functions.netcdf_streaming import get_blocks
+
+
+def create_dataset() -> xarray.Dataset:
+    dataset = xarray.Dataset(
+        {
+            "thetao": (
+                ("time", "latitude", "longitude"),
+                np.random.rand(10, 4, 5).astype("float32"),
+            ),
+            "mask": (("latitude", "longitude"), np.ones((4, 5))),
+        },
+        coords={
+            "time": pd.date_range("2020-01-01", periods=10, freq="h"),
+            "latitude": np.arange(4.0),
+            "longitude": np.arange(5.0),
+        },
+    ).chunk({"time": 3})
+    dataset["thetao"] = dataset["thetao"].where(dataset["thetao"] > 0.1)
+    dataset["thetao"].encoding.update(
+        {
+            "dtype": "int16",
+            "scale_factor": 0.001,
+            "add_offset": 0.0,
+            "_FillValue": -32767,
+        }
+    )
+    return dataset
+
+
+class TestNetCDFStreaming:
+    def test_blocks_are_aligned_on_chunks(self):
+        dataset = create_dataset()
+        # 88 bytes per time step
+        assert get_blocks(dataset, "time", 88 * 7) == [
+            slice(0, 6),
+            slice(6, 10),
+        ]
+        assert get_blocks(dataset, "time", 88 * 2) == [
+            slice(0, 2),
+            slice(2, 3),
+            slice(3, 5),
+            slice(5, 6),
+            slice(6, 8),
+            slice(8, 10),
+        ]
+
+    @pytest.mark.parametrize("netcdf_compression_level", [0, 1])
+    def test_streamed_netcdf_is_identical(
+        self, tmp_path, monkeypatch, netcdf_compression_level
+    ):
+        dataset = create_dataset()
+        download_zarr._download_dataset_as_netcdf(
+            dataset.copy(),
+            tmp_path / "expected.nc",
+            netcdf_compression_level,
+            False,
+        )
+        monkeypatch.setattr(
+            download_zarr, "NETCDF_MEMORY_BUDGET_MB", 200 / 1024 / 1024
+        )
+        download_zarr._download_dataset_as_netcdf(
+            dataset.copy(),
+            tmp_path / "streamed.nc",
+            netcdf_compression_level,
+            False,
+        )
+        with xarray.open_dataset(
+            tmp_path / "expected.nc"
+        ) as expected, xarray.open_dataset(tmp_path / "streamed.nc") as result:
+            xarray.testing.assert_identical(result, expected)
+            assert result["thetao"].encoding["dtype"] == np.dtype("int16")
+            assert result["time"].encoding["units"] == "hours since 2020-01-01"
+
+    def test_netcdf_compressed_in_parallel_is_identical(
+        self, tmp_path, monkeypatch
+    ):
+        dataset = create_dataset()
+        download_zarr._download_dataset_as_netcdf(
+            dataset.copy(), tmp_path / "expected.nc", 4, False
+        )
+        monkeypatch.setattr(download_zarr, "NETCDF_COMPRESSION_WORKERS", 4)
+        monkeypatch.setattr(
+            download_zarr, "NETCDF_MEMORY_BUDGET_MB", 200 / 1024 / 1024
+        )
+        download_zarr._download_dataset_as_netcdf(
+            dataset.copy(), tmp_path / "compressed.nc", 4, False
+        )
+        with xarray.open_dataset(
+            tmp_path / "expected.nc"
+        ) as expected, xarray.open_dataset(
+            tmp_path / "compressed.nc"
+        ) as result:
+            xarray.testing.assert_identical(result, expected)
+            assert result["thetao"].encoding["zlib"]
+            assert result["thetao"].encoding["shuffle"]
+            assert result["thetao"].encoding["complevel"] == 4
+        netCDF4 = pytest.importorskip("netCDF4")
+        with netCDF4.Dataset(
+            tmp_path / "expected.nc"
+        ) as expected, netCDF4.Dataset(tmp_path / "compressed.nc") as result:
+            np.testing.assert_array_equal(
+                result["thetao"][:], expected["thetao"][:]
+            )
@@ -0,0 +1,249 @@
+from datetime import datetime, timezone
+
+import pystac
+
+from copernicusmarine.catalogue_parser.models import (
+    CopernicusMarinePart,
+    CopernicusMarineService,
+    CopernicusMarineServiceNames,
+)
+from copernicusmarine.core_functions.models import ServiceCost
+from copernicusmarine.core_functions.request_structure import SubsetRequest
+from copernicusmarine.download_functions.query_plan import (
+    ServiceCostModel,
+    get_query_plan,
+    get_service_query_plan,
+    plan_arco_services,
+)
+from tests.resources.mock_stac_catalog_WAW3.mock_dataset_NWSHELF_P1D_m_202012 import (  # noqa: E501
+    MOCK_DATASET_NWSHELF_P1D_M_202012,
+)
+
+# average size of the compressed chunks in the mock catalogue
+CHUNK_SIZE = 1320000
+
+
+def get_services() -> list[CopernicusMarineService]:
+    item = pystac.Item.from_dict(MOCK_DATASET_NWSHELF_P1D_M_202012)
+    return [
+        CopernicusMarineService.from_metadata_item(
+            item, asset_name, item.assets[asset_name]
+        )
+        for asset_name in ["timeChunked", "geoChunked"]
+    ]
+
+
+def get_dataset_part(
+    services: list[CopernicusMarineService] | None = None,
+) -> CopernicusMarinePart:
+    return CopernicusMarinePart(
+        name="default",
+        services=services or get_services(),
+        retired_date=None,
+        released_date=None,
+        arco_updating_start_date=None,
+        arco_updated_date=None,
+        url_metadata="",
+    )
+
+
+def get_subset_request() -> SubsetRequest:
+    return SubsetRequest(
+        dataset_id="cmems_mod_nws_bgc-pft_myint_7km-3D-pico_P1D-m",
+        username="username",
+        variables=["chl"],
+        start_datetime=datetime(2020, 1, 1, tzinfo=timezone.utc),
+        end_datetime=datetime(2020, 1, 8, tzinfo=timezone.utc),
+        minimum_y=50,
+        maximum_y=52,
+        minimum_x=-5,
+        maximum_x=-3,
+        minimum_depth=0,
+        maximum_depth=10,
+    )
+
+
+class TestQueryPlan:
+    def test_chunk_keys_of_geoseries(self):
+        service, _ = get_services()
+        service_plan = get_service_query_plan(
+            service, get_subset_request(), concurrency=32
+        )
+        # 8 days in chunks of 4 days, 3 depths in chunks of 2 depths
+        # and the area in a single chunk
+        assert service_plan.variables[0].chunk_keys == [
+            "chl/2465.10.0.0",
+            "chl/2465.11.0.0",
+            "chl/2466.10.0.0",
+            "chl/2466.11.0.0",
+            "chl/2467.10.0.0",
+            "chl/2467.11.0.0",
+        ]
+        assert service_plan.number_of_chunks == 6
+        assert service_plan.estimated_compressed_bytes == 6 * CHUNK_SIZE
+        # the chunks, the four coordinates and the metadata
+        assert service_plan.number_of_requests == 11
+        assert service_plan.number_of_request_waves == 1
+
+    def test_waves_of_requests(self):
+        _, service = get_services()
+        service_plan = get_service_query_plan(
+            service, get_subset_request(), concurrency=4
+        )
+        assert service_plan.number_of_chunks == 18
+        assert all(
+            chunk_key.startswith("chl/4.")
+            for chunk_key in service_plan.variables[0].chunk_keys
+        )
+        assert service_plan.number_of_requests == 23
+        assert service_plan.number_of_request_waves == 6
+
+    def test_query_plan_of_the_arco_services(self):
+        query_plan = get_query_plan(
+            get_subset_request(),
+            get_dataset_part(),
+            CopernicusMarineServiceNames.GEOSERIES,
+            concurrency=32,
+        )
+        assert query_plan.selected_service == "arco-geo-series"
+        assert [
+            service_plan.service_name for service_plan in query_plan.services
+        ] == ["arco-geo-series", "arco-time-series"]
+
+    def test_cheapest_service_is_selected(self):
+        dataset_part = get_dataset_part()
+        service_plan = plan_arco_services(
+            get_subset_request(), dataset_part, concurrency=32
+        )
+        assert service_plan.selected_service == "arco-geo-series"
+        assert service_plan.variable_services is None
+        geoseries_cost = service_plan.costs["arco-geo-series"]
+        assert geoseries_cost.estimated_compressed_bytes == 6 * CHUNK_SIZE
+        assert geoseries_cost.number_of_requests == 11
+        assert (
+            geoseries_cost.expected_wall_time_seconds
+            < service_plan.costs["arco-time-series"].expected_wall_time_seconds
+        )
+
+        subset_request = get_subset_request()
+        subset_request.start_datetime = datetime(
+            2000, 1, 1, tzinfo=timezone.utc
+        )
+        service_plan = plan_arco_services(
+            subset_request, dataset_part, concurrency=32
+        )
+        assert service_plan.selected_service == "arco-time-series"
+
+    def test_cost_model_is_pluggable(self):
+        class BytesCostModel(ServiceCostModel):
+            def get_cost(
+                self,
+                number_of_requests,
+                estimated_compressed_bytes,
+                concurrency,
+            ):
+                return ServiceCost(
+                    estimated_compressed_bytes=estimated_compressed_bytes,
+                    number_of_requests=number_of_requests,
+                    expected_wall_time_seconds=-estimated_compressed_bytes,
+                )
+
+        service_plan = plan_arco_services(
+            get_subset_request(),
+            get_dataset_part(),
+            concurrency=32,
+            cost_model=BytesCostModel(),
+        )
+        assert service_plan.selected_service == "arco-time-series"
+
+    def test_ties_and_missing_services(self):
+        class ConstantCostModel(ServiceCostModel):
+            def get_cost(
+                self,
+                number_of_requests,
+                estimated_compressed_bytes,
+                concurrency,
+            ):
+                return ServiceCost(
+                    estimated_compressed_bytes=estimated_compressed_bytes,
+                    number_of_requests=number_of_requests,
+                    expected_wall_time_seconds=1.0,
+                )
+
+        dataset_part = get_dataset_part()
+        dataset_part.services.reverse()
+        service_plan = plan_arco_services(
+            get_subset_request(),
+            dataset_part,
+            concurrency=32,
+            cost_model=ConstantCostModel(),
+        )
+        assert service_plan.selected_service == "arco-geo-series"
+
+        dataset_part.services = []
+        service_plan = plan_arco_services(
+            get_subset_request(), dataset_part, concurrency=32
+        )
+        assert service_plan.selected_service == "arco-geo-series"
+        assert service_plan.costs == {}
+
+    def test_variables_with_different_chunking_are_mixed(self):
+        geoseries, timeseries = get_services()
+        # a 2D variable chunked along the time in both services
+        for service, time_chunking_length in [
+            (geoseries, 1),
+            (timeseries, 2156),
+        ]:
+            variable = service.variables[0].model_copy(deep=True)
+            variable.short_name = "mlotst"
+            variable.coordinates = [
+                coordinate
+                for coordinate in variable.coordinates
+                if coordinate.coordinate_id != "depth"
+            ]
+            for coordinate in variable.coordinates:
+                coordinate.chunking_length = (
+                    time_chunking_length
+                    if coordinate.coordinate_id == "time"
+                    else 1000
+                )
+            service.variables.append(variable)
+        subset_request = get_subset_request()
+        subset_request.variables = ["chl", "mlotst"]
+        service_plan = plan_arco_services(
+            subset_request,
+            get_dataset_part([geoseries, timeseries]),
+            concurrency=1,
+        )
+        assert service_plan.variable_services == {
+            "chl": "arco-geo-series",
+            "mlotst": "arco-time-series",
+        }
+        assert service_plan.mixed_cost is not None
+        assert (
+            service_plan.mixed_cost.expected_wall_time_seconds
+            < service_plan.costs[
+                service_plan.selected_service
+            ].expected_wall_time_seconds
+        )
+
+    def test_chunks_on_both_sides_of_the_antimeridian(self):
+        _, service = get_services()
+        # a global longitude of 1440 values in 90 chunks
+        for coordinate in service.variables[0].coordinates:
+            if coordinate.coordinate_id == "longitude":
+                coordinate.minimum_value = -180
+                coordinate.maximum_value = 179.75
+                coordinate.step = 0.25
+        subset_request = get_subset_request()
+        subset_request.minimum_x = 179
+        subset_request.maximum_x = -179
+        chunk_keys = (
+            get_service_query_plan(service, subset_request, concurrency=32)
+            .variables[0]
+            .chunk_keys
+        )
+        assert {chunk_key.split(".")[-1] for chunk_key in chunk_keys} == {
+            "0",
+            "89",
+        }
@@ -0,0 +1,84 @@
+import dask.array
+import numpy as np
+import pandas as pd
+import pytest
+import xarray
+
+from copernicusmarine.download_functions.resumable_zarr import (
+    get_staging_paths,
+    write_zarr_resumably,
+)
+
+VALUES = np.random.rand(10, 4, 5).astype("float32")
+
+
+class Interruption(Exception):
+    pass
+
+
+def create_dataset(
+    computed_blocks: list[int], fail_on_block: int | None = None
+) -> xarray.Dataset:
+    def compute_block(block, block_info=None):
+        block_index = block_info[None]["chunk-location"][0]
+        if block_index == fail_on_block:
+            raise Interruption()
+        computed_blocks.append(block_index)
+        return block
+
+    return xarray.Dataset(
+        {
+            "thetao": (
+                ("time", "latitude", "longitude"),
+                dask.array.from_array(VALUES, chunks=(3, 4, 5)).map_blocks(
+                    compute_block, dtype="float32"
+                ),
+            ),
+        },
+        coords={
+            "time": pd.date_range("2020-01-01", periods=10),
+            "latitude": np.arange(4.0),
+            "longitude": np.arange(5.0),
+        },
+    )
+
+
+class TestResumableZarr:
+    def test_interrupted_download_is_resumed(self, tmp_path):
+        output_path = tmp_path / "subset.zarr"
+        staging_path, manifest_path = get_staging_paths(output_path)
+        computed_blocks: list[int] = []
+        with pytest.raises(Interruption):
+            write_zarr_resumably(
+                create_dataset(computed_blocks, fail_on_block=2),
+                output_path,
+                2,
+            )
+        assert computed_blocks == [0, 1]
+        assert staging_path.is_dir() and manifest_path.exists()
+        assert not output_path.exists()
+
+        computed_blocks.clear()
+        write_zarr_resumably(create_dataset(computed_blocks), output_path, 2)
+        assert computed_blocks == [2, 3]
+        assert not staging_path.exists() and not manifest_path.exists()
+        with xarray.open_zarr(output_path) as result:
+            np.testing.assert_array_equal(result["thetao"].values, VALUES)
+            assert result["time"].size == 10
+
+    def test_staging_store_of_another_request_is_not_resumed(self, tmp_path):
+        output_path = tmp_path / "subset.zarr"
+        computed_blocks: list[int] = []
+        with pytest.raises(Interruption):
+            write_zarr_resumably(
+                create_dataset(computed_blocks, fail_on_block=2),
+                output_path,
+                2,
+            )
+        computed_blocks.clear()
+        write_zarr_resumably(
+            create_dataset(computed_blocks).isel(time=slice(0, 9)),
+            output_path,
+            2,
+        )
+        assert computed_blocks == [0, 1, 2]